@@ -7,6 +7,7 @@ Current Contents:
 * request: Request and FieldStorage classes, which are used for
   managing requests.
 * response: Response classes and functions for creating HTTP responses.
+* json_codec: Pluggable JSON codecs for request parsing and JSON responses.
 * results: Default result handlers for the connector, such as directory index,
   server errors, or debug output handlers.
 * session: Cookie session classes — ``Session`` (plain cookie wrapper) and
@@ -15,6 +16,7 @@ Current Contents:
 * aes_session: ``AESSession`` — stronger self-contained encrypted session
   cookie using AES-256-CTR + HMAC-SHA256 (requires ``pyaes``).
 * state: Constants like HTTP status codes and method types.
+* routing: Dispatch structures for regular expression routes.
 * wsgi: The Application callable class, which is the main entry point for a
   PoorWSGI web application.
 * digest: HTTP Digest Authorization support.
@@ -18,6 +18,7 @@ from typing import Any, Dict, Literal, Optional, Union
 from pyaes import (  # type: ignore[import-untyped]
     AESModeOfOperationCTR, Counter)
 
+from poorwsgi.headers import RequestCookies
 from poorwsgi.session import Session, SessionError
 
 log = getLogger("poorwsgi")
@@ -114,7 +115,10 @@ class AESSession(Session):
         The 16-byte nonce is prepended to the ciphertext so each cookie uses
         a unique CTR counter, preventing nonce-reuse attacks.
         """
-        if not isinstance(cookies, SimpleCookie) or self._sid not in cookies:
+        if (
+            not isinstance(cookies, (SimpleCookie, RequestCookies))
+            or self._sid not in cookies
+        ):
             return
         raw = cookies[self._sid].value
         if not raw:
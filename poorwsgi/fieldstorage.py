@@ -11,9 +11,9 @@ import warnings
 from abc import ABCMeta, abstractmethod
 from email.parser import FeedParser
 from io import BytesIO, StringIO, TextIOWrapper
-from typing import Any, Callable, Optional, Union
+from typing import Any, Callable, Mapping, Optional, Union
 
-from poorwsgi.headers import parse_header, Headers
+from poorwsgi.headers import EMPTY_PARAMS, cached_header, Headers
 
 _RE_STR_BOUNDARY = re.compile("^[ -~]{0,200}[!-~]$")
 _RE_BIN_BOUNDARY = re.compile(b"^[ -~]{0,200}[!-~]$")
@@ -124,9 +124,11 @@ class FieldStorage(FieldStorageInterface):
     :type:          The MIME type of the variable. All variables have an
                     internal MIME type; if it is not a file, the MIME
                     type is text/plain.
-    :type_options:  Other Content-Type parameters, such as encoding.
+    :type_options:  Other Content-Type parameters, such as encoding, as
+                    a read-only mapping.
     :disposition:   The Content-Disposition header, if set.
-    :disposition_options: Other Content-Disposition parameters, if set.
+    :disposition_options: Other Content-Disposition parameters, if set,
+                    as a read-only mapping.
     :filename:      If the variable is a file, filename is its name
                     from the form.
     :length:        The field length if it was set in the header;
@@ -153,9 +155,9 @@ class FieldStorage(FieldStorageInterface):
     length: int
     file = None
     type: str
-    type_options: dict
+    type_options: Mapping[str, str]
     disposition: str
-    disposition_options: dict
+    disposition_options: Mapping[str, str]
 
     def __init__(self, name: Optional[str] = None,
                  value: Optional[str] = None):
@@ -515,11 +517,11 @@ class FieldStorageParser:
         but it is not understood.
         """
         if 'content-type' in self.headers:
-            ctype, pdict = parse_header(self.headers['content-type'])
+            ctype, pdict = cached_header(self.headers['content-type'])
         elif self.outerboundary:
-            ctype, pdict = "text/plain", {}
+            ctype, pdict = "text/plain", EMPTY_PARAMS
         else:
-            ctype, pdict = 'application/x-www-form-urlencoded', {}
+            ctype, pdict = 'application/x-www-form-urlencoded', EMPTY_PARAMS
         return ctype, pdict
 
     def parse(self) -> FieldStorage:
@@ -528,9 +530,9 @@ class FieldStorageParser:
         field = FieldStorage()
 
         # Process content-disposition header
-        cdisp, pdict = "", {}
+        cdisp, pdict = "", EMPTY_PARAMS
         if 'content-disposition' in self.headers:
-            cdisp, pdict = parse_header(self.headers['content-disposition'])
+            cdisp, pdict = cached_header(self.headers['content-disposition'])
 
         field.disposition = cdisp
         field.disposition_options = pdict
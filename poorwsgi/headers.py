@@ -1,20 +1,39 @@
 """Classes that are used for managing headers.
 
-:Classes:   Headers
-:Functions: parse_negotiation, render_negotiation
+:Classes:   Headers, EnvironHeaders, RequestCookies
+:Functions: parse_header, cached_header, parse_negotiation,
+            cached_negotiation, negotiate,
+            render_negotiation, environ_key, header_name
 """
 from collections.abc import Mapping
+from functools import lru_cache
+from http.cookies import CookieError, Morsel, SimpleCookie
 from logging import getLogger
+from types import MappingProxyType
 from wsgiref.headers import _formatparam  # type: ignore
 
 import re
 
 from datetime import datetime, timezone
-from typing import Union, List, Tuple, Optional, Dict
+from typing import Union, List, Tuple, Optional, Dict, FrozenSet
 
 log = getLogger('poorwsgi')
 # pylint: disable=consider-using-f-string
 
+# read-only empty parameters of cached_header
+EMPTY_PARAMS: Mapping = MappingProxyType({})
+
+# decoder of cookie values
+COOKIE_DECODER = SimpleCookie()
+# reserved cookie attributes, like in http.cookies.Morsel
+COOKIE_ATTRIBUTES: FrozenSet[str] = frozenset((
+    'expires', 'path', 'comment', 'domain', 'max-age', 'secure', 'httponly',
+    'version', 'samesite', 'partitioned'))
+# legal cookie name, the same characters as in http.cookies
+RE_COOKIE_NAME = re.compile(r"[\w!#$%&'*+\-.^`|~:]+", re.ASCII)
+# cookie field, where quoted value could contain the semicolon
+RE_COOKIE_FIELD = re.compile(r'(?:[^;"]+|"(?:[^"\\]|\\.)*"?)+')
+
 # https://httpwg.org/specs/rfc9110.html#field.date
 # e.g. Tue, 15 Nov 1994 08:12:31 GMT
 HEADER_DATETIME_FORMAT = "%a, %d %b %Y %X GMT"
@@ -63,29 +82,120 @@ def parse_header(line):
     return key, pdict
 
 
+@lru_cache(maxsize=256)
+def cached_header(line: str) -> Tuple[str, Mapping]:
+    """Returns parse_header result with read-only parameters, which is cached.
+
+    A value with at most one parameter and without quotes, like
+    ``text/html; charset=utf-8``, is split without the parameter parser.
+
+    >>> cached_header('text/html; Charset=utf-8')
+    ('text/html', mappingproxy({'charset': 'utf-8'}))
+    >>> cached_header('form-data; name="a;b"; filename="x.txt"')
+    ('form-data', mappingproxy({'name': 'a;b', 'filename': 'x.txt'}))
+    """
+    if '"' in line or line.count(';') > 1:
+        key, pdict = parse_header(line)
+        return key, MappingProxyType(pdict) if pdict else EMPTY_PARAMS
+    key, _, param = line.partition(';')
+    name, eq, value = param.partition('=')
+    if not eq:
+        return key.strip(), EMPTY_PARAMS
+    return key.strip(), MappingProxyType({name.strip().lower(): value.strip()})
+
+
 def parse_negotiation(value: str):
     """Parses content negotiation headers into a list of (value, quality)
     tuples.
 
+    Parameters are split by semicolons with optional whitespace, the ``q``
+    parameter is found case-insensitively and it is not part of the value,
+    like extension parameters after it.
+
     >>> parse_negotiation('gzip;q=1.0, identity;q=0.5, *;q=0')
     [('gzip', 1.0), ('identity', 0.5), ('*', 0.0)]
-    >>> parse_negotiation('text/html;level=1, text/html;level=2;q=0.5')
+    >>> parse_negotiation('text/html;level=1, text/html; level=2; Q=0.5')
     [('text/html;level=1', 1.0), ('text/html;level=2', 0.5)]
     """
     values = []
     for item in value.split(','):
-        pair = item.split(';q=')
-        if pair[0] == item:
-            values.append((item.strip(), 1.0))
-            continue
-        try:
-            quality = float(pair[1])
-        except (IndexError, ValueError):
-            quality = 1.0
-        values.append((pair[0].strip(), quality))
+        params = [param.strip() for param in item.split(';')]
+        quality = 1.0
+        for pos, param in enumerate(params[1:], 1):
+            name, _, val = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(val.strip())
+                except ValueError:
+                    pass
+                del params[pos:]
+                break
+        values.append((';'.join(params), quality))
     return values
 
 
+@lru_cache(maxsize=256)
+def cached_negotiation(value: str) -> Tuple[Tuple[str, float], ...]:
+    """Returns parse_negotiation result as a tuple, which is cached.
+
+    There are only a few distinct negotiation headers in real traffic, so
+    the same tuple is returned for the same header value of all requests.
+
+    >>> cached_negotiation('gzip;q=1.0, *;q=0')
+    (('gzip', 1.0), ('*', 0.0))
+    """
+    return tuple(parse_negotiation(value))
+
+
+@lru_cache(maxsize=256)
+def negotiate(value: str, offers: Tuple[str, ...]) -> Optional[str]:
+    """Returns the best offer for the negotiation header value.
+
+    The quality of each offer is taken from the most specific matching
+    value of the header: the same value, then the longest prefix like
+    ``text/*`` or ``en`` for ``en-US``, then ``*`` or ``*/*``. The offer
+    with the highest quality wins, and offers with the same quality are
+    chosen in their order. Offers with zero quality are not acceptable, so
+    None is returned when no offer is acceptable. When the header is empty,
+    the first offer is returned. Values are compared case-insensitively,
+    and results are cached.
+
+    >>> negotiate('text/*;q=0.5, application/json', ('text/html', 'text/xml'))
+    'text/html'
+    >>> negotiate('text/*;q=0.5, application/json',
+    ...           ('text/html', 'application/json'))
+    'application/json'
+    >>> negotiate('en;q=0.8, en-GB, *;q=0', ('cs', 'en-US', 'en-GB'))
+    'en-GB'
+    >>> negotiate('gzip, *;q=0', ('br', 'deflate')) is None
+    True
+    """
+    if not value.strip():
+        return offers[0] if offers else None
+    preferences = tuple(
+        (key.lower(), quality) for key, quality in cached_negotiation(value)
+    )
+    best, best_quality = None, 0.0
+    for offer in offers:
+        name = offer.lower()
+        rank, quality = (0, 0), 0.0
+        for key, val in preferences:
+            if key == name:
+                match = (3, 0)
+            elif key in ('*', '*/*'):
+                match = (1, 0)
+            elif (key.endswith('/*') and name.startswith(key[:-1])) \
+                    or name.startswith(key + '-'):
+                match = (2, len(key))
+            else:
+                continue
+            if match > rank:
+                rank, quality = match, val
+        if quality > best_quality:
+            best, best_quality = offer, quality
+    return best
+
+
 def render_negotiation(negotation: List[Tuple]):
     """Renders a negotiation header value from tuples.
 
@@ -229,7 +339,7 @@ class Headers(Mapping):
     Some headers can be set twice. Currently, a response can contain
     multiple ``Set-Cookie`` headers, but you can use the add_header
     method to add multiple headers with the same name. Alternatively,
-    you can create headers from tuples, which is used in Request.
+    you can create headers from tuples.
 
     When multiple headers with the same name are set in an HTTP request,
     the server joins their values into one.
@@ -427,3 +537,196 @@ class Headers(Mapping):
             return value.encode('iso-8859-1').decode('utf-8')
         except UnicodeError:
             return value  # probably utf-8 yet
+
+
+# environ keys of headers without the HTTP_ prefix
+CONTENT_KEYS = ('CONTENT_TYPE', 'CONTENT_LENGTH')
+
+
+@lru_cache(maxsize=1024)
+def header_name(key: str) -> Optional[str]:
+    """Returns the header name for the WSGI environ key, or None if the key
+    is not a header.
+
+    >>> header_name('HTTP_X_FORWARDED_FOR'), header_name('CONTENT_TYPE')
+    ('X-Forwarded-For', 'Content-Type')
+    >>> header_name('PATH_INFO') is None
+    True
+    """
+    if key[:5] == 'HTTP_':
+        key = key[5:]
+    elif key not in CONTENT_KEYS:
+        return None
+    return '-'.join(part.capitalize() for part in key.split('_'))
+
+
+@lru_cache(maxsize=1024)
+def environ_key(name: str) -> Optional[str]:
+    """Returns the WSGI environ key for the header name.
+
+    None is returned for names with the underscore character, which can't
+    be distinguished from the dash in environ keys.
+
+    >>> environ_key('X-Forwarded-For'), environ_key('content-type')
+    ('HTTP_X_FORWARDED_FOR', 'CONTENT_TYPE')
+    """
+    if '_' in name:
+        return None
+    key = name.upper().replace('-', '_')
+    if key in CONTENT_KEYS:
+        return key
+    return 'HTTP_' + key
+
+
+class EnvironHeaders(Headers):
+    """Read-only view of request headers in the WSGI environ.
+
+    Nothing is copied when the object is created. Header names are
+    translated to environ keys on lookup, and environ keys to header names
+    only when headers are iterated. Both translations are memoized.
+
+    >>> headers = EnvironHeaders({'HTTP_X_TEST': 'Test', 'PATH_INFO': '/'})
+    >>> headers['x-test'], headers.get('Content-Type')
+    ('Test', None)
+    >>> headers.items()
+    (('X-Test', 'Test'),)
+    """
+    # pylint: disable=super-init-not-called
+    def __init__(self, environ: dict):
+        self.__environ = environ
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __key(self, name: str) -> Optional[str]:
+        """Returns the environ key of the header, if it exists."""
+        key = environ_key(name)
+        if key in self.__environ:
+            return key
+        # some servers send Content-Type and Content-Length with prefix
+        if key in CONTENT_KEYS and 'HTTP_' + key in self.__environ:
+            return 'HTTP_' + key
+        return None
+
+    def __getitem__(self, name: str):
+        key = self.__key(name)
+        if key is None:
+            raise KeyError("{0!r} is not registered".format(name.lower()))
+        return self.__environ[key]
+
+    def __contains__(self, name):
+        return self.__key(name) is not None
+
+    def __iter__(self):
+        for key, val in self.__environ.items():
+            name = header_name(key)
+            if name is not None:
+                yield name, val
+
+    def __repr__(self):
+        return "EnvironHeaders(%r)" % repr(self.items())
+
+    def __delitem__(self, name: str):
+        raise TypeError("Request headers are read-only")
+
+    def __setitem__(self, name: str, value: str):
+        raise TypeError("Request headers are read-only")
+
+    def names(self):
+        """Returns a tuple of header names."""
+        return tuple(k for k, v in self)
+
+    def values(self):
+        """Returns a tuple of header values."""
+        return tuple(v for k, v in self)
+
+    def get_all(self, name: str):
+        """Returns a tuple with the header value, if it exists.
+
+        The WSGI server joins values of headers with the same name.
+        """
+        key = self.__key(name)
+        if key is None:
+            return ()
+        return (self.__environ[key],)
+
+    def items(self):
+        """Returns a tuple of header (key, value) pairs."""
+        return tuple(self)
+
+    def setdefault(self, name: str, value: str):
+        """Raises TypeError, request headers are read-only."""
+        raise TypeError("Request headers are read-only")
+
+    def add(self, name: str, value: str):
+        """Raises TypeError, request headers are read-only."""
+        raise TypeError("Request headers are read-only")
+
+    def add_header(self, name: str,
+                   value: Optional[Union[str, List[Tuple]]] = None,
+                   **kwargs):
+        """Raises TypeError, request headers are read-only."""
+        raise TypeError("Request headers are read-only")
+
+
+class RequestCookies(Mapping):
+    """Lazy read-only mapping of cookies from the Cookie request header.
+
+    The header is split to names and raw values on first access, and only
+    the cookie which is read is decoded to a Morsel object, like in
+    SimpleCookie. So ``cookies[name].value`` works as before. Names starting
+    with ``$``, illegal names and cookie attributes like ``Path`` are
+    skipped, and the last value is used for a repeated name, like in
+    SimpleCookie. Quoted values could contain the semicolon.
+
+    >>> cookies = RequestCookies('sid=abc; $Version=1; theme="dark; mode"')
+    >>> cookies['theme'].value, 'sid' in cookies, 'Version' in cookies
+    ('dark; mode', True, False)
+    >>> list(cookies)
+    ['sid', 'theme']
+    """
+    __slots__ = ('__header', '__morsels', '__raw')
+
+    def __init__(self, header: str):
+        self.__header = header
+        self.__raw: Optional[Dict[str, str]] = None
+        self.__morsels: Dict[str, Morsel] = {}
+
+    def __split(self) -> Dict[str, str]:
+        """Returns raw cookie values by names."""
+        if self.__raw is None:
+            self.__raw = {}
+            if '"' in self.__header:
+                fields = RE_COOKIE_FIELD.findall(self.__header)
+            else:
+                fields = self.__header.split(';')
+            for field in fields:
+                key, eq, val = field.partition('=')
+                key = key.strip()
+                if (not eq or key[:1] == '$'
+                        or not RE_COOKIE_NAME.fullmatch(key)
+                        or key.lower() in COOKIE_ATTRIBUTES):
+                    continue
+                self.__raw[key] = val.strip()
+        return self.__raw
+
+    def __getitem__(self, key: str) -> Morsel:
+        morsel = self.__morsels.get(key)
+        if morsel is None:
+            raw = self.__split()[key]
+            morsel = Morsel()
+            try:
+                morsel.set(key, *COOKIE_DECODER.value_decode(raw))
+            except CookieError as err:
+                raise KeyError(key) from err
+            self.__morsels[key] = morsel
+        return morsel
+
+    def __iter__(self):
+        return iter(self.__split())
+
+    def __len__(self):
+        return len(self.__split())
+
+    def __repr__(self):
+        return "RequestCookies(%r)" % self.__header
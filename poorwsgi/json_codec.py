@@ -0,0 +1,199 @@
+"""JSON codecs for request parsing and JSON responses.
+
+The codec is a pair of ``loads`` and ``dumps`` functions. ``loads`` parses
+bytes (or str) and ``dumps`` serializes straight to UTF-8 bytes, so there is
+no extra str copy between the JSON library and the WSGI server. The standard
+json module is used by default; ``orjson``, ``ujson`` and ``simplejson`` are
+used only when they are selected and installed.
+
+The codec is a module-level setting, which is shared by all applications in
+the process, because responses are created without the application.
+
+:Classes:   JSONCodec, IterableEncoder
+:Functions: get_codec, set_codec, load_codec, serialize
+"""
+from json import JSONEncoder
+from json import dumps as json_dumps
+from json import loads as json_loads
+from typing import Any, Callable, Union
+
+# preferred order for the auto value
+CODECS = ("orjson", "ujson", "simplejson", "json")
+
+# value of the empty iterable in _Array
+_EMPTY = object()
+
+
+class JSONCodec:
+    """A named pair of JSON functions.
+
+    ``loads`` gets bytes or str with JSON, ``dumps`` gets the object and
+    returns bytes in UTF-8. If ``kwargs`` is True, ``dumps`` accepts keyword
+    arguments of the standard ``json.dumps`` function too.
+    """
+
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("name", "loads", "dumps", "kwargs")
+
+    def __init__(
+        self, name: str, loads: Callable, dumps: Callable, kwargs=False
+    ):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.kwargs = kwargs
+
+    def __repr__(self):
+        return f"<JSONCodec {self.name}>"
+
+
+def _json():
+    def _json_dumps(obj: Any, **kwargs) -> bytes:
+        return json_dumps(obj, **kwargs).encode("utf-8")
+
+    return JSONCodec("json", json_loads, _json_dumps, True)
+
+
+def _orjson():
+    # pylint: disable=import-outside-toplevel,import-error,no-member
+    import orjson  # type: ignore
+
+    return JSONCodec("orjson", orjson.loads, orjson.dumps)
+
+
+def _ujson():
+    # pylint: disable=import-outside-toplevel,import-error
+    import ujson  # type: ignore
+
+    def _ujson_dumps(obj: Any, **kwargs) -> bytes:
+        return ujson.dumps(obj, **kwargs).encode("utf-8")
+
+    return JSONCodec("ujson", ujson.loads, _ujson_dumps)
+
+
+def _simplejson():
+    # pylint: disable=import-outside-toplevel,import-error
+    import simplejson  # type: ignore
+
+    def _simplejson_dumps(obj: Any, **kwargs) -> bytes:
+        return simplejson.dumps(obj, **kwargs).encode("utf-8")
+
+    return JSONCodec("simplejson", simplejson.loads, _simplejson_dumps, True)
+
+
+FACTORIES = {
+    "json": _json,
+    "orjson": _orjson,
+    "ujson": _ujson,
+    "simplejson": _simplejson,
+}
+
+_codec = _json()  # pylint: disable=invalid-name
+_stdlib = _codec
+
+
+def load_codec(name: str) -> JSONCodec:
+    """Creates the codec by name.
+
+    The name is one of ``json``, ``orjson``, ``ujson``, ``simplejson`` or
+    ``auto``, which selects the first installed library in that order.
+    ImportError is raised when the library is not installed.
+
+    >>> load_codec("json")
+    <JSONCodec json>
+    >>> load_codec("yaml")
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown JSON codec yaml
+    """
+    if name == "auto":
+        for key in CODECS:
+            try:
+                return FACTORIES[key]()
+            except ImportError:
+                continue
+    if name not in FACTORIES:
+        raise ValueError(f"Unknown JSON codec {name}")
+    return FACTORIES[name]()
+
+
+def get_codec() -> JSONCodec:
+    """Returns the codec which is in use."""
+    return _codec
+
+
+def set_codec(value: Union[str, JSONCodec]) -> JSONCodec:
+    """Sets the codec used by request parsing and JSON responses.
+
+    The value could be the codec name for load_codec, or JSONCodec instance.
+    The codec is shared by all applications in the process, because
+    responses are created without the application, so set it once, before
+    the applications are created.
+
+    .. code:: python
+
+        from poorwsgi.json_codec import set_codec
+
+        set_codec("auto")
+    """
+    global _codec  # pylint: disable=global-statement,invalid-name
+    if not isinstance(value, JSONCodec):
+        value = load_codec(value)
+    _codec = value
+    return value
+
+
+def serialize(obj: Any, **kwargs) -> bytes:
+    """Serializes the object to UTF-8 JSON bytes by the codec.
+
+    Keyword arguments are those of the standard ``json.dumps`` function.
+    When they are set and the codec does not accept them, like ``orjson``,
+    the standard json module is used instead.
+
+    >>> serialize({"a": [1, 2]}, separators=(",", ":"))
+    b'{"a":[1,2]}'
+    """
+    codec = _codec
+    if kwargs and not codec.kwargs:
+        codec = _stdlib
+    return codec.dumps(obj, **kwargs)
+
+
+class _Array(list):
+    """Empty list, which iterates over another iterator.
+
+    The first value is read in the constructor, so an empty iterator is
+    false for the encoder.
+    """
+
+    __slots__ = ("__first", "__iterator")
+
+    def __init__(self, iterator):
+        super().__init__()
+        self.__iterator = iterator
+        self.__first = next(iterator, _EMPTY)
+
+    def __bool__(self):
+        return self.__first is not _EMPTY
+
+    def __iter__(self):
+        if self.__first is not _EMPTY:
+            yield self.__first
+            yield from self.__iterator
+
+
+class IterableEncoder(JSONEncoder):
+    """JSONEncoder, which serializes iterables, like generators, as arrays.
+
+    Iterables are not buffered in memory when ``iterencode`` is used.
+
+    >>> "".join(IterableEncoder().iterencode({"x": range(3), "y": iter(())}))
+    '{"x": [0, 1, 2], "y": []}'
+    """
+
+    def default(self, o):
+        try:
+            iterator = iter(o)
+        except TypeError:
+            return super().default(o)
+        return _Array(iterator)
@@ -1,24 +1,42 @@
 """Classes that are used for managing requests.
 
-:Classes:   SimpleRequest, Request, EmptyForm, Args, Json
+:Classes:   SimpleRequest, Request, EmptyForm, Args, Json, CachedInput,
+            ChunkedInput
+:Functions: parse_query, parse_json_request, iter_json_request,
+            iter_ndjson_request
 """
 # pylint: disable=too-many-lines
 
 import os
 import re
 import warnings
-from http.cookies import SimpleCookie
-from io import BytesIO
-from json import loads as json_loads
+from codecs import getincrementaldecoder
+from io import SEEK_END, BytesIO
+from itertools import chain
+from json import JSONDecodeError, JSONDecoder
 from logging import getLogger
+from mmap import ACCESS_READ, mmap
+from tempfile import TemporaryFile
 from time import time
-from typing import Any, Callable, Optional
-from urllib.parse import parse_qs, unquote
+from typing import Any, Callable, Iterable, Optional, Union
+from urllib.parse import unquote
 
 from poorwsgi import fieldstorage
-from poorwsgi.headers import Headers, parse_header, parse_negotiation
+from poorwsgi.headers import (
+    EnvironHeaders,
+    Headers,
+    RequestCookies,
+    cached_header,
+    cached_negotiation,
+    negotiate,
+)
+from poorwsgi.json_codec import get_codec
 from poorwsgi.response import HTTPException
-from poorwsgi.state import HTTP_BAD_REQUEST, methods
+from poorwsgi.state import (
+    HTTP_BAD_REQUEST,
+    HTTP_REQUEST_ENTITY_TOO_LARGE,
+    methods,
+)
 
 log = getLogger("poorwsgi")
 
@@ -26,6 +44,25 @@ log = getLogger("poorwsgi")
 RE_HTTPURLPATTERN = re.compile(r"^(http|https):\/\/")
 RE_AUTHORIZATION = re.compile(r'(\w+\*?)[=] ?("[^"]+"|[\w\-\'%]+)')
 
+# value of lazy parsed properties, which were not parsed yet
+NOT_PARSED = object()
+
+# MIME types of request body with one JSON value per line
+NDJSON_MIME_TYPES = ("application/x-ndjson", "application/jsonl")
+
+# maximal length of chunk size line or trailer field
+MAX_CHUNK_LINE = 4096
+# chunk size without chunk extensions
+RE_CHUNK_SIZE = re.compile(rb"[0-9A-Fa-f]+")
+
+# for incremental parsing of JSON arrays, the first non-whitespace character
+RE_JSON_VALUE = re.compile(r"[^ \t\n\r]")
+# strings, escapes and brackets, which are important for finding value end
+RE_JSON_TOKEN = re.compile(r'\\.|["\[\]{}]', re.S)
+# end of numbers, true, false and null
+RE_JSON_DELIMITER = re.compile(r"[ \t\n\r,:\]}]")
+JSON_DECODER = JSONDecoder()
+
 # pylint: disable=unsubscriptable-object
 
 
@@ -33,10 +70,39 @@ class SimpleRequest:
     """Request proxy properties implementation - for internal use only."""
 
     # pylint: disable=too-many-public-methods
+    # __dict__ is there for user attributes set in handlers
+    __slots__ = (
+        "__environ",
+        "__app",
+        "__uri_rule",
+        "__uri_handler",
+        "__error_handler",
+        "__route_hooks",
+        "__route",
+        "__poor_environ",
+        "__debug",
+        "__start_time",
+        "__end_time",
+        "__path",
+        "__method_number",
+        "__hostname",
+        "__host_port",
+        "__dict__",
+        "__weakref__",
+    )
+
     def __init__(self, environ, app):
         self.__environ = environ
         self.__app = app
 
+        # derived values are computed with first property call
+        self.__path = None
+        self.__hostname = None
+        self.__host_port = None
+        self.__method_number = methods.get(
+            environ.get("REQUEST_METHOD"), methods["GET"]
+        )
+
         # The path portion of the URI.
         self.__uri_rule = None
 
@@ -47,24 +113,42 @@ class SimpleRequest:
         # Reference to error handler if exist.
         self.__error_handler = None
 
+        # Composed before and after handlers of the found route.
+        self.__route_hooks = None
+
+        # Regular route resolved before dispatching.
+        self.__route = None
+
         # uwsgi do not sent environ variables to apps environ
         if "uwsgi.version" in self.__environ or "poor.Version" in os.environ:
             self.__poor_environ = os.environ
         else:
             self.__poor_environ = self.__environ
 
-        var = self.__poor_environ.get("poor_Debug")
-        if var:
-            self.__debug = var.lower() == "on"
-        else:
-            self.__debug = app.debug
+        # poor_Debug is read with first property call
+        self.__debug = None
 
         self.__start_time = environ["REQUEST_STARTTIME"]
         self.__end_time = time()
 
     @property
     def debug(self):
-        """Value of ``poor_Debug`` variable."""
+        """Value of ``poor_Debug`` variable, or Application.debug.
+
+        The variable from the process environment is read once to the
+        configuration of the frozen application, so only the request
+        environment is checked then.
+        """
+        if self.__debug is None:
+            config = self.__app.config
+            if config is self.__app:
+                var = self.__poor_environ.get("poor_Debug")
+            else:
+                var = self.__environ.get("poor_Debug")
+            if var:
+                self.__debug = var.lower() == "on"
+            else:
+                self.__debug = config.debug
         return self.__debug
 
     @property
@@ -139,22 +223,60 @@ class SimpleRequest:
         if self.__error_handler is None:
             self.__error_handler = value
 
+    @property
+    def route_hooks(self):
+        """Before and after handlers of the route found for the request.
+
+        This property can be set only once by the Application object, at
+        the same time as uri_handler. It is a ``(before, after)`` pair of
+        composed handlers, where each could be None if there is no handler
+        to call. If it is None, application handlers are used.
+        """
+        return self.__route_hooks
+
+    @route_hooks.setter
+    def route_hooks(self, value: tuple):
+        if self.__route_hooks is None:
+            self.__route_hooks = value
+
+    @property
+    def route(self):
+        """Regular route resolved for the request before dispatching.
+
+        This property can be set only once by the Application object, when
+        the route is needed before the request is dispatched, to find the
+        route body size limit. It is the tuple returned by the route
+        resolving, empty if no regular route matches, so the route is not
+        resolved twice. If it is None, the route was not resolved yet.
+        """
+        return self.__route
+
+    @route.setter
+    def route(self, value: tuple):
+        if self.__route is None:
+            self.__route = value
+
     @property
     def hostname(self):
         """Host, as set by full URI or Host: header without port."""
-        return self.__environ.get("HTTP_HOST", self.server_hostname).split(
-            ":"
-        )[0]
+        if self.__hostname is None:
+            self.__hostname = self.__environ.get(
+                "HTTP_HOST", self.server_hostname
+            ).split(":")[0]
+        return self.__hostname
 
     @property
     def host_port(self):
         """Port, as set by full URI or Host."""
-        host = self.__environ.get("HTTP_HOST", "")
-        if ":" in host:
-            return int(host.split(":")[1])
-        if self.server_scheme == "https":
-            return 443
-        return 80
+        if self.__host_port is None:
+            host = self.__environ.get("HTTP_HOST", "")
+            if ":" in host:
+                self.__host_port = int(host.split(":")[1])
+            elif self.server_scheme == "https":
+                self.__host_port = 443
+            else:
+                self.__host_port = 80
+        return self.__host_port
 
     @property
     def method(self):
@@ -164,9 +286,7 @@ class SimpleRequest:
     @property
     def method_number(self):
         """Method number constant from state module."""
-        if self.method not in methods:
-            return methods["GET"]
-        return methods[self.method]
+        return self.__method_number
 
     @property
     def uri(self):
@@ -176,15 +296,19 @@ class SimpleRequest:
     @property
     def path(self):
         """Path part of the URL."""
-        try:
-            return (
-                self.__environ.get("PATH_INFO").encode("iso-8859-1").decode()
-            )
-        except (UnicodeDecodeError, UnicodeEncodeError) as err:
-            log.warning("Invalid PATH_INFO encoding: %s", err)
-            raise HTTPException(
-                HTTP_BAD_REQUEST, error="Invalid PATH_INFO encoding"
-            ) from err
+        if self.__path is None:
+            try:
+                self.__path = (
+                    self.__environ.get("PATH_INFO")
+                    .encode("iso-8859-1")
+                    .decode()
+                )
+            except (UnicodeDecodeError, UnicodeEncodeError) as err:
+                log.warning("Invalid PATH_INFO encoding: %s", err)
+                raise HTTPException(
+                    HTTP_BAD_REQUEST, error="Invalid PATH_INFO encoding"
+                ) from err
+        return self.__path
 
     @property
     def query(self):
@@ -308,7 +432,9 @@ class SimpleRequest:
         some server variables, and the best way to set it is programmatically
         via Application.secret_key from random data.
         """
-        return self.__poor_environ.get("poor_SecretKey", self.__app.secret_key)
+        return self.__poor_environ.get(
+            "poor_SecretKey", self.__app.config.secret_key
+        )
 
     @property
     def document_index(self):
@@ -320,13 +446,13 @@ class SimpleRequest:
         var = self.__poor_environ.get("poor_DocumentIndex")
         if var:
             return var.lower() == "on"
-        return self.__app.document_index
+        return self.__app.config.document_index
 
     @property
     def document_root(self):
         """Returns DocumentRoot setting."""
         return self.__poor_environ.get(
-            "poor_DocumentRoot", self.__app.document_root
+            "poor_DocumentRoot", self.__app.config.document_root
         )
 
     @property
@@ -397,6 +523,36 @@ class Request(SimpleRequest):
     """
 
     # pylint: disable=too-many-public-methods
+    __slots__ = (
+        "__headers",
+        "__mime_type",
+        "__charset",
+        "__content_length",
+        "__max_body_size",
+        "__chunked_size",
+        "__accept",
+        "__accept_charset",
+        "__accept_encoding",
+        "__accept_language",
+        "__authorization",
+        "__file",
+        "__body",
+        "__spool_body",
+        "__spooled",
+        "__mmap",
+        "_errors",
+        "__cached_size",
+        "__cached_input",
+        "__read_timeout",
+        "__path_args",
+        "__args",
+        "__form",
+        "__json",
+        "__cookies",
+        "__user",
+        "__api",
+        "__db",
+    )
 
     def __init__(self, environ, app):
         """The object is created automatically in the wsgi module.
@@ -413,25 +569,29 @@ class Request(SimpleRequest):
                 "PATH_INFO not set, probably bad HTTP protocol used."
             )
 
-        # A table object containing headers sent by the client.
-        tmp = []
-        for key, val in environ.items():
-            if key[:5] == "HTTP_":
-                key = "-".join(
-                    map(lambda x: x.capitalize(), key[5:].split("_"))
-                )
-                tmp.append((key, val))
-            elif key in ("CONTENT_LENGTH", "CONTENT_TYPE"):
-                key = "-".join(map(lambda x: x.capitalize(), key.split("_")))
-                tmp.append((key, val))
+        # A view of headers sent by the client.
+        self.__headers = EnvironHeaders(environ)
 
-        self.__headers = Headers(tmp, False)  # do not convert to iso-8859-1
-
-        ctype, pdict = parse_header(self.__headers.get("Content-Type", ""))
+        ctype, pdict = cached_header(self.__headers.get("Content-Type", ""))
         self.__mime_type = ctype
         self.__charset = pdict.get("charset", "utf-8")
 
         self.__content_length = int(self.__headers.get("Content-Length") or -1)
+        cfg = app.config
+        # body limit is checked before wsgi.input is touched
+        self.__max_body_size = cfg.max_body_size
+        self.__chunked_size = 0
+        if self.__content_length > 0 or self.is_chunked:
+            self.__max_body_size = app.max_body_size_from_table(self)
+            if (
+                self.__max_body_size is not None
+                and self.__content_length > self.__max_body_size
+            ):
+                raise HTTPException(
+                    HTTP_REQUEST_ENTITY_TOO_LARGE,
+                    error=f"Content-Length {self.__content_length} is over "
+                    f"the limit {self.__max_body_size}",
+                )
         # will be set with first property call
         self.__accept = None
         self.__accept_charset = None
@@ -442,65 +602,90 @@ class Request(SimpleRequest):
         self.__file = environ.get("wsgi.input")
         self._errors = environ.get("wsgi.errors")
 
-        if app.auto_data and 0 <= self.__content_length <= app.data_size:
-            self.__file = BytesIO(self.__file.read(self.__content_length))
-            self.__file.seek(0)
+        # small request body is read at once, BytesIO shares the bytes
+        self.__body = None
+        if cfg.auto_data and 0 <= self.__content_length <= cfg.data_size:
+            self.__body = self.__file.read(self.__content_length)
+            self.__file = BytesIO(self.__body)
 
-        self.__cached_size = app.cached_size
+        self.__cached_size = cfg.cached_size
         self.__cached_input = None
-        self.__read_timeout = app.read_timeout
+        self.__read_timeout = cfg.read_timeout
+
+        # temporary file with bigger body, see spool_body configuration
+        self.__spool_body = cfg.spool_body and self.__body is None
+        self.__spooled = None
+        self.__mmap = None
 
         # path args are set via wsgi.handler_from_table
         self.__path_args = None
 
-        # args
-        if app.auto_args:
-            self.__args = Args(self, app.keep_blank_values, app.strict_parsing)
+        if cfg.lazy_parsing:  # parsed with first property access
+            self.__args = NOT_PARSED
+            self.__form = NOT_PARSED
+            self.__json = NOT_PARSED
+            self.__cookies = NOT_PARSED
+        else:
+            self.__parse_args(cfg)
+            self.__parse_body(cfg)
+            self.__parse_cookies(cfg)
+
+        # variables for user use
+        self.__user = None
+        self.__api = None
+        self.__db = None
+
+        # end_time is private slot of SimpleRequest
+        # pylint: disable=invalid-name
+        self._SimpleRequest__end_time = time()
+
+    def __parse_args(self, cfg):
+        if cfg.auto_args:
+            self.__args = Args(self, cfg.keep_blank_values, cfg.strict_parsing)
         else:
             self.__args = EmptyForm()
 
+    def __parse_body(self, cfg):
         # test auto json parsing
         if (
-            app.auto_json
+            cfg.auto_json
             and (self.is_body_request or self.server_protocol == "HTTP/0.9")
-            and self.__mime_type in app.json_mime_types
+            and self.__mime_type in cfg.json_mime_types
         ):
-            self.__json = parse_json_request(self.read(), self.__charset)
             self.__form = EmptyForm()
+            self.__json = EmptyForm()  # in case of parsing error
+            if self.__body is None:
+                body = self.read()
+            else:  # input is read to the end, like with read method
+                body = self.__body
+                self.__file.seek(0, SEEK_END)
+            self.__json = parse_json_request(body, self.__charset)
         # test auto form parsing
         elif (
-            app.auto_form
+            cfg.auto_form
             and (self.is_body_request or self.server_protocol == "HTTP/0.9")
-            and self.__mime_type in app.form_mime_types
+            and self.__mime_type in cfg.form_mime_types
         ):
             form_parser = fieldstorage.FieldStorageParser(
                 self.input,
                 self.headers,
-                keep_blank_values=app.keep_blank_values,
-                strict_parsing=app.strict_parsing,
-                file_callback=app.file_callback,
+                keep_blank_values=cfg.keep_blank_values,
+                strict_parsing=cfg.strict_parsing,
+                file_callback=cfg.file_callback,
             )
-            self.__form = form_parser.parse()
             self.__json = EmptyForm()
+            self.__form = EmptyForm()  # in case of parsing error
+            self.__form = form_parser.parse()
         else:
             self.__form = EmptyForm()
             self.__json = EmptyForm()
 
-        if app.auto_cookies and "Cookie" in self.__headers:
-            self.__cookies = SimpleCookie()
-            self.__cookies.load(self.__headers["Cookie"])
+    def __parse_cookies(self, cfg):
+        if cfg.auto_cookies and "Cookie" in self.__headers:
+            self.__cookies = RequestCookies(self.__headers["Cookie"])
         else:
             self.__cookies = None
 
-        # variables for user use
-        self.__user = None
-        self.__api = None
-        self.__db = None
-
-        # ugly hack
-        # pylint: disable=invalid-name
-        self._SimpleRequest__end_time = time()
-
     # -------------------------- Properties --------------------------- #
     @property
     def mime_type(self) -> str:
@@ -519,6 +704,14 @@ class Request(SimpleRequest):
         """The request's ``Content-Length`` header value; -1 if not set."""
         return self.__content_length
 
+    @property
+    def max_body_size(self) -> Optional[int]:
+        """The request body size limit for this request; None if not set.
+
+        It is max_body_size of the route or Application.max_body_size.
+        """
+        return self.__max_body_size
+
     @property
     def headers(self):
         """A reference to the input headers object."""
@@ -528,8 +721,8 @@ class Request(SimpleRequest):
     def accept(self) -> tuple:
         """A tuple of client-supported MIME types from the Accept header."""
         if self.__accept is None:
-            self.__accept = tuple(
-                parse_negotiation(self.__headers.get("Accept", ""))
+            self.__accept = cached_negotiation(
+                self.__headers.get("Accept", "")
             )
         return self.__accept
 
@@ -538,8 +731,8 @@ class Request(SimpleRequest):
         """A tuple of client-supported charsets from the Accept-Charset
         header."""
         if self.__accept_charset is None:
-            self.__accept_charset = tuple(
-                parse_negotiation(self.__headers.get("Accept-Charset", ""))
+            self.__accept_charset = cached_negotiation(
+                self.__headers.get("Accept-Charset", "")
             )
         return self.__accept_charset
 
@@ -548,8 +741,8 @@ class Request(SimpleRequest):
         """A tuple of client-supported encodings from the Accept-Encoding
         header."""
         if self.__accept_encoding is None:
-            self.__accept_encoding = tuple(
-                parse_negotiation(self.__headers.get("Accept-Encoding", ""))
+            self.__accept_encoding = cached_negotiation(
+                self.__headers.get("Accept-Encoding", "")
             )
         return self.__accept_encoding
 
@@ -558,8 +751,8 @@ class Request(SimpleRequest):
         """A tuple of client-supported languages from the Accept-Language
         header."""
         if self.__accept_language is None:
-            self.__accept_language = tuple(
-                parse_negotiation(self.__headers.get("Accept-Language", ""))
+            self.__accept_language = cached_negotiation(
+                self.__headers.get("Accept-Language", "")
             )
         return self.__accept_language
 
@@ -568,21 +761,21 @@ class Request(SimpleRequest):
         """Returns True if the ``text/html`` MIME type is in the accepted
         negotiation values.
         """
-        return "text/html" in dict(self.accept)
+        return any(key == "text/html" for key, _ in self.accept)
 
     @property
     def accept_xhtml(self) -> bool:
         """Returns True if the ``text/xhtml`` MIME type is in the accepted
         negotiation values.
         """
-        return "text/xhtml" in dict(self.accept)
+        return any(key == "text/xhtml" for key, _ in self.accept)
 
     @property
     def accept_json(self) -> bool:
         """Returns True if the ``application/json`` MIME type is in the
         accepted negotiation values.
         """
-        return "application/json" in dict(self.accept)
+        return any(key == "application/json" for key, _ in self.accept)
 
     @property
     def authorization(self) -> dict:
@@ -643,15 +836,18 @@ class Request(SimpleRequest):
 
         Arguments are parsed from the QUERY_STRING, which is typical for,
         but not limited to, the GET method. Arguments are parsed when
-        Application.auto_args is set (which is the default).
+        Application.auto_args is set (which is the default). With
+        Application.lazy_parsing, they are parsed on first access.
 
         This property can be **set only once**.
         """
+        if self.__args is NOT_PARSED:
+            self.__parse_args(self.app.config)
         return self.__args
 
     @args.setter
     def args(self, value: "Args"):
-        if isinstance(self.__args, EmptyForm):
+        if self.__args is NOT_PARSED or isinstance(self.__args, EmptyForm):
             self.__args = value
 
     @property
@@ -662,14 +858,20 @@ class Request(SimpleRequest):
         Application.form_mime_types. The method must be POST, PUT,
         or PATCH. The request body is parsed when Application.auto_form
         is set (which is the default) and the method is POST, PUT, or PATCH.
+        With Application.lazy_parsing, it is parsed on first access.
 
         This property can be **set only once**.
         """
+        if self.__form is NOT_PARSED:
+            self.__parse_body(self.app.config)
         return self.__form
 
     @form.setter
     def form(self, value: fieldstorage.FieldStorage):
-        if isinstance(self.__form, EmptyForm):
+        if self.__form is NOT_PARSED:
+            self.__json = EmptyForm()
+            self.__form = value
+        elif isinstance(self.__form, EmptyForm):
             self.__form = value
 
     @property
@@ -682,18 +884,26 @@ class Request(SimpleRequest):
         Otherwise, json is an EmptyForm.
 
         When request data is present, it will be parsed with the
-        parse_json_request function.
+        parse_json_request function. With Application.lazy_parsing, it is
+        parsed on first access, so HTTPException with the 400 Bad Request
+        status code is raised from this property.
         """
+        if self.__json is NOT_PARSED:
+            self.__parse_body(self.app.config)
         return self.__json
 
     @property
     def cookies(self):
-        """A SimpleCookie iterable object of all cookies from the Cookie
-        header.
+        """A RequestCookies mapping of all cookies from the Cookie header.
 
-        This property is set if Application.auto_cookies is set to True
-        (which is the default). Otherwise, cookies is None.
+        Values are Morsel objects like in SimpleCookie, and each of them is
+        decoded when it is read. This property is set if
+        Application.auto_cookies is set to True (which is the default).
+        Otherwise, cookies is None. With Application.lazy_parsing, the
+        header is read on first access.
         """
+        if self.__cookies is NOT_PARSED:
+            self.__parse_cookies(self.app.config)
         return self.__cookies
 
     @property
@@ -701,10 +911,27 @@ class Request(SimpleRequest):
         """Returns input data from the wsgi.input file.
 
         This works only when auto_data is configured and the request's
-        Content-Length is lower than the input_cache configuration value.
+        Content-Length is lower than the data_size configuration value.
         Other requests, like large file data uploads, will increase
         memory and system request time.
+
+        The body is read once into an immutable bytes object, which is
+        returned without a copy, and it is shared by input, json and form
+        parsing.
+
+        When Application.spool_body is set, bigger bodies are spooled to
+        a temporary file, and a read-only mmap of that file is returned.
         """
+        if self.__body is not None:
+            return self.__body
+        if self.__spool_body:
+            self.__spool()
+        if self.__spooled:
+            if self.__mmap is None:
+                self.__mmap = mmap(
+                    self.__spooled.fileno(), 0, access=ACCESS_READ
+                )
+            return self.__mmap
         if isinstance(self.__file, BytesIO):
             try:
                 self.__file.seek(0)
@@ -712,11 +939,54 @@ class Request(SimpleRequest):
             finally:
                 self.__file.seek(0)
 
+    @property
+    def data_view(self) -> Optional[memoryview]:
+        """Returns a read-only memoryview of the data property.
+
+        It could be used for slicing the request body without copies. None
+        is returned, when there are no data.
+        """
+        data = self.data
+        if data is None:
+            return None
+        return memoryview(data)
+
+    @property
+    def body_file(self):
+        """Returns a file with the whole request body at position zero.
+
+        It is BytesIO over the data property for small bodies. With
+        Application.spool_body, bigger bodies are copied block by block to
+        a temporary file on the first access, so they don't stay in memory.
+        The body must not be read by another way before. None is returned,
+        when the body is not available in any of these ways.
+
+        It is the same file, which is used by the read method and the input
+        property.
+        """
+        if self.__spool_body:
+            self.__spool()
+        if self.__body is None and self.__spooled is None:
+            return None
+        self.__file.seek(0)
+        return self.__file
+
     @property
     def input(self):
-        """Returns the input file; for internal use in FieldStorage."""
+        """Returns the input file; for internal use in FieldStorage.
+
+        It is ChunkedInput for chunked requests, so decoded body could be
+        read from it.
+        """
         if self.__cached_input:
             return self.__cached_input
+        if self.__spooled:
+            return self.__spooled
+        if self.is_chunked:
+            self.__cached_input = ChunkedInput(
+                self.__file, self.__cached_size or 65536, self.__max_body_size
+            )
+            return self.__cached_input
         if not self.__cached_size or isinstance(self.__file, BytesIO):
             return self.__file
         self.__cached_input = CachedInput(
@@ -756,6 +1026,62 @@ class Request(SimpleRequest):
         self.__db = value
 
     # -------------------------- Methods --------------------------- #
+    def negotiate(self, offers: Iterable[str], header: str = "Accept"):
+        """Returns the best offer for the client, or None.
+
+        Offers are values, which the server could send, in the server
+        preference order; the header is the name of the negotiation
+        header, like ``Accept-Language``. Wildcards and prefixes are
+        matched, see headers.negotiate. Results are cached for the header
+        value and offers, so use the same offers tuple for each request.
+
+        .. code:: python
+
+            mime_type = req.negotiate(("application/json", "text/html"))
+            if mime_type is None:
+                raise HTTPException(HTTP_NOT_ACCEPTABLE)
+        """
+        if not isinstance(offers, tuple):
+            offers = tuple(offers)
+        return negotiate(self.__headers.get(header, ""), offers)
+
+    def __spool(self):
+        """Copies the whole request body to a temporary file."""
+        self.__spool_body = False
+        if not self.is_body_request:
+            return
+        source = self.input
+        spooled = TemporaryFile()  # pylint: disable=consider-using-with
+        todo = self.__content_length
+        block_size = self.__cached_size or 65536
+        while todo > 0:
+            block = source.read(min(todo, block_size))
+            if not block:
+                spooled.close()
+                raise HTTPException(
+                    HTTP_BAD_REQUEST, error="Incomplete request body"
+                )
+            spooled.write(block)
+            todo -= len(block)
+        spooled.seek(0)
+        self.__spooled = self.__file = spooled
+        self.__cached_input = None
+
+    def close(self):
+        """Closes the mmap of the data property and the spooled body file.
+
+        The Application calls it, when the WSGI server closes the response
+        and spool_body is set. The mmap stays open, while some memoryview
+        from data_view is used.
+        """
+        if self.__mmap is not None:
+            try:
+                self.__mmap.close()
+            except BufferError:
+                log.warning("Request data are still used, mmap is not closed")
+        if self.__spooled is not None:
+            self.__spooled.close()
+
     def __read(self, length: int = -1):
         return self.__file.read(length)
 
@@ -763,8 +1089,10 @@ class Request(SimpleRequest):
         """Reads data from the client (typical for XHR2 data POST).
 
         If length is not set, or if it is less than zero, Content-Length will
-        be used.
+        be used. The decoded body is read from chunked requests.
         """
+        if self.is_chunked:
+            return self.input.read(length)
         if not self.is_body_request and self.server_protocol != "HTTP/0.9":
             log.error("No Content-Length found, read was failed!")
             return b""
@@ -777,21 +1105,82 @@ class Request(SimpleRequest):
         """Reads a chunk when Transfer-Encoding is 'chunked'.
 
         The method first reads a line with the chunk size, then reads the
-        chunk and returns it. It will raise a ValueError if the chunk size
-        is in a bad format.
+        chunk and returns it. It will raise HTTPException with the 400
+        status code if the chunk size is in a bad format, or with the 413
+        status code when the body is over max_body_size. The iter_body
+        method or the input property is buffered, so it is better for many
+        small chunks.
 
         Ensure that the WSGI server allows readline from wsgi.input. For
         example, uWSGI has an extra API for this:
         https://uwsgi-docs.readthedocs.io/en/latest/Chunked.html
         """
-        size = int(self.__file.readline(), base=16)
+        size = _chunk_size(self.__file.readline().rstrip(b"\r\n"))
+        self.__chunked_size += size
+        if (
+            self.__max_body_size is not None
+            and self.__chunked_size > self.__max_body_size
+        ):
+            raise HTTPException(
+                HTTP_REQUEST_ENTITY_TOO_LARGE,
+                error="Chunked body is over the limit "
+                f"{self.__max_body_size}",
+            )
         try:
             return self.__file.read(size)
         finally:
             self.__file.readline()  # skip new line after chunk
 
-    def __del__(self):
-        log.debug("Request: Hasta la vista, baby.")
+    def iter_body(self, block_size: int = 0):
+        """Yields the request body, which is not read yet, in blocks.
+
+        Blocks have block_size bytes (cached_size by default), only the last
+        one could be shorter. Chunked requests are decoded by ChunkedInput,
+        so small chunks are coalesced to blocks. Small bodies, which are
+        stored in the data property, are yielded at once.
+        """
+        block_size = block_size or self.__cached_size or 65536
+        if self.is_chunked:
+            source = self.input
+            block = source.read(block_size)
+            while block:
+                yield block
+                block = source.read(block_size)
+            return
+        if self.__body is not None:
+            yield self.__body
+            return
+        source = self.input
+        todo = self.__content_length
+        while todo > 0:
+            block = source.read(min(todo, block_size))
+            if not block:
+                return
+            todo -= len(block)
+            yield block
+
+    def iter_json(self, path: str = "item"):
+        """Yields JSON values from the request body one by one.
+
+        For NDJSON body (``application/x-ndjson`` or ``application/jsonl``
+        MIME type), each line is yielded. Otherwise, elements of the JSON
+        array found by the path are yielded, see iter_json_request. The body
+        is read incrementally, so only one value is in memory at a time.
+        Content-Length and chunked requests are supported.
+
+        The body must not be read before, so set Application.auto_json to
+        False, or use Application.lazy_parsing, for JSON MIME types.
+
+        .. code:: python
+
+            @app.route('/import', method=state.METHOD_POST)
+            def bulk_import(req):
+                for record in req.iter_json("records.item"):
+                    store(record)
+        """
+        if self.__mime_type in NDJSON_MIME_TYPES:
+            return iter_ndjson_request(self.iter_body(), self.__charset)
+        return iter_json_request(self.iter_body(), path, self.__charset)
 
 
 class EmptyForm(dict, fieldstorage.FieldStorageInterface):
@@ -841,21 +1230,63 @@ class Args(dict, fieldstorage.FieldStorageInterface):
     """Compatibility class for reading values from QUERY_STRING.
 
     This class is based on a dictionary. It has getfirst and getlist methods,
-    which can call a function on the values.
+    which can call a function on the values. The value is a string, or
+    a list of strings when the key is in the query more times; see
+    parse_query.
     """
 
     def __init__(self, req: Request, keep_blank_values=0, strict_parsing=0):
-        query = req.query
-        args = (
-            parse_qs(query, keep_blank_values, strict_parsing) if query else {}
-        )
-        dict.__init__(
-            self,
-            (
-                (key, val[0] if len(val) < 2 else val)
-                for key, val in args.items()
-            ),
-        )
+        super().__init__()
+        parse_query(req.query, keep_blank_values, strict_parsing, self)
+
+
+def parse_query(
+    query: str,
+    keep_blank_values=0,
+    strict_parsing=0,
+    args: Optional[dict] = None,
+) -> dict:
+    """Parses the query string to the args dictionary (new one by default).
+
+    It works like urllib.parse.parse_qs, but it does not create the list
+    for each key. The value is the string, and it is changed to the list
+    only when the second value of the same key comes. Names and values
+    without ``%`` and ``+`` characters are not unquoted.
+
+    >>> parse_query("a=1&b=x+y&a=%C4%8D&c=")
+    {'a': ['1', 'č'], 'b': 'x y'}
+    >>> parse_query("a&b=", keep_blank_values=1)
+    {'a': '', 'b': ''}
+    >>> parse_query("a=1&&b=2", strict_parsing=1)
+    Traceback (most recent call last):
+    ...
+    ValueError: bad query field: ''
+    """
+    if args is None:
+        args = {}
+    if not query:
+        return args
+    for field in query.split("&"):
+        key, eq, val = field.partition("=")
+        if not eq:
+            if strict_parsing:
+                raise ValueError(f"bad query field: {field!r}")
+            if not (field and keep_blank_values):
+                continue
+        elif not (val or keep_blank_values):
+            continue
+        if "%" in key or "+" in key:
+            key = unquote(key.replace("+", " "))
+        if "%" in val or "+" in val:
+            val = unquote(val.replace("+", " "))
+
+        if key not in args:
+            args[key] = val
+        elif isinstance(args[key], list):
+            args[key].append(val)
+        else:
+            args[key] = [args[key], val]
+    return args
 
 
 class JsonDict(dict, fieldstorage.FieldStorageInterface):
@@ -980,10 +1411,15 @@ def parse_json_request(raw: bytes, charset: str = "utf-8"):
       float, bool, or None.
     * None, when JSON parsing fails. This is logged with a WARNING log level.
 
+    UTF-8 data are parsed straight from bytes by the JSON codec, which is
+    set by poorwsgi.json_codec.set_codec.
     """
     # pylint: disable=inconsistent-return-statements
     try:
-        data = json_loads(raw.decode(charset))
+        text: Union[bytes, str] = raw
+        if charset.lower() not in ("utf-8", "utf8"):
+            text = raw.decode(charset)
+        data = get_codec().loads(text)
         if isinstance(data, dict):
             return JsonDict(data.items())
         if isinstance(data, list):
@@ -994,6 +1430,209 @@ def parse_json_request(raw: bytes, charset: str = "utf-8"):
         raise HTTPException(HTTP_BAD_REQUEST, error=err) from err
 
 
+class _JSONStream:
+    """Incremental reader of JSON text from blocks of bytes.
+
+    The end of the next value is found by a raw scanner, which reads each
+    character only once, even if the value is split to many blocks. Only
+    then is the value decoded by JSONDecoder.raw_decode, or it is skipped
+    without decoding.
+    """
+
+    def __init__(self, blocks: Iterable[bytes], charset: str):
+        self.__blocks = iter(blocks)
+        self.__decoder = getincrementaldecoder(charset)()
+        self.__buffer = ""
+        self.__pos = 0
+        self.__eof = False
+
+    def __more(self):
+        """Appends next block to the buffer, returns False at the end."""
+        if self.__eof:
+            return False
+        block = next(self.__blocks, None)
+        self.__eof = block is None
+        text = self.__decoder.decode(block or b"", final=self.__eof)
+        self.__buffer = self.__buffer[self.__pos:] + text
+        self.__pos = 0
+        return True
+
+    def char(self) -> Optional[str]:
+        """Returns next non-whitespace character, None at the end."""
+        while True:
+            match = RE_JSON_VALUE.search(self.__buffer, self.__pos)
+            if match is not None:
+                self.__pos = match.start()
+                return match.group()
+            self.__pos = len(self.__buffer)
+            if not self.__more():
+                return None
+
+    def expect(self, chars: str) -> str:
+        """Skips one of chars, which must be next."""
+        char = self.char()
+        if char is None or char not in chars:
+            raise ValueError(f"Expecting one of '{chars}', got {char!r}")
+        self.__pos += 1
+        return char
+
+    def __end(self, scalar: bool, state: list) -> int:
+        """Returns the end of the value in the buffer or -1.
+
+        The state is a list of the nesting depth, the flag of the open
+        string and the scanned position, which is updated for next call.
+        """
+        buffer = self.__buffer
+        if scalar:
+            match = RE_JSON_DELIMITER.search(buffer, state[2])
+            state[2] = len(buffer)
+            return match.start() if match else -1
+        depth, string, last = state
+        for match in RE_JSON_TOKEN.finditer(buffer, last):
+            last = match.end()
+            token = match.group()
+            if token == '"':
+                string = not string
+            elif string or token[0] == "\\":
+                continue
+            elif token in "[{":
+                depth += 1
+            else:
+                depth -= 1
+            if not (depth or string):
+                return last
+        # the escape character could be the last one in the buffer
+        if len(buffer) > last and buffer[-1] == "\\":
+            last = len(buffer) - 1
+        else:
+            last = len(buffer)
+        state[:] = (depth, string, last)
+        return -1
+
+    def value(self, skip: bool = False):
+        """Decodes next JSON value, or skips it without decoding."""
+        char = self.char()
+        if char is None:
+            raise JSONDecodeError("Expecting value", self.__buffer, self.__pos)
+        scalar = char not in '"[{'
+        state = [0, False, self.__pos]
+        parts = []
+        end = self.__end(scalar, state)
+        while end < 0:
+            if self.__eof:
+                if not scalar:
+                    raise JSONDecodeError(
+                        "Unterminated value", self.__buffer, self.__pos
+                    )
+                end = len(self.__buffer)
+                break
+            # scanned part of the value is moved away from the buffer
+            parts.append(self.__buffer[self.__pos:state[2]])
+            self.__pos = state[2]
+            self.__more()
+            state[2] = 0
+            end = self.__end(scalar, state)
+
+        buffer, start = self.__buffer, self.__pos
+        self.__pos = end
+        if end == start and not parts:
+            raise JSONDecodeError("Expecting value", buffer, start)
+        if skip:
+            return None
+        if parts:
+            parts.append(buffer[start:end])
+            buffer, start = "".join(parts), 0
+            end = len(buffer)
+        value, stop = JSON_DECODER.raw_decode(buffer, start)
+        if stop != end:
+            raise JSONDecodeError("Extra data", buffer, stop)
+        return value
+
+
+def _iter_json(stream: _JSONStream, keys: list):
+    for key in keys:
+        stream.expect("{")
+        if stream.char() == "}":
+            return
+        while stream.value() != key:
+            stream.expect(":")
+            stream.value(True)  # value of other key is skipped
+            if stream.expect(",}") == "}":
+                return
+        stream.expect(":")
+
+    stream.expect("[")
+    if stream.char() == "]":
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(",]") == "]":
+            return
+
+
+def iter_json_request(
+    blocks: Iterable[bytes], path: str = "item", charset: str = "utf-8"
+):
+    """Yields elements of JSON array from request body blocks one by one.
+
+    The path is a dot separated list of object keys, which ends with
+    ``item`` for elements of the array. ``item`` is for the top-level array,
+    ``data.item`` is for the array in the ``data`` key of the top-level
+    object. Nothing is yielded, when some key is not found. Only one element
+    is in memory at time, other values are skipped without decoding, so
+    only their strings and brackets are checked, and data after the array
+    are not checked at all.
+
+    Invalid JSON raises HTTPException with the 400 Bad Request status code.
+
+    >>> list(iter_json_request([b'[1, {"a"', b': 2}, 3', b"4]"]))
+    [1, {'a': 2}, 34]
+    >>> list(iter_json_request([b'{"x": 1, "data": ["a", "b"]}'],
+    ...                        "data.item"))
+    ['a', 'b']
+    """
+    keys = path.split(".")
+    if keys.pop() != "item":
+        raise ValueError("JSON path must end with item")
+    try:
+        yield from _iter_json(_JSONStream(blocks, charset), keys)
+    except ValueError as err:  # JSONDecodeError and UnicodeDecodeError too
+        log.error("Invalid request json: %s", str(err))
+        raise HTTPException(HTTP_BAD_REQUEST, error=err) from err
+
+
+def iter_ndjson_request(blocks: Iterable[bytes], charset: str = "utf-8"):
+    """Yields values from NDJSON request body blocks, one value per line.
+
+    Lines are parsed by the JSON codec, empty lines are skipped. Invalid JSON
+    raises HTTPException with the 400 Bad Request status code.
+
+    >>> list(iter_ndjson_request([b'{"a": 1}\\n[2', b']\\n\\n3']))
+    [{'a': 1}, [2], 3]
+    """
+    loads = get_codec().loads
+    utf8 = charset.lower() in ("utf-8", "utf8")
+    buffer = bytearray()
+    pos = 0  # start of the next line
+    try:
+        for block in chain(blocks, (b"\n",)):
+            scan = len(buffer)
+            buffer += block
+            end = buffer.find(b"\n", scan)
+            while end >= 0:
+                line = bytes(buffer[pos:end])
+                pos = end + 1
+                if line.strip():
+                    yield loads(line if utf8 else line.decode(charset))
+                end = buffer.find(b"\n", pos)
+            if pos * 2 >= len(buffer):
+                del buffer[:pos]
+                pos = 0
+    except ValueError as err:
+        log.error("Invalid request json: %s", str(err))
+        raise HTTPException(HTTP_BAD_REQUEST, error=err) from err
+
+
 def FieldStorage(  # noqa: N802
     req=Request,  # noqa: N802
     headers=None,
@@ -1039,6 +1678,10 @@ class CachedInput:
     """
     A wrapper around the wsgi.input file that reads data block by block.
 
+    Data are buffered in a bytearray with a read offset, which is compacted
+    when the read part is bigger than the rest, so long lines or small
+    blocks are not copied again and again.
+
     timeout
         How long to wait for new bytes, in seconds.
     """
@@ -1047,75 +1690,259 @@ class CachedInput:
         self, file, size, block_size=32768, timeout: Optional[float] = 10.0
     ):
         self.__file = file
-        self.__buffer = b""
+        self.__buffer = bytearray()
+        self.__pos = 0  # read offset in the buffer
         self.__todo = size
         self.__timeout = timeout
         self.block_size = block_size
 
+    def __fill(self, size: int) -> int:
+        """Appends up to size bytes from the file to the buffer."""
+        size = min(self.__todo, size)
+        if size <= 0:
+            return 0
+        data = self.__file.read(size)
+        self.__todo -= len(data)
+        self.__buffer += data
+        return len(data)
+
+    def __skip(self, size: int):
+        """Moves the read offset, the buffer is compacted sometimes."""
+        self.__pos = pos = self.__pos + size
+        if pos >= self.block_size and pos * 2 >= len(self.__buffer):
+            del self.__buffer[:pos]
+            self.__pos = 0
+
+    def __take(self, size: int) -> bytes:
+        """Returns size bytes from the buffer."""
+        retval = bytes(self.__buffer[self.__pos:self.__pos + size])
+        self.__skip(size)
+        return retval
+
     def read(self, size=-1):
         """A compatible file read that works with an internal buffer."""
         if size < 0:
             size = self.block_size
 
-        b_size = len(self.__buffer)
-        size = min(self.__todo, size)
-
-        if self.__buffer:
-            if b_size >= size:
-                retval = self.__buffer[:size]
-                self.__buffer = self.__buffer[size:]
-                return retval
-            size = size - b_size
-            self.__todo -= size
-            retval = self.__buffer + self.__file.read(size)
-            self.__buffer = b""
-            return retval
-
-        size = min(self.__todo, size)
+        available = len(self.__buffer) - self.__pos
+        if not available:
+            size = min(self.__todo, size)
+            data = self.__file.read(size) if size > 0 else b""
+            self.__todo -= len(data)
+            return data
+
+        if available < size:
+            self.__fill(size - available)
+        return self.__take(size)
+
+    def readinto(self, buffer) -> int:
+        """A compatible file readinto that works with an internal buffer."""
+        view = memoryview(buffer).cast("B")
+        available = len(self.__buffer) - self.__pos
+        if available:
+            size = min(len(view), available)
+            view[:size] = self.__buffer[self.__pos:self.__pos + size]
+            self.__skip(size)
+            return size
+
+        size = min(self.__todo, len(view))
+        if size <= 0:
+            return 0
+        if hasattr(self.__file, "readinto"):
+            size = self.__file.readinto(view[:size]) or 0
+        else:
+            data = self.__file.read(size)
+            size = len(data)
+            view[:size] = data
         self.__todo -= size
-        return self.__file.read(size)
+        return size
 
-    def readline(self, size=-1):  # noqa: C901
-        """A compatible file read that works with an internal buffer."""
+    def readline(self, size=-1):
+        """A compatible file read that works with an internal buffer.
+
+        Lines end with CRLF. TimeoutError is raised when no data come from
+        the file for the timeout, while the line is not complete.
+        """
         if size < 0:
             size = self.block_size
 
-        if not self.__buffer:
-            size = min(self.__todo, size)
-            self.__todo -= size
-            self.__buffer = self.__file.read(size)
-
-        line = b""
-        l_size = 0
-        if self.__timeout is not None:
-            times_out_at = time() + self.__timeout
-            seen_data = False
-
-        while l_size < size:
-            max_size = size - l_size
-            pos = self.__buffer.find(b"\r\n", 0, max_size)
-            if pos >= 0:
-                line += self.__buffer[: pos + 2]
-                self.__buffer = self.__buffer[pos + 2:]
-                return line
-
-            if self.__timeout is not None:
-                if self.__buffer:
-                    seen_data = True
-                elif seen_data:
-                    seen_data = False
-                    times_out_at = time() + self.__timeout
-                elif time() > times_out_at:
-                    raise TimeoutError("Timed out while receiving data")
-
-            line += self.__buffer[:max_size]
-            self.__buffer = self.__buffer[max_size:]
-            l_size = len(line)
-
-            if l_size < size:
-                n_size = min(self.__todo, max_size)
-                self.__todo -= n_size
-                self.__buffer = self.__file.read(n_size)
-
-        # no end-of-line found
-        return line
+        scan = self.__pos
+        times_out_at = None
+        while True:
+            pos = self.__pos
+            end = min(len(self.__buffer), pos + size)
+            found = self.__buffer.find(b"\r\n", scan, end)
+            if found >= 0:
+                return self.__take(found + 2 - pos)
+            if end - pos >= size:
+                return self.__take(size)
+            scan = max(pos, end - 1)  # CR could be at the end
+
+            if self.__fill(size - (end - pos)):
+                times_out_at = None
+            elif self.__todo <= 0 or self.__timeout is None:
+                # no end-of-line found
+                return self.__take(end - pos)
+            elif times_out_at is None:
+                times_out_at = time() + self.__timeout
+            elif time() > times_out_at:
+                raise TimeoutError("Timed out while receiving data")
+
+
+def _chunk_size(line: bytes) -> int:
+    """Returns the size from the chunk size line without end of line.
+
+    Chunk extensions are ignored, the size must be just hexadecimal digits,
+    HTTPException with the 400 status code is raised otherwise.
+
+    >>> _chunk_size(b"1F;name=value")
+    31
+    >>> _chunk_size(b"0x1f")
+    Traceback (most recent call last):
+    ...
+    poorwsgi.response.HTTPException: (400, {'error': 'Invalid chunk size'})
+    """
+    size = line.split(b";", 1)[0]
+    if RE_CHUNK_SIZE.fullmatch(size) is None:
+        raise HTTPException(HTTP_BAD_REQUEST, error="Invalid chunk size")
+    return int(size, base=16)
+
+
+class ChunkedInput:
+    """
+    A file-like decoder of chunked Transfer-Encoding from the wsgi.input file.
+
+    Encoded data are read ahead in blocks (by read1 when the file has it),
+    so many small chunks don't cost three reads each, and decoded chunks are
+    coalesced to the requested size. Chunk extensions are ignored, trailer
+    fields are stored in the trailers list. HTTPException is raised with
+    the 400 status code on bad chunked encoding, with the 413 status code
+    when decoded data are over max_size.
+
+    >>> data = ChunkedInput(BytesIO(b"3;ext=1\\r\\nabc\\r\\n2\\r\\nd\\n\\r\\n"
+    ...                             b"0\\r\\nX-Sum: 5\\r\\n\\r\\n"))
+    >>> data.readline(), data.read()
+    (b'abcd\\n', b'')
+    >>> data.trailers
+    [('X-Sum', '5')]
+    """
+
+    def __init__(
+        self,
+        file,
+        block_size: int = 65536,
+        max_size: Optional[int] = None,
+    ):
+        self.__file = file
+        self.__read_ahead = getattr(file, "read1", None)
+        self.__raw = bytearray()  # encoded data, which was read ahead
+        self.__pos = 0  # read offset in the encoded data
+        self.__buffer = bytearray()  # decoded data
+        self.__eof = False
+        self.__size = 0  # size of decoded data
+        self.block_size = block_size
+        self.max_size = max_size
+        self.trailers: list = []
+
+    def __skip(self, size: int):
+        """Moves the read offset, the encoded data are compacted sometimes."""
+        self.__pos = pos = self.__pos + size
+        if pos >= self.block_size and pos * 2 >= len(self.__raw):
+            del self.__raw[:pos]
+            self.__pos = 0
+
+    def __line(self) -> bytes:
+        """Returns next line of encoded data without end of line."""
+        start = self.__pos
+        while True:
+            end = self.__raw.find(b"\n", start)
+            if end >= 0:
+                line = bytes(self.__raw[self.__pos:end])
+                self.__skip(end + 1 - self.__pos)
+                return line.rstrip(b"\r")
+            if len(self.__raw) - self.__pos > MAX_CHUNK_LINE:
+                raise HTTPException(
+                    HTTP_BAD_REQUEST, error="Chunk line is too long"
+                )
+            if self.__read_ahead:
+                data = self.__read_ahead(self.block_size)
+            else:
+                data = self.__file.readline(MAX_CHUNK_LINE)
+            if not data:
+                raise HTTPException(
+                    HTTP_BAD_REQUEST, error="Unexpected end of chunked data"
+                )
+            start = len(self.__raw)
+            self.__raw += data
+
+    def __data(self, size: int):
+        """Moves size bytes of chunk data to the buffer."""
+        available = len(self.__raw) - self.__pos
+        if available:
+            end = self.__pos + min(size, available)
+            with memoryview(self.__raw) as view:
+                self.__buffer += view[self.__pos:end]
+            size -= end - self.__pos
+            self.__skip(end - self.__pos)
+        while size > 0:
+            data = self.__file.read(size)
+            if not data:
+                raise HTTPException(
+                    HTTP_BAD_REQUEST, error="Unexpected end of chunked data"
+                )
+            self.__buffer += data
+            size -= len(data)
+
+    def __chunk(self):
+        """Decodes next chunk to the buffer."""
+        size = _chunk_size(self.__line())
+        if size == 0:
+            self.__eof = True
+            line = self.__line()
+            while line:
+                name, _, value = line.partition(b":")
+                self.trailers.append(
+                    (name.strip().decode("latin-1"),
+                     value.strip().decode("latin-1"))
+                )
+                line = self.__line()
+            return
+        self.__size += size
+        if self.max_size is not None and self.__size > self.max_size:
+            raise HTTPException(
+                HTTP_REQUEST_ENTITY_TOO_LARGE,
+                error=f"Chunked body is over the limit {self.max_size}",
+            )
+        self.__data(size)
+        if self.__line():
+            raise HTTPException(
+                HTTP_BAD_REQUEST, error="Missing end of line after chunk data"
+            )
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads size bytes of decoded data, all data if size is negative."""
+        while not self.__eof and (size < 0 or len(self.__buffer) < size):
+            self.__chunk()
+        if size < 0:
+            size = len(self.__buffer)
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        """Reads one line of decoded data, but no more than size bytes."""
+        pos = self.__buffer.find(b"\n")
+        while (
+            pos < 0
+            and not self.__eof
+            and (size < 0 or len(self.__buffer) < size)
+        ):
+            start = len(self.__buffer)
+            self.__chunk()
+            pos = self.__buffer.find(b"\n", start)
+        end = len(self.__buffer) if pos < 0 else pos + 1
+        if size >= 0:
+            end = min(end, size)
+        data = bytes(self.__buffer[:end])
+        del self.__buffer[:end]
+        return data
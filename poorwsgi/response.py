@@ -12,19 +12,11 @@ from datetime import datetime
 from http.client import responses
 from inspect import stack
 from io import BufferedIOBase, BytesIO, IOBase, TextIOBase
-from json import dumps
 from logging import getLogger
 from os import R_OK, access, fstat
 from os.path import getctime
 from typing import BinaryIO, Callable, Iterable, Optional, Union
 
-try:
-    from simplejson import JSONEncoder
-
-    JSON_GENERATOR = True
-except ImportError:
-    JSON_GENERATOR = False
-
 from poorwsgi.headers import (
     ContentRange,
     Headers,
@@ -33,6 +25,7 @@ from poorwsgi.headers import (
     datetime_to_http,
     time_to_http,
 )
+from poorwsgi.json_codec import IterableEncoder, serialize
 from poorwsgi.state import (
     DECLINED,
     HTTP_I_AM_A_TEAPOT,
@@ -367,7 +360,9 @@ class Response(BaseResponse):
     application.
 
     Since Response uses BytesIO as an internal cache, which is closed
-    by the WSGI server, the **response can be used only once!**.
+    by the WSGI server, the **response can be used only once!**. Bytes data
+    are shared by the cache until the write method is called, so they are
+    not copied.
     """
 
     __buffer: BufferedIOBase
@@ -466,7 +461,9 @@ class JSONResponse(Response):
         status_code : int
             HTTP Status response code, 200 (``HTTP_OK``) by default.
         encoder_kwargs : dict
-            Keyword arguments for ``json.dumps`` function.
+            Keyword arguments of the standard ``json.dumps`` function.
+            The standard json module is used for them when the JSON codec
+            does not support them.
         kwargs : keyword arguments
             Other keys and values are serialized to JSON structure.
 
@@ -494,7 +491,10 @@ class JSONResponse(Response):
         if kwargs and data_ is None:
             data_ = kwargs
         super().__init__(
-            dumps(data_, **encoder_kwargs), content_type, headers, status_code
+            serialize(data_, **encoder_kwargs),
+            content_type,
+            headers,
+            status_code,
         )
 
 
@@ -709,9 +709,9 @@ class StrGeneratorResponse(GeneratorResponse):
 class JSONGeneratorResponse(StrGeneratorResponse):
     """A JSON Response for data from a generator.
 
-    The data will be processed in a generator fashion, so it needs to be
-    buffered.
-    This class requires the simplejson module.
+    The data will be processed in a generator fashion, so it does not need
+    to be buffered. Iterables, like generators, are serialized as arrays by
+    the IterableEncoder from the json_codec module.
 
     The ``**kwargs`` from the constructor are serialized to a JSON structure.
     """
@@ -723,18 +723,10 @@ class JSONGeneratorResponse(StrGeneratorResponse):
         status_code: int = HTTP_OK,
         **kwargs,
     ):
-        if not JSON_GENERATOR:
-            # pyl-int: disable=super-init-not-called
-            raise NotImplementedError(
-                "JSONGeneratorResponse need simplejson module"
-            )
-
         mime_type = "application/json"
         if charset:
             mime_type += "; charset=" + charset
-        generator = JSONEncoder(  # type: ignore
-            iterable_as_array=True
-        ).iterencode(kwargs)  # type: ignore
+        generator = IterableEncoder().iterencode(kwargs)
         super().__init__(generator, mime_type, headers, status_code)
 
 
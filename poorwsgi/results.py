@@ -1,8 +1,8 @@
 """Default PoorWSGI handlers.
 
 :Functions: not_modified, internal_server_error, bad_request, forbidden,
-            not_found, method_not_allowed, not_implemented, directory_index,
-            debug_info
+            not_found, method_not_allowed, request_entity_too_large,
+            not_implemented, directory_index, debug_info
 """
 
 import mimetypes
@@ -28,6 +28,7 @@ from poorwsgi.state import (
     HTTP_NOT_FOUND,
     HTTP_NOT_IMPLEMENTED,
     HTTP_NOT_MODIFIED,
+    HTTP_REQUEST_ENTITY_TOO_LARGE,
     HTTP_UNAUTHORIZED,
     METHOD_ALL,
     __date__,
@@ -385,6 +386,36 @@ def method_not_allowed(req, error=None):
     return Response(content, status_code=HTTP_METHOD_NOT_ALLOWED)
 
 
+def request_entity_too_large(req, error=None):
+    """A 413 Request Entity Too Large server error handler."""
+    if error:
+        log.warning("413 - Request Entity Too Large: %s", error)
+
+    content = (
+        "<!DOCTYPE html>\n"
+        "<html>\n"
+        " <head>\n"
+        "  <title>413 - Request Entity Too Large</title>\n"
+        '  <meta http-equiv="content-type" '
+        'content="text/html; charset=utf-8"/>\n'
+        "  <style>\n"
+        "   body {width: 80%%; margin: auto; padding-top: 30px;}\n"
+        "   h1 {text-align: center; color: #707070;}\n"
+        "   p {text-indent: 30px; margin-top: 30px; margin-bottom: 30px;}\n"
+        "  </style>\n"
+        " </head>\n"
+        " <body>\n"
+        "  <h1>413 - Request Entity Too Large</h1>\n"
+        "  <p>Request body for <code>%s</code> is larger than this server\n"
+        "   allows.</p>\n"
+        "  <hr>\n"
+        "  <small><i>webmaster: %s </i></small>\n"
+        " </body>\n"
+        "</html>" % (html_escape(req.uri), req.server_admin)
+    )
+    return Response(content, status_code=HTTP_REQUEST_ENTITY_TOO_LARGE)
+
+
 def not_implemented(req, code: Optional[int] = None, error=None):
     """A 501 Not Implemented server error handler."""
     if error:
@@ -576,6 +607,15 @@ def debug_info(req, app):
         )
     )
 
+    # regular expression routes statistics, the most missed first
+    stats_html = "\n".join(
+        "   <tr><td>%s</td><td>%d</td><td>%d</td></tr>"
+        % (html_escape(u.pattern), s.hits, s.misses)
+        for u, s in sorted(
+            app.route_stats.items(), key=lambda item: -item[1].misses
+        )
+    )
+
     dhandlers_html = "<tr><th>Default:</th></tr>\n"
     # this function could be called by user, so we need to test req.debug
     if req.debug and "debug-info" not in app.routes:
@@ -601,8 +641,7 @@ def debug_info(req, app):
 
     # transform state handlers and default state table to html, users handler
     # from shandlers are preferer
-    _tmp_shandlers = {}
-    _tmp_shandlers.update(default_states)
+    _tmp_shandlers = {key: val.copy() for key, val in default_states.items()}
     for key, val in app.states.items():
         if key in _tmp_shandlers:
             _tmp_shandlers[key].update(val)
@@ -724,6 +763,7 @@ def debug_info(req, app):
           <h1>Poor Wsgi Debug Info</h1>
           <nav>
             <a href="#uri_routes">Uri routes</a>
+            <a href="#route_stats">Route statistics</a>
             <a href="#state_handlers">State handlers</a>
             <a href="#before_after_handlers">Before &amp; After handlers</a>
             <a href="#filters">Filters</a>
@@ -743,6 +783,12 @@ def debug_info(req, app):
            %s
           </table>
 
+          <h2 id="route_stats">Regular expression routes statistics</h2>
+          <table>
+           <tr><th>Pattern</th><th>Hits</th><th>Misses</th></tr>
+        %s
+          </table>
+
           <h2 id="state_handlers">Http State Handlers Tanble</h2>
           <table>
         %s
@@ -790,6 +836,7 @@ def debug_info(req, app):
         shandlers_html,
         rhandlers_html,
         dhandlers_html,
+        stats_html,
         ehandlers_html,
         pre_post_html,
         filters_html,
@@ -816,6 +863,9 @@ __fill_default_shandlers(HTTP_UNAUTHORIZED, unauthorized)
 __fill_default_shandlers(HTTP_FORBIDDEN, forbidden)
 __fill_default_shandlers(HTTP_NOT_FOUND, not_found)
 __fill_default_shandlers(HTTP_METHOD_NOT_ALLOWED, method_not_allowed)
+__fill_default_shandlers(
+    HTTP_REQUEST_ENTITY_TOO_LARGE, request_entity_too_large
+)
 __fill_default_shandlers(HTTP_INTERNAL_SERVER_ERROR, internal_server_error)
 __fill_default_shandlers(HTTP_NOT_IMPLEMENTED, not_implemented)
 
@@ -829,4 +879,5 @@ __all__ = [
     "not_found",
     "not_implemented",
     "not_modified",
+    "request_entity_too_large",
 ]
@@ -0,0 +1,642 @@
+"""Dispatch structures for regular expression routes.
+
+:Classes:   Router, PrefixTree, RouteStats, PathArgs
+:Functions: split_rule, combine_patterns, literal_prefix
+"""
+
+import re
+from collections.abc import Mapping
+from typing import (Any, Callable, Dict, List, Match, NamedTuple, Optional,
+                    Pattern, Tuple, Union)
+
+# check, if there is define filter in uri
+re_filter = re.compile(r"<(\w+)(:[^>]+)?>")
+
+# characters which have special meaning in regular expression
+RE_METACHARS = frozenset(".^$*+?{}[]\\|()")
+
+HEX_DIGITS = "0123456789abcdefABCDEF"
+
+# route of the Router: (index, pattern, {method: (handler, converters, rule)})
+Route = Tuple[int, Pattern, dict]
+# routes compiled to one regex: (first_index, regex, routes, stats)
+Run = Tuple[int, Pattern, List[Route], List[int]]
+# static segment or (name, regex) pair of the group
+Segment = Union[str, Tuple[str, str]]
+
+
+def is_int(value: str) -> bool:
+    """Checks the value like the ``-?\\d+`` regular expression."""
+    return value.isdecimal() or (value[:1] == "-" and value[1:].isdecimal())
+
+
+def is_float(value: str) -> bool:
+    """Checks the value like the ``-?\\d+(\\.\\d+)?`` regular
+    expression."""
+    whole, dot, fraction = value.partition(".")
+    return is_int(whole) and (not dot or fraction.isdecimal())
+
+
+def is_word(value: str) -> bool:
+    """Checks the value like the ``\\w+`` regular expression."""
+    return value.replace("_", "a").isalnum()
+
+
+def is_hex(value: str) -> bool:
+    """Checks the value like the ``[0-9a-fA-F]+`` regular expression."""
+    return bool(value) and not value.strip(HEX_DIGITS)
+
+
+def is_uuid(value: str) -> bool:
+    """Checks the value like the regular expression of the ``:uuid``
+    filter."""
+    return (
+        len(value) == 36
+        and value[8] == value[13] == value[18] == value[23] == "-"
+        and value.count("-") == 4
+        and is_hex(value.replace("-", ""))
+    )
+
+
+# checkers used instead of regular expressions of predefined filters in the
+# segment tree, other regular expressions are matched by re module
+SEGMENT_CHECKERS = {
+    r"-?\d+": is_int,
+    r"-?\d+(\.\d+)?": is_float,
+    r"\w+": is_word,
+    r"[0-9a-fA-F]+": is_hex,
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-"
+    r"[0-9a-fA-F]{4}-[0-9a-fA-F]{12}": is_uuid,
+    r"[^/]+": bool,  # segment never contains the / character
+}
+
+# named group definition, which must be anonymized in combined pattern
+RE_NAMED_GROUP = re.compile(r"(?<!\\)\(\?P<\w+>")
+# backreferences, conditionals and global flags can't be combined
+RE_NOT_COMBINABLE = re.compile(
+    r"\\[1-9]|\(\?P=|\(\?\(|^\(\?[aiLmsux]+\)"
+)
+
+
+def split_rule(rule: str, segment_regex: Callable):
+    """Splits a route rule into path segments.
+
+    Returns a tuple of segments, where a static segment is a ``str`` and
+    a group is a ``(name, regex)`` pair. None is returned when the rule
+    can't be matched segment by segment, e.g. when a group is only a part
+    of the segment or its filter could match the ``/`` character.
+
+    >>> split_rule("/user/<id>", lambda f: "[^/]+")
+    ('', 'user', ('id', '[^/]+'))
+    >>> split_rule("/file-<id>.txt", lambda f: "[^/]+") is None
+    True
+    """
+    segments: List[Segment] = []
+    for segment in rule.split("/"):
+        if "<" not in segment:
+            if RE_METACHARS.intersection(segment):
+                return None
+            segments.append(segment)
+            continue
+        match = re_filter.fullmatch(segment)
+        if match is None:
+            return None
+        name, _filter = match.groups()
+        regex = segment_regex(_filter)
+        if regex is None:
+            return None
+        segments.append((name, regex))
+    return tuple(segments)
+
+
+def combine_patterns(patterns):
+    """Compiles patterns to one alternation with a marker group per pattern.
+
+    The name of the marker group (``match.lastgroup``) is ``_r`` plus the
+    index of the first matching pattern. Returns None, if some of patterns
+    can't be part of the alternation.
+
+    >>> regex = combine_patterns((r"/a/(?P<x>\\d+)$", r"/a/(?P<x>\\w+)$"))
+    >>> regex.match("/a/42").lastgroup, regex.match("/a/b").lastgroup
+    ('_r0', '_r1')
+    """
+    alternatives = []
+    for idx, pattern in enumerate(patterns):
+        if RE_NOT_COMBINABLE.search(pattern):
+            return None
+        alternatives.append(
+            f"(?P<_r{idx}>{RE_NAMED_GROUP.sub('(?:', pattern)})"
+        )
+    try:
+        return re.compile("|".join(alternatives), re.U)
+    except re.error:
+        return None
+
+
+def _has_alternation(pattern: str):
+    """Returns True, if the pattern has the ``|`` operator out of groups."""
+    depth = 0
+    pos = 0
+    length = len(pattern)
+    while pos < length:
+        char = pattern[pos]
+        if char == "\\":
+            pos += 1
+        elif char == "[":
+            pos += 1
+            if pattern[pos:pos + 1] == "^":
+                pos += 1
+            if pattern[pos:pos + 1] == "]":
+                pos += 1
+            while pos < length and pattern[pos] != "]":
+                if pattern[pos] == "\\":
+                    pos += 1
+                pos += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        pos += 1
+    return False
+
+
+def literal_prefix(pattern: str) -> str:
+    """Returns the literal string, which each path matching the pattern
+    starts with.
+
+    >>> literal_prefix(r"/user/(?P<id>\\d+)$")
+    '/user/'
+    >>> literal_prefix(r"/v1\\.0/files?")
+    '/v1.0/file'
+    >>> literal_prefix(r"/a|/b")
+    ''
+    """
+    if _has_alternation(pattern):
+        return ""
+    prefix = []
+    pos = 1 if pattern[:1] == "^" else 0
+    length = len(pattern)
+    while pos < length:
+        char = pattern[pos]
+        if char == "\\":
+            char = pattern[pos + 1:pos + 2]
+            if not char or char.isalnum():
+                break
+            pos += 1
+        elif char in RE_METACHARS:
+            break
+        if pattern[pos + 1:pos + 2] in ("?", "*", "{"):
+            break  # the character could be missing or repeated
+        prefix.append(char)
+        pos += 1
+    return "".join(prefix)
+
+
+class RouteStats(NamedTuple):
+    """Hit and miss counters of one regular expression route."""
+
+    hits: int
+    misses: int
+
+
+class _Found:
+    """The best route found in the segment tree."""
+
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("handlers", "index", "pattern", "values")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.pattern: Optional[Pattern] = None
+        self.handlers: dict = {}
+        self.values: Tuple[str, ...] = ()
+
+
+class _Node:
+    """Node of the segment tree."""
+
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("dynamic", "routes", "static")
+
+    def __init__(self):
+        self.static = {}
+        self.dynamic = {}  # {regex: (checker, node)}
+        self.routes = []  # [(index, pattern, handlers)]
+
+    def add(self, segments, route):
+        """Adds the route to the subtree."""
+        node = self
+        for segment in segments:
+            if isinstance(segment, str):
+                node = node.static.setdefault(segment, _Node())
+            else:
+                regex = segment[1]
+                if regex not in node.dynamic:
+                    checker = SEGMENT_CHECKERS.get(regex)
+                    if checker is None:
+                        checker = re.compile(regex).fullmatch
+                    node.dynamic[regex] = (checker, _Node())
+                node = node.dynamic[regex][1]
+        node.routes.append(route)
+
+    def find(self, segments, pos, method, values, best: _Found):
+        """Finds the first registered route for the rest of segments.
+
+        ``best`` is the best found route, which is updated in place.
+        """
+        if pos == len(segments):
+            for route in self.routes:
+                if route[0] < best.index and method in route[2]:
+                    best.index, best.pattern, best.handlers = route
+                    best.values = tuple(values)
+                    break
+            return
+
+        segment = segments[pos]
+        node = self.static.get(segment)
+        if node is not None:
+            node.find(segments, pos + 1, method, values, best)
+
+        for checker, node in self.dynamic.values():
+            if checker(segment):
+                values.append(segment)
+                node.find(segments, pos + 1, method, values, best)
+                values.pop()
+
+
+class Router:
+    """Dispatcher for the table of regular expression routes.
+
+    Routes created by Application.route with groups, which filters match
+    just one path segment, are stored in a segment tree, so their
+    lookup costs depend on the path depth, not on the count of routes.
+    Other routes are checked in the same order as they were registered,
+    and the first registered matching route always wins. Following routes
+    with the same method are compiled to one alternation, so the ``re``
+    engine finds the first matching route in one pass.
+
+    Routes out of the tree are indexed by the first path segment of their
+    literal prefix, so only routes, which could match the path, and routes
+    without such prefix are checked.
+
+    For routes out of the tree, hits and match attempts are counted. When
+    the reorder interval is set, routes are periodically reordered by their
+    hits, but only routes with different literal prefixes, which can't
+    match the same path, could change their order.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self, rhandlers: dict, segment_regex: Callable, reorder: int = 0
+    ):
+        """Creates the router from Application.regular_routes table.
+
+        segment_regex
+            Function which returns the regular expression for the route
+            filter, or None if the filter can't be matched per segment.
+        reorder
+            Count of lookups between reordering routes by hits, 0 means
+            never.
+        """
+        self.__tree = _Node()
+        self.__regular: List[Route] = []
+        self.__keys = {}  # {index: first segment of literal prefix}
+        self.__runs: Dict[Tuple[int, Optional[str]], List[Run]] = {}
+        self.__prefixes = set()  # known keys
+        self.__max = len(rhandlers)
+        self.__reorder = reorder
+        self.__lookups = 0
+        # hits and misses of routes from previous orders
+        self.__totals: Dict[int, List[int]] = {}
+
+        for index, (ruri, handlers) in enumerate(rhandlers.items()):
+            segments = self.__segments(ruri, handlers, segment_regex)
+            route = (index, ruri, handlers)
+            if segments is None:
+                self.__regular.append(route)
+                self.__keys[index] = self.__prefix_key(ruri)
+                self.__prefixes.add(self.__keys[index])
+            else:
+                self.__tree.add(segments, route)
+
+    @staticmethod
+    def __segments(ruri, handlers, segment_regex):
+        """Returns path segments of the route if it could be in the tree."""
+        rules = {rule for (_, _, rule) in handlers.values()}
+        if len(rules) != 1:
+            return None
+        rule = rules.pop()
+        if not rule:
+            return None
+        segments = split_rule(rule, segment_regex)
+        if segments is None:
+            return None
+
+        # filter could be changed after the route was set
+        regex = "/".join(
+            seg if isinstance(seg, str) else f"(?P<{seg[0]}>{seg[1]})"
+            for seg in segments
+        )
+        if regex + "$" != ruri.pattern:
+            return None
+        return segments
+
+    @staticmethod
+    def __prefix_key(ruri):
+        """Returns the first path segment, if the literal prefix of the
+        pattern contains it whole."""
+        prefix = literal_prefix(ruri.pattern)
+        end = prefix.find("/", 1)
+        if prefix[:1] != "/" or end < 0:
+            return None
+        return prefix[1:end]
+
+    @property
+    def regular(self):
+        """A tuple of patterns, which are not in the segment tree."""
+        return tuple(ruri for _, ruri, _ in self.__regular)
+
+    def __method_runs(self, method, key):
+        """Returns routes for the method and the prefix key compiled to
+        alternations."""
+        runs = self.__make_runs(
+            route
+            for route in self.__regular
+            if method in route[2] and self.__keys[route[0]] in (None, key)
+        )
+        self.__runs[(method, key)] = runs
+        return runs
+
+    def __make_runs(self, routes):
+        """Compiles routes to alternations.
+
+        The result is a list of ``(first_index, regex, routes, stats)``
+        tuples in the order of routes. When the routes list has just one
+        route, the regex is its own compiled pattern. The stats list
+        contains the count of match attempts and hits of each route.
+        """
+        runs = []
+        run = []
+        for route in routes:
+            if RE_NOT_COMBINABLE.search(route[1].pattern):
+                runs.extend(self.__combine(run))
+                runs.extend(self.__combine([route]))
+                run = []
+            else:
+                run.append(route)
+        runs.extend(self.__combine(run))
+        return runs
+
+    @staticmethod
+    def __combine(run):
+        """Returns the list of runs for the routes."""
+        if len(run) > 1:
+            regex = combine_patterns(tuple(ruri.pattern for _, ruri, _ in run))
+            if regex is not None:
+                return [(min(index for index, _, _ in run), regex, run,
+                         [0] * (len(run) + 1))]
+        return [(route[0], route[1], [route], [0, 0]) for route in run]
+
+    @staticmethod
+    def __run_stats(routes, stats):
+        """Yields ``(index, hits, misses)`` for each route of the run."""
+        tries = stats[0]
+        for pos, route in enumerate(routes):
+            hits = stats[pos + 1]
+            yield route[0], hits, tries - hits
+            tries -= hits
+
+    def stats(self):
+        """Returns RouteStats for each route out of the segment tree.
+
+        The result is a ``{pattern: RouteStats(hits, misses)}`` dictionary,
+        where misses are attempts to match the path, which failed.
+        """
+        totals = {index: list(val) for index, val in self.__totals.items()}
+        for runs in tuple(self.__runs.values()):
+            for _, _, routes, stats in runs:
+                for index, hits, misses in self.__run_stats(routes, stats):
+                    total = totals.setdefault(index, [0, 0])
+                    total[0] += hits
+                    total[1] += misses
+        return {
+            ruri: RouteStats(*totals.get(index, (0, 0)))
+            for index, ruri, _ in self.__regular
+        }
+
+    def reorder(self):
+        """Reorders routes for each method by their hits.
+
+        Routes are split to blocks of following routes, which literal
+        prefixes differ, so they can't match the same path. Routes are
+        sorted by their hits only inside these blocks.
+        """
+        for run_key, runs in tuple(self.__runs.items()):
+            routes = []
+            for _, _, run, stats in runs:
+                for index, hits, misses in self.__run_stats(run, stats):
+                    total = self.__totals.setdefault(index, [0, 0])
+                    total[0] += hits
+                    total[1] += misses
+                routes.extend(run)
+
+            ordered = sorted(
+                (block, -self.__totals[route[0]][0], pos, route)
+                for pos, (route, block) in enumerate(
+                    zip(routes, self.__blocks(routes)))
+            )
+            self.__runs[run_key] = self.__make_runs(
+                route for _, _, _, route in ordered)
+
+    @staticmethod
+    def __blocks(routes):
+        """Yields the block number of each route for reorder.
+
+        The new block starts, when the literal prefix of the route starts
+        with the prefix of some route in the current block, or vice versa.
+        """
+        block = 0
+        prefixes = set()  # literal prefixes of routes in the block
+        heads = set()  # all their beginnings
+        for _, ruri, _ in routes:
+            prefix = literal_prefix(ruri.pattern)
+            begins = {prefix[:i] for i in range(len(prefix) + 1)}
+            if prefix in heads or not prefixes.isdisjoint(begins):
+                block += 1
+                prefixes.clear()
+                heads.clear()
+            prefixes.add(prefix)
+            heads.update(begins)
+            yield block
+
+    def __path_runs(self, path: str, method: int) -> List[Run]:
+        """Returns runs of routes, which could match the path."""
+        end = path.find("/", 1)
+        key = path[1:end] if end > 0 else None
+        if key not in self.__prefixes:
+            key = None
+        runs = self.__runs.get((method, key))
+        if runs is None:
+            runs = self.__method_runs(method, key)
+        if self.__reorder and runs:
+            self.__lookups += 1
+            if self.__lookups % self.__reorder == 0:
+                self.reorder()
+                runs = self.__runs[(method, key)]
+        return runs
+
+    @staticmethod
+    def __match(
+        runs: List[Run], path: str, last: int
+    ) -> Optional[Tuple[Pattern, dict, Match]]:
+        """Returns ``(pattern, handlers, match)`` of the first route from
+        runs, which matches the path and which index is not over last."""
+        for first, regex, routes, stats in runs:
+            if first > last:
+                continue
+            stats[0] += 1
+            match = regex.match(path)
+            if match is None:
+                continue
+            if len(routes) == 1:
+                stats[1] += 1
+                index, ruri, handlers = routes[0]
+            else:
+                marker = match.lastgroup
+                assert marker is not None, "marker group matches always"
+                pos = int(marker[2:])
+                stats[pos + 1] += 1
+                index, ruri, handlers = routes[pos]
+                match = ruri.match(path)
+                assert match is not None, "marked pattern matches too"
+            if index > last:
+                return None
+            return ruri, handlers, match
+        return None
+
+    def find(self, path: str, method: int) -> Optional[tuple]:
+        """Finds the first registered route matching the path and method.
+
+        Returns a ``(pattern, (handler, converters, rule), groups,
+        path_args)`` tuple or None.
+        """
+        best = _Found(self.__max)
+        self.__tree.find(path.split("/"), 0, method, [], best)
+
+        found = self.__match(self.__path_runs(path, method), path, best.index)
+        if found is not None:
+            ruri, handlers, match = found
+            return (ruri, handlers[method], match.groups(),
+                    match.groupdict())
+
+        if best.pattern is None:
+            return None
+        handler = best.handlers[method]
+        return (best.pattern, handler, best.values,
+                PathArgs(handler[1], best.values))
+
+
+class PrefixTree:
+    """Tree of path prefixes, which finds the longest prefix of the path.
+
+    Prefixes are compared by whole path segments, so the ``/api`` prefix
+    matches the ``/api`` and ``/api/users`` paths, but not the ``/apidoc``
+    path. The lookup costs depend on the path depth, not on the count of
+    prefixes.
+
+    >>> tree = PrefixTree()
+    >>> tree.add("/api", "api")
+    >>> tree.add("/api/v2", "v2")
+    >>> tree.find("/api/v2/users"), tree.find("/apidoc")
+    (('/api/v2', 'v2'), None)
+    """
+
+    def __init__(self):
+        self.__root = ({}, [])  # (children, [(prefix, value)])
+        self.__values = {}
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __contains__(self, prefix):
+        return prefix in self.__values
+
+    def items(self):
+        """Returns (prefix, value) pairs in the order of adding."""
+        return self.__values.items()
+
+    def add(self, prefix: str, value):
+        """Adds or replaces the value for the prefix."""
+        node = self.__root
+        for segment in prefix.split("/")[1:]:
+            node = node[0].setdefault(segment, ({}, []))
+        node[1][:] = [(prefix, value)]
+        self.__values[prefix] = value
+
+    def pop(self, prefix: str):
+        """Removes the prefix and returns its value.
+
+        Raises KeyError, if the prefix is not in the tree.
+        """
+        value = self.__values.pop(prefix)
+        node = self.__root
+        for segment in prefix.split("/")[1:]:
+            node = node[0][segment]
+        node[1].clear()
+        return value
+
+    def find(self, path: str) -> Optional[tuple]:
+        """Returns the (prefix, value) pair of the longest prefix or None."""
+        node = self.__root
+        found = None
+        for segment in path.split("/")[1:]:
+            node = node[0].get(segment)
+            if node is None:
+                break
+            if node[1]:
+                found = node[1][0]
+        return found
+
+
+class PathArgs(Mapping):
+    """Read-only mapping of path arguments.
+
+    Names are taken from ``(name, converter)`` pairs of the route, and values
+    are stored in a tuple, so no dictionary is created while dispatching.
+    The copy method returns a new dictionary.
+
+    >>> args = PathArgs((("id", int), ("name", str)), (42, "x"))
+    >>> args["id"], args.copy()
+    (42, {'id': 42, 'name': 'x'})
+    """
+
+    __slots__ = ("__fields", "__values")
+
+    def __init__(
+        self,
+        fields: Tuple[Tuple[str, Callable], ...],
+        values: Tuple[Any, ...],
+    ):
+        self.__fields = fields
+        self.__values = values
+
+    def __getitem__(self, key):
+        for (name, _), value in zip(self.__fields, self.__values):
+            if name == key:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (name for name, _ in self.__fields)
+
+    def __len__(self):
+        return len(self.__values)
+
+    def __repr__(self):
+        return f"PathArgs({self.copy()!r})"
+
+    def copy(self):
+        """Returns a new dictionary with path arguments."""
+        return dict(zip(self, self.__values))
@@ -29,7 +29,7 @@ from typing import Any, Dict, Literal, Optional, Union
 
 from http.cookies import SimpleCookie
 
-from poorwsgi.headers import Headers
+from poorwsgi.headers import Headers, RequestCookies
 from poorwsgi.response import Response
 
 # Length of the XOR keystream derived from the secret key.  Longer values
@@ -251,13 +251,18 @@ class Session:
             if self.__max_age is not None:
                 self.cookie[self._sid]['Max-Age'] = self.__max_age
 
-    def load(self, cookies: Optional[SimpleCookie]):
+    def load(
+        self, cookies: Optional[Union[SimpleCookie, RequestCookies]]
+    ):
         """Load the session value from the request's cookies.
 
         Sets ``data`` to the raw cookie string, or leaves it as ``""``
         if the cookie is absent or empty.
         """
-        if not isinstance(cookies, SimpleCookie) or self._sid not in cookies:
+        if (
+            not isinstance(cookies, (SimpleCookie, RequestCookies))
+            or self._sid not in cookies
+        ):
             return
         self.data = cookies[self._sid].value
 
@@ -450,9 +455,14 @@ class PoorSession(Session):
         if _request is not None:
             self.load(_request.cookies)
 
-    def load(self, cookies: Optional[SimpleCookie]):
+    def load(
+        self, cookies: Optional[Union[SimpleCookie, RequestCookies]]
+    ):
         """Load and decrypt the session from the request's cookies."""
-        if not isinstance(cookies, SimpleCookie) or self._sid not in cookies:
+        if (
+            not isinstance(cookies, (SimpleCookie, RequestCookies))
+            or self._sid not in cookies
+        ):
             return
         raw = cookies[self._sid].value
 
@@ -2,7 +2,8 @@
 application.
 
 :Classes:   Application
-:Functions: to_response
+:Functions: to_response, compose_before, compose_after, prefixed_before,
+            prefixed_after
 
 """
 # pylint: disable=too-many-lines
@@ -11,7 +12,8 @@ application.
 
 import re
 import uuid
-from collections import OrderedDict
+from collections import ChainMap, OrderedDict
+from functools import lru_cache, wraps
 from hashlib import md5, sha256
 from logging import getLogger
 from os import R_OK, access, environ, path
@@ -34,6 +36,13 @@ from poorwsgi.results import (
     internal_server_error,
     not_implemented,
 )
+from poorwsgi.routing import (
+    PathArgs,
+    PrefixTree,
+    Router,
+    literal_prefix,
+    re_filter,
+)
 from poorwsgi.state import (
     HTTP_FORBIDDEN,
     HTTP_METHOD_NOT_ALLOWED,
@@ -43,13 +52,11 @@ from poorwsgi.state import (
     METHOD_POST,
     deprecated,
     methods,
+    sorted_methods,
 )
 
 log = getLogger("poorwsgi")
 
-# check, if there is define filter in uri
-re_filter = re.compile(r"<(\w+)(:[^>]+)?>")
-
 # check for invalid route definitions with spaces
 # Matches: <{space}name, <name{space}: , <name{space}> , <name:{space}word,
 # <name:filter{space}>
@@ -78,6 +85,154 @@ def to_response(response):
     return make_response(*response)
 
 
+def compose_before(funs: tuple) -> Optional[Callable]:
+    """Composes before-response handlers to one callable.
+
+    Returns None, when there is no handler to call.
+    """
+    if not funs:
+        return None
+    if len(funs) == 1:
+        return funs[0]
+
+    def before(req):
+        for fun in funs:
+            fun(req)
+
+    return before
+
+
+def compose_after(funs: tuple) -> Optional[Callable]:
+    """Composes after-response handlers to one callable.
+
+    The returned callable converts the return value of each handler to a
+    response, and logs the handler, which crashed. Returns None, when there
+    is no handler to call.
+    """
+    if not funs:
+        return None
+
+    def after(req, response):
+        for fun in funs:
+            try:
+                response = to_response(fun(req, response))
+            except BaseException:
+                log.error(
+                    "Handler %s from %s returns invalid data or crashed",
+                    fun,
+                    fun.__module__,
+                )
+                raise
+        return response
+
+    return after
+
+
+def in_prefix(req_path: str, prefix: str) -> bool:
+    """Returns True if the req_path is the prefix or it is under the prefix.
+
+    The prefix is matched by whole path segments, like mounts.
+
+    >>> in_prefix("/api/users", "/api"), in_prefix("/api", "/api/")
+    (True, True)
+    >>> in_prefix("/apiv2", "/api")
+    False
+    """
+    prefix = prefix.rstrip("/")
+    return req_path == prefix or req_path.startswith(prefix + "/")
+
+
+def prefixed_before(prefix: str, fun: Callable) -> Callable:
+    """Returns a before-response handler, which calls fun only if the request
+    path is under the prefix."""
+
+    @wraps(fun)
+    def before(req):
+        if in_prefix(req.path, prefix):
+            fun(req)
+
+    return before
+
+
+def prefixed_after(prefix: str, fun: Callable) -> Callable:
+    """Returns an after-response handler, which calls fun only if the request
+    path is under the prefix."""
+
+    @wraps(fun)
+    def after(req, response):
+        if in_prefix(req.path, prefix):
+            return fun(req, response)
+        return response
+
+    return after
+
+
+class _Closing:
+    """WSGI result, which calls the callback when the server closes it."""
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, result, callback: Callable):
+        self.__result = result
+        self.__callback = callback
+
+    def __iter__(self):
+        return iter(self.__result)
+
+    def close(self):
+        """Closes the result and calls the callback."""
+        try:
+            if hasattr(self.__result, "close"):
+                self.__result.close()
+        finally:
+            self.__callback()
+
+
+class Config:
+    """Read-only snapshot of the Application configuration.
+
+    It is created by Application.freeze and used by Request objects instead
+    of Application properties. MIME type lists are stored as frozensets.
+    The poor_Debug variable from the process environment is read here once.
+    """
+
+    # pylint: disable=too-few-public-methods
+    __slots__ = (
+        "auto_args",
+        "auto_cookies",
+        "auto_data",
+        "auto_form",
+        "auto_json",
+        "cached_size",
+        "data_size",
+        "debug",
+        "document_index",
+        "document_root",
+        "file_callback",
+        "form_mime_types",
+        "json_mime_types",
+        "keep_blank_values",
+        "lazy_parsing",
+        "max_body_size",
+        "read_timeout",
+        "secret_key",
+        "spool_body",
+        "strict_parsing",
+    )
+
+    def __init__(self, app: "Application"):
+        for name in self.__slots__:
+            value = getattr(app, name)
+            if name.endswith("_mime_types"):
+                value = frozenset(value)
+            object.__setattr__(self, name, value)
+        var = environ.get("poor_Debug")
+        if var:
+            object.__setattr__(self, "debug", var.lower() == "on")
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Config is read-only")
+
+
 class Application:
     """Poor WSGI application that is called by the WSGI server.
 
@@ -100,10 +255,26 @@ class Application:
 
         # Application name
         self.__name = name
+        # parent application of a virtual host created by Application.host
+        self.__parent = None
 
-        # list of pre and post process handlers
+        # list of pre and post process handlers: [(prefix, handler)]
         self.__before = []
         self.__after = []
+        # composed pre and post process handlers
+        self.__before_hook = None
+        self.__after_hook = None
+        # route handlers: {(uri, METHOD_GET): (before, after)}
+        self.__route_hooks = {}
+        # composed handlers for routes: {(uri, METHOD_GET): (before, after)}
+        self.__hooks = {}
+        # request body size limits of routes: {(uri, METHOD_POST): size}
+        self.__body_limits = {}
+
+        # configuration snapshot, which is set by freeze method
+        self.__frozen = None
+        # precomputed Allow header values for static routes
+        self.__allow = {}
 
         # dhandlers table for default handers on methods {METHOD_GET: handler}
         self.__dhandlers = {}
@@ -124,15 +295,35 @@ class Application:
             ":re:": (None, str),
             "none": (r"[^/]+", str),
         }
+        # filters which never match the "/" character
+        self.__segment_filters = {
+            ":int", ":float", ":word", ":hex", ":uuid", "none"}
 
         # handlers of regex paths: {r'/user/([a-z]?)': {METHOD_GET: handler}}
         self.__rhandlers = OrderedDict()
+        # dispatcher for __rhandlers, it is created with first request
+        self.__router = None
+        # route resolving function, optionally wrapped by lru_cache
+        self.__resolve = None
 
         # http state handlers: {HTTP_NOT_FOUND: {METHOD_GET: my_404_handler}}
         self.__shandlers = {}
+        # resolved state handlers: {(HTTP_NOT_FOUND, METHOD_GET): (fun, user)}
+        self.__state_cache = {}
 
         # exception handlers: {ValueError: {METHOD_GET: my_value_handler}}
         self.__ehandlers = OrderedDict()
+        # resolved exception handlers: {(ValueError, METHOD_GET): handler}
+        self.__error_cache = {}
+
+        # mounted applications: {'/prefix': application}
+        self.__mounts = PrefixTree()
+        # virtual host applications: {'api.example.com': application}
+        self.__hosts = {}
+        # wildcard virtual hosts by suffix: {'.example.com': application}
+        self.__host_suffixes = {}
+        # virtual hosts created by Application.host: {hostname: application}
+        self.__vhosts = {}
 
         # -- Application variable
         self.__config = {
@@ -143,7 +334,12 @@ class Application:
             "cached_size": 65365,
             "data_size": 65365,
             "read_timeout": 10,
+            "dispatch_cache_size": 0,
+            "reorder_interval": 0,
             "keep_blank_values": 0,
+            "lazy_parsing": False,
+            "max_body_size": None,
+            "spool_body": False,
             "strict_parsing": 0,
             "file_callback": None,
             "json_mime_types": [
@@ -203,11 +399,254 @@ class Application:
                 "Undefined route group filter '%s'" % _filter
             ) from err
 
+    def __writable(self):
+        """Raises RuntimeError if the application is frozen."""
+        if self.__frozen is not None:
+            raise RuntimeError("Application %s is frozen." % self.__name)
+
+    def __set_config(self, key: str, value):
+        self.__writable()
+        self.__config[key] = value
+
+    def __reset_dispatch(self):
+        """Drops the router and the dispatch cache after table changes."""
+        self.__writable()
+        self.__router = None
+        self.__resolve = None
+        self.__allow = {}
+        self.__hooks = {}
+
+    def __reset_hooks(self):
+        """Composes before and after handlers after their change."""
+        # pylint: disable=protected-access
+        self.__before_hook = compose_before(
+            self.__applicable(
+                self._hooks_chain(True), "", False, prefixed_before
+            )
+        )
+        self.__after_hook = compose_after(
+            self.__applicable(
+                self._hooks_chain(False), "", False, prefixed_after
+            )
+        )
+        self.__hooks = {}
+        for vhost in self.__vhosts.values():
+            vhost._parent_changed(hooks=True)
+
+    def __reset_handlers(self):
+        """Drops cached state and error handlers after their change."""
+        # pylint: disable=protected-access
+        self.__state_cache = {}
+        self.__error_cache = {}
+        for vhost in self.__vhosts.values():
+            vhost._parent_changed(hooks=False)
+
+    def _inherit(self, parent: "Application", config: dict):
+        """Chains the virtual host to the parent application.
+
+        Internal method called by Application.host on the new application.
+        """
+        self.__parent = parent
+        self.__config = ChainMap({}, config)
+        self.__auth_hash = None
+        self.__reset_hooks()
+        self.__reset_handlers()
+
+    def _parent_changed(self, hooks: bool):
+        """Drops composed or cached handlers after the parent change."""
+        if not hooks:
+            self.__reset_handlers()
+        elif self.__frozen is None:
+            self.__reset_hooks()
+
+    def _hooks_chain(self, before: bool) -> list:
+        """Returns before or after handlers including the parent ones."""
+        # pylint: disable=protected-access
+        hooks = self.__before if before else self.__after
+        if self.__parent is None:
+            return hooks
+        return self.__parent._hooks_chain(before) + hooks
+
+    @staticmethod
+    def __applicable(hooks, start: str, exact: bool, wrap: Callable):
+        """Returns handlers, which could be called for paths with the start.
+
+        The start is the exact path, or the literal start of paths, when the
+        path is not known. Handlers, which could be called only for some of
+        such paths, are wrapped to check the prefix.
+        """
+        funs = []
+        for prefix, fun in hooks:
+            if prefix is None:
+                funs.append(fun)
+            elif exact:
+                if in_prefix(start, prefix):
+                    funs.append(fun)
+            elif start.startswith(prefix.rstrip("/") + "/"):
+                funs.append(fun)
+            elif prefix.startswith(start) or start.startswith(prefix):
+                funs.append(wrap(prefix, fun))
+        return tuple(funs)
+
+    def __route_hook(self, key, method: int):
+        """Returns composed before and after handlers for the route.
+
+        The key is the static URI or the compiled regular expression.
+        """
+        hooks = self.__hooks.get((key, method))
+        if hooks is None:
+            exact = isinstance(key, str)
+            start = key if exact else literal_prefix(key.pattern)
+            before, after = self.__route_hooks.get((key, method), ((), ()))
+            hooks = (
+                compose_before(
+                    self.__applicable(
+                        self._hooks_chain(True), start, exact,
+                        prefixed_before
+                    )
+                    + before
+                ),
+                compose_after(
+                    self.__applicable(
+                        self._hooks_chain(False), start, exact,
+                        prefixed_after
+                    )
+                    + after
+                ),
+            )
+            self.__hooks[(key, method)] = hooks
+        return hooks
+
+    def __set_body_limits(self, key, method: int, max_body_size):
+        """Stores route body size limits for all methods from the mask."""
+        for val in methods.values():
+            if method & val:
+                if max_body_size is None:
+                    self.__body_limits.pop((key, val), None)
+                else:
+                    self.__body_limits[(key, val)] = int(max_body_size)
+
+    def __set_route_hooks(self, key, method: int, before, after):
+        """Stores route handlers for all methods from the method mask."""
+        for val in methods.values():
+            if method & val:
+                if before or after:
+                    self.__route_hooks[(key, val)] = (
+                        tuple(before),
+                        tuple(after),
+                    )
+                else:
+                    self.__route_hooks.pop((key, val), None)
+
+    def __allow_header(self, rule: str):
+        """Returns the Allow header value for the static route."""
+        if rule not in self.__allow:
+            self.__allow[rule] = ", ".join(
+                key
+                for key, val in sorted_methods
+                if val in self.__handlers.get(rule, ())
+            )
+        return self.__allow[rule]
+
+    def __get_router(self) -> Router:
+        """Returns the router of regular routes, which is created lazily."""
+        if self.__router is None:
+            self.__router = Router(
+                self.__rhandlers, self.__segment_regex, self.reorder_interval
+            )
+        return self.__router
+
+    def __make_resolve(self):
+        """Returns the route resolving function, which could be cached."""
+        self.__get_router()
+        if self.dispatch_cache_size > 0:
+            return lru_cache(self.dispatch_cache_size)(self.__resolve_route)
+        return self.__resolve_route
+
+    def __resolve_route(self, req_path: str, method: int):
+        """Finds the regular route and converts path arguments.
+
+        Returns a ``(pattern, handler, rule, path_args, args)`` tuple or
+        None.
+        """
+        found = self.__get_router().find(req_path, method)
+        if found is None:
+            return None
+
+        ruri, (handler, converters, rule), groups, path_args = found
+        if converters:
+            args = tuple(
+                val if conv is str else conv(val)
+                for (_, conv), val in zip(converters, groups)
+            )
+            return (ruri, handler, rule or ruri.pattern,
+                    PathArgs(converters, args), args)
+        return (ruri, handler, rule or ruri.pattern, path_args, groups)
+
+    def __segment_regex(self, _filter):
+        _filter = str(_filter).lower()
+        if _filter in self.__segment_filters:
+            return self.__filters[_filter][0]
+        return None
+
     @property
     def name(self):
         """Returns the application name."""
         return self.__name
 
+    @property
+    def frozen(self):
+        """True if the application was frozen by Application.freeze."""
+        return self.__frozen is not None
+
+    @property
+    def config(self):
+        """Configuration used by Request objects.
+
+        After Application.freeze, it is a read-only Config snapshot.
+        Before that, it is the application itself, which has the same
+        properties.
+        """
+        return self.__frozen or self
+
+    def freeze(self):
+        """Precomputes the dispatch path and makes the application read-only.
+
+        Call this method once, after all routes, hooks and configuration
+        values are set, typically just before the application is passed to
+        the WSGI server. The configuration is stored to a read-only Config
+        snapshot, before and after response handlers are composed for each
+        route, the regular routes router and Allow header values for static
+        routes are created. Any later change of the application raises
+        RuntimeError. Mounted and virtual host applications are frozen
+        too.
+
+        .. code:: python
+
+            app = Application("app")
+            ...
+            app.freeze()
+        """
+        if self.__frozen is not None:
+            return
+        for app in self.hosts.values():
+            if isinstance(app, Application):
+                app.freeze()
+        for _, app in self.__mounts.items():
+            if isinstance(app, Application):
+                app.freeze()
+        self.__reset_hooks()
+        if self.__resolve is None:
+            self.__resolve = self.__make_resolve()
+        for uri, handlers in self.__handlers.items():
+            self.__allow_header(uri)
+            for method in handlers:
+                self.__route_hook(uri, method)
+        for ruri, handlers in self.__rhandlers.items():
+            for method in handlers:
+                self.__route_hook(ruri, method)
+        self.__frozen = Config(self)
+
     @property
     def filters(self):
         """A copy of the filter table.
@@ -241,7 +680,7 @@ class Application:
 
         See Application.before_response.
         """
-        return tuple(self.__before)
+        return tuple(fun for _, fun in self.__before)
 
     @property
     def after(self):
@@ -249,7 +688,31 @@ class Application:
 
         See Application.after_response.
         """
-        return tuple(self.__after)
+        return tuple(fun for _, fun in self.__after)
+
+    @property
+    def mounts(self):
+        """A copy of the table with mounted applications.
+
+        See Application.mount.
+        """
+        return {
+            prefix.encode("iso-8859-1").decode(): app
+            for prefix, app in self.__mounts.items()
+        }
+
+    @property
+    def hosts(self):
+        """A copy of the table with virtual host applications.
+
+        See Application.set_host.
+        """
+        hosts = self.__hosts.copy()
+        hosts.update(
+            ("*" + suffix, app)
+            for suffix, app in self.__host_suffixes.items()
+        )
+        return hosts
 
     @property
     def defaults(self):
@@ -302,7 +765,7 @@ class Application:
 
     @auto_args.setter
     def auto_args(self, value):
-        self.__config["auto_args"] = bool(value)
+        self.__set_config("auto_args", bool(value))
 
     @property
     def auto_form(self):
@@ -316,7 +779,7 @@ class Application:
 
     @auto_form.setter
     def auto_form(self, value):
-        self.__config["auto_form"] = bool(value)
+        self.__set_config("auto_form", bool(value))
 
     @property
     def auto_json(self):
@@ -331,7 +794,7 @@ class Application:
 
     @auto_json.setter
     def auto_json(self, value):
-        self.__config["auto_json"] = bool(value)
+        self.__set_config("auto_json", bool(value))
 
     @property
     def auto_data(self):
@@ -343,7 +806,7 @@ class Application:
 
     @auto_data.setter
     def auto_data(self, value: Union[int, bool]):
-        self.__config["auto_data"] = bool(value)
+        self.__set_config("auto_data", bool(value))
 
     @property
     def cached_size(self):
@@ -355,7 +818,7 @@ class Application:
 
     @cached_size.setter
     def cached_size(self, value: int):
-        self.__config["cached_size"] = value
+        self.__set_config("cached_size", value)
 
     @property
     def data_size(self):
@@ -368,20 +831,115 @@ class Application:
 
     @data_size.setter
     def data_size(self, value: int):
-        self.__config["data_size"] = int(value)
+        self.__set_config("data_size", int(value))
+
+    @property
+    def spool_body(self):
+        """Spools bigger request bodies to a temporary file.
+
+        If it is True (False is default), a request body bigger than
+        data_size is copied block by block to a temporary file, when
+        Request.body_file, Request.data or Request.data_view is read. So the
+        whole body is available for random access, but it does not stay in
+        memory. Request.data returns a read-only mmap of that file. Both
+        are closed, when the WSGI server closes the response.
+        """
+        return self.__config["spool_body"]
+
+    @spool_body.setter
+    def spool_body(self, value: Union[int, bool]):
+        self.__set_config("spool_body", bool(value))
+
+    @property
+    def max_body_size(self):
+        """The maximum size of the request body in bytes.
+
+        Requests with a bigger Content-Length are rejected with the
+        413 Request Entity Too Large status before the body is read.
+        The decoded body of chunked requests is counted while it is read.
+        It could be overridden for each route, see Application.route.
+        Default value is None, which means no limit.
+        """
+        return self.__config["max_body_size"]
+
+    @max_body_size.setter
+    def max_body_size(self, value: Optional[int]):
+        self.__set_config(
+            "max_body_size", None if value is None else int(value)
+        )
+
+    @property
+    def dispatch_cache_size(self):
+        """Size of the regular routes dispatch cache.
+
+        When it is greater than zero, resolved regular routes, including
+        converted path arguments, are stored in an LRU cache keyed by the
+        request path and method. So converters must return immutable values
+        when the cache is used. Default value is 0, which means no cache.
+        """
+        return self.__config["dispatch_cache_size"]
+
+    @dispatch_cache_size.setter
+    def dispatch_cache_size(self, value: int):
+        self.__set_config("dispatch_cache_size", int(value))
+        self.__reset_dispatch()
+
+    @property
+    def dispatch_cache_info(self):
+        """Statistics of the dispatch cache, or None if it is not used.
+
+        The value is a ``CacheInfo(hits, misses, maxsize, currsize)`` named
+        tuple from functools.lru_cache. Counters start from zero after each
+        change of routes table.
+        """
+        if self.__resolve is None or \
+                not hasattr(self.__resolve, "cache_info"):
+            return None
+        return self.__resolve.cache_info()
+
+    @property
+    def reorder_interval(self):
+        """Count of regular route lookups between reordering routes.
+
+        When it is greater than zero, regular expression routes, which are
+        not in the segment tree, are periodically reordered by their hits.
+        Only routes with different literal prefixes, which can't match the
+        same path, change their order. Default value is 0, which means that
+        routes are checked in the order of registration.
+        """
+        return self.__config["reorder_interval"]
+
+    @reorder_interval.setter
+    def reorder_interval(self, value: int):
+        self.__set_config("reorder_interval", int(value))
+        self.__reset_dispatch()
+
+    @property
+    def route_stats(self):
+        """Hits and misses of regular expression routes.
+
+        It is a ``{pattern: RouteStats(hits, misses)}`` dictionary for
+        routes which are not in the segment tree, where misses are failed
+        attempts to match the request path. Routes found in the dispatch
+        cache are not counted. Counters start from zero after each change
+        of routes table.
+        """
+        if self.__router is None:
+            return {}
+        return self.__router.stats()
 
     @property
     def auto_cookies(self):
         """Automatic parsing of cookies from request headers.
 
         If it is True (default) and the Cookie request header is set,
-        a SimpleCookie object is parsed to the Request property cookies.
+        a RequestCookies mapping is set to the Request property cookies.
         """
         return self.__config["auto_cookies"]
 
     @auto_cookies.setter
     def auto_cookies(self, value: Union[int, bool]):
-        self.__config["auto_cookies"] = bool(value)
+        self.__set_config("auto_cookies", bool(value))
 
     @property
     def debug(self):
@@ -393,7 +951,7 @@ class Application:
 
     @debug.setter
     def debug(self, value: Union[int, bool]):
-        self.__config["debug"] = "On" if bool(value) else "Off"
+        self.__set_config("debug", "On" if bool(value) else "Off")
 
     @property
     def document_root(self):
@@ -407,7 +965,7 @@ class Application:
 
     @document_root.setter
     def document_root(self, value: str):
-        self.__config["document_root"] = value
+        self.__set_config("document_root", value)
 
     @property
     def document_index(self):
@@ -421,7 +979,7 @@ class Application:
 
     @document_index.setter
     def document_index(self, value: Union[int, bool]):
-        self.__config["document_index"] = "On" if bool(value) else "Off"
+        self.__set_config("document_index", "On" if bool(value) else "Off")
 
     @property
     def secret_key(self):
@@ -434,7 +992,7 @@ class Application:
 
     @secret_key.setter
     def secret_key(self, value: Union[str, bytes]):
-        self.__config["secret_key"] = value
+        self.__set_config("secret_key", value)
 
     @property
     def keep_blank_values(self):
@@ -447,7 +1005,23 @@ class Application:
 
     @keep_blank_values.setter
     def keep_blank_values(self, value: Union[int, bool]):
-        self.__config["keep_blank_values"] = int(value)
+        self.__set_config("keep_blank_values", int(value))
+
+    @property
+    def lazy_parsing(self):
+        """Parses request arguments, body and cookies on first access.
+
+        If it is True (False is default), Request properties args, form,
+        json and cookies are parsed when the handler reads them, not when
+        the Request object is created. Requests which don't use them, or
+        which end with an error before the handler is called, don't pay for
+        parsing. Invalid JSON raises HTTPException from the json property.
+        """
+        return self.__config["lazy_parsing"]
+
+    @lazy_parsing.setter
+    def lazy_parsing(self, value: Union[int, bool]):
+        self.__set_config("lazy_parsing", bool(value))
 
     @property
     def strict_parsing(self):
@@ -460,7 +1034,7 @@ class Application:
 
     @strict_parsing.setter
     def strict_parsing(self, value: Union[int, bool]):
-        self.__config["strict_parsing"] = int(value)
+        self.__set_config("strict_parsing", int(value))
 
     @property
     def file_callback(self):
@@ -473,7 +1047,7 @@ class Application:
 
     @file_callback.setter
     def file_callback(self, value: Callable):
-        self.__config["file_callback"] = value
+        self.__set_config("file_callback", value)
 
     @property
     def read_timeout(self):
@@ -483,7 +1057,7 @@ class Application:
     @read_timeout.setter
     def read_timeout(self, timeout: float):
         """Sets the timeout (in seconds) used for file reception."""
-        self.__config["read_timeout"] = timeout
+        self.__set_config("read_timeout", timeout)
 
     @property
     def json_mime_types(self):
@@ -510,7 +1084,7 @@ class Application:
         # for Digest
         if self.__config["secret_key"] is None:
             raise ValueError("Set secret key first")
-        self.__config["auth_type"] = value
+        self.__set_config("auth_type", value)
 
     @property
     def auth_algorithm(self):
@@ -532,7 +1106,7 @@ class Application:
         if self.__config["auth_algorithm"] == "Digest":
             if value not in AUTH_DIGEST_ALGORITHMS:
                 raise ValueError("Unsupported Digest algorithm")
-        self.__config["auth_algorithm"] = value
+        self.__set_config("auth_algorithm", value)
         self.__auth_hash = AUTH_DIGEST_ALGORITHMS[value]
 
     @property
@@ -543,6 +1117,8 @@ class Application:
 
         :default: md5
         """
+        if self.__auth_hash is None:
+            return self.__parent.auth_hash
         return self.__auth_hash
 
     @property
@@ -560,7 +1136,7 @@ class Application:
     def auth_qop(self, value: str):
         if value not in ("", "auth", None):
             raise ValueError("Unsupported quality of protection")
-        self.__config["auth_qop"] = value
+        self.__set_config("auth_qop", value)
 
     @property
     def auth_timeout(self):
@@ -577,7 +1153,7 @@ class Application:
     def auth_timeout(self, value: Optional[int]):
         if not isinstance(value, (type(None), int)):
             raise ValueError("Unsupported auth_timeout value")
-        self.__config["auth_timeout"] = value
+        self.__set_config("auth_timeout", value)
 
     @property
     def form_mime_types(self):
@@ -604,8 +1180,11 @@ class Application:
 
             app.set_filter('uint', r'\d+', int)
         """
+        self.__writable()
         name = ":" + name if name[0] != ":" else name
         self.__filters[name] = (regex, converter)
+        self.__segment_filters.discard(name)
+        self.__reset_dispatch()
 
     @deprecated("use before_response instead")
     def before_request(self):
@@ -617,20 +1196,26 @@ class Application:
 
         return wrapper
 
-    def before_response(self):
+    def before_response(self, prefix: Optional[str] = None):
         """Appends a handler to call before each response.
 
         This is a decorator for a function to call before each response.
+        When the prefix is set, the handler is called only for requests,
+        which path starts with the prefix.
 
         .. code:: python
 
             @app.before_response()
             def before_each_response(req):
                 print("Response coming")
+
+            @app.before_response(prefix="/api/")
+            def before_api_response(req):
+                check_token(req)
         """
 
         def wrapper(fun):
-            self.add_before_response(fun)
+            self.add_before_response(fun, prefix)
             return fun
 
         return wrapper
@@ -640,11 +1225,14 @@ class Application:
         """Deprecated; use add_before_response instead."""
         self.add_before_response(fun)
 
-    def add_before_response(self, fun: Callable):
+    def add_before_response(
+        self, fun: Callable, prefix: Optional[str] = None
+    ):
         """Appends a handler to call before each response.
 
         This method adds a function to the list of functions that are
-        called before each response.
+        called before each response, or before responses for request paths
+        starting with the prefix.
 
         .. code:: python
 
@@ -653,9 +1241,11 @@ class Application:
 
             app.add_before_response(before_each_response)
         """
-        if self.__before.count(fun):
+        self.__writable()
+        if fun in self.before:
             raise ValueError("%s is in list yet" % str(fun))
-        self.__before.append(fun)
+        self.__before.append((prefix, fun))
+        self.__reset_hooks()
 
     @deprecated("use pop_before_response instead")
     def pop_before_request(self, fun: Callable):
@@ -665,9 +1255,11 @@ class Application:
     def pop_before_response(self, fun: Callable):
         """Removes a handler added by add_before_response or
         before_response."""
-        if not self.__before.count(fun):
+        self.__writable()
+        if fun not in self.before:
             raise ValueError("%s is not in list" % str(fun))
-        self.__before.remove(fun)
+        self.__before.pop(self.before.index(fun))
+        self.__reset_hooks()
 
     @deprecated("use after_response instead")
     def after_request(self):
@@ -679,11 +1271,12 @@ class Application:
 
         return wrapper
 
-    def after_response(self):
+    def after_response(self, prefix: Optional[str] = None):
         """Appends a handler to call after each response.
 
-        This decorator appends a function to be called after each response.
-        The handler must return a response object.
+        This decorator appends a function to be called after each response,
+        or after responses for request paths starting with the prefix. The
+        handler must return a response object.
 
         .. code:: python
 
@@ -694,7 +1287,7 @@ class Application:
         """
 
         def wrapper(fun):
-            self.add_after_response(fun)
+            self.add_after_response(fun, prefix)
             return fun
 
         return wrapper
@@ -704,11 +1297,14 @@ class Application:
         """Deprecated; use add_after_response instead."""
         self.add_after_response(fun)
 
-    def add_after_response(self, fun: Callable):
+    def add_after_response(
+        self, fun: Callable, prefix: Optional[str] = None
+    ):
         """Appends a handler to call after each response.
 
         This method directly appends a function to the list of functions
-        that are called after each response.
+        that are called after each response, or after responses for request
+        paths starting with the prefix.
 
         .. code:: python
 
@@ -718,9 +1314,11 @@ class Application:
 
             app.add_after_response(after_each_response)
         """
-        if self.__after.count(fun):
+        self.__writable()
+        if fun in self.after:
             raise ValueError("%s is in list yet" % str(fun))
-        self.__after.append(fun)
+        self.__after.append((prefix, fun))
+        self.__reset_hooks()
 
     @deprecated("use pop_after_response instead")
     def pop_after_request(self, fun: Callable):
@@ -729,9 +1327,11 @@ class Application:
 
     def pop_after_response(self, fun: Callable):
         """Removes a handler added by add_after_response or after_response."""
-        if not self.__before.count(fun):
+        self.__writable()
+        if fun not in self.after:
             raise ValueError("%s is not in list" % str(fun))
-        self.__after.remove(fun)
+        self.__after.pop(self.after.index(fun))
+        self.__reset_hooks()
 
     def default(self, method: int = METHOD_HEAD | METHOD_GET):
         """Sets a default handler.
@@ -767,15 +1367,25 @@ class Application:
 
             app.set_default(default_get_post, METHOD_GET_POST)
         """
+        self.__writable()
         for val in methods.values():
             if method & val:
                 self.__dhandlers[val] = fun
 
     def pop_default(self, method: int):
         """Pops the default handler for a method."""
+        self.__writable()
         return self.__dhandlers.pop(method)
 
-    def route(self, uri: str, method: int = METHOD_HEAD | METHOD_GET):
+    def route(
+        self,
+        uri: str,
+        method: int = METHOD_HEAD | METHOD_GET,
+        before=(),
+        after=(),
+        host: Optional[str] = None,
+        max_body_size: Optional[int] = None,
+    ):
         r"""Wraps a function to be a handler for a URI and specified method.
 
         You can define the URI as a static path or with groups, which are
@@ -819,16 +1429,54 @@ class Application:
         The first match stops any further searching. In fact, if groups are
         detected, they will be transferred to normal regular expressions and
         added to a second internal table.
+
+        Handlers from before and after lists are called only for this route,
+        after before-response and after-response handlers of the
+        application. They have the same interface as before-response and
+        after-response handlers.
+
+        .. code:: python
+
+            @app.route('/admin', before=[check_login], after=[no_cache])
+            def admin(req):
+                ...
+
+        When the host is set, the route is set to the virtual host
+        application, which is created by Application.host if it does not
+        exist.
+
+        .. code:: python
+
+            @app.route('/users', host='api.example.com')
+            def api_users(req):
+                ...
+
+        When max_body_size is set, it is used instead of
+        Application.max_body_size for this route.
+
+        .. code:: python
+
+            @app.route('/upload', method=METHOD_POST, max_body_size=2**30)
+            def upload(req):
+                ...
         """
 
         def wrapper(fun):
-            self.set_route(uri, fun, method)
+            self.set_route(uri, fun, method, before, after, host,
+                           max_body_size)
             return fun
 
         return wrapper
 
     def set_route(
-        self, uri: str, fun: Callable, method: int = METHOD_HEAD | METHOD_GET
+        self,
+        uri: str,
+        fun: Callable,
+        method: int = METHOD_HEAD | METHOD_GET,
+        before=(),
+        after=(),
+        host: Optional[str] = None,
+        max_body_size: Optional[int] = None,
     ):
         """Sets a handler for a URI and method.
 
@@ -839,6 +1487,15 @@ class Application:
 
             app.set_route('/use/post', user_create, METHOD_POST)
         """
+        if host is not None:
+            vhost = self.hosts.get(host.lower().rstrip("."))
+            if vhost is None:
+                vhost = self.host(host)
+            elif not isinstance(vhost, Application):
+                raise ValueError("Host %s is not an Application" % host)
+            vhost.set_route(uri, fun, method, before, after,
+                            max_body_size=max_body_size)
+            return
         # Check for invalid spaces in route filter definitions
         if re_invalid_filter.search(uri):
             msg = (
@@ -855,13 +1512,20 @@ class Application:
                 (g[0], self.__converter(g[1]))
                 for g in (m.groups() for m in re_filter.finditer(uri))
             )
-            self.set_regular_route(r_uri, fun, method, converters, uri)
+            self.set_regular_route(
+                r_uri, fun, method, converters, uri, before, after,
+                max_body_size
+            )
         else:
+            self.__writable()
             if uri not in self.__handlers:
                 self.__handlers[uri] = {}
             for val in methods.values():
                 if method & val:
                     self.__handlers[uri][val] = fun
+            self.__set_route_hooks(uri, method, before, after)
+            self.__set_body_limits(uri, method, max_body_size)
+            self.__reset_dispatch()
 
     def pop_route(self, uri: str, method: int):
         """Pops a handler for a URI and method from the handlers table.
@@ -874,10 +1538,14 @@ class Application:
             r_uri = re_filter.sub(self.__regex, uri) + "$"
             return self.pop_regular_route(r_uri, method)
 
+        self.__writable()
         handlers = self.__handlers.get(uri, {})
         rval = handlers.pop(method)
         if not handlers:  # is empty
             self.__handlers.pop(uri, None)
+        self.__route_hooks.pop((uri, method), None)
+        self.__body_limits.pop((uri, method), None)
+        self.__reset_dispatch()
         return rval
 
     def is_route(self, uri: str):
@@ -887,7 +1555,14 @@ class Application:
             return self.is_regular_route(r_uri)
         return uri in self.__handlers
 
-    def regular_route(self, ruri: str, method: int = METHOD_HEAD | METHOD_GET):
+    def regular_route(
+        self,
+        ruri: str,
+        method: int = METHOD_HEAD | METHOD_GET,
+        before=(),
+        after=(),
+        max_body_size: Optional[int] = None,
+    ):
         r"""Wraps a function to be a handler for a URI defined by a regular
         expression.
 
@@ -911,10 +1586,15 @@ class Application:
         set_regular_route function. Regular expression routes are checked
         in the same order as they are created in the internal table. The
         first match stops any further searching.
+
+        Handlers from before and after lists are called only for this
+        route, and max_body_size is used only for this route; see
+        Application.route.
         """
 
         def wrapper(fun):
-            self.set_regular_route(ruri, fun, method)
+            self.set_regular_route(ruri, fun, method, before=before,
+                                   after=after, max_body_size=max_body_size)
             return fun
 
         return wrapper
@@ -926,6 +1606,9 @@ class Application:
         method: int = METHOD_HEAD | METHOD_GET,
         converters=(),
         rule: Optional[str] = None,
+        before=(),
+        after=(),
+        max_body_size: Optional[int] = None,
     ):
         r"""Sets a handler for a URI defined by a regular expression.
 
@@ -941,12 +1624,16 @@ class Application:
         This method is used internally when groups are found in a static route,
         added by the route or set_route method.
         """
+        self.__writable()
         r_uri = re.compile(uri, re.U)
         if r_uri not in self.__rhandlers:
             self.__rhandlers[r_uri] = {}
         for val in methods.values():
             if method & val:
                 self.__rhandlers[r_uri][val] = (fun, converters, rule)
+        self.__set_route_hooks(r_uri, method, before, after)
+        self.__set_body_limits(r_uri, method, max_body_size)
+        self.__reset_dispatch()
 
     def pop_regular_route(self, uri: str, method: int):
         """Pops a handler and converters for a URI and method from the handlers
@@ -954,13 +1641,137 @@ class Application:
 
         For more details, see Application.pop_route.
         """
+        self.__writable()
         r_uri = re.compile(uri, re.U)
         handlers = self.__rhandlers.get(r_uri, {})
         rval = handlers.pop(method)
         if not handlers:  # is empty
             self.__rhandlers.pop(r_uri, None)
+        self.__route_hooks.pop((r_uri, method), None)
+        self.__body_limits.pop((r_uri, method), None)
+        self.__reset_dispatch()
         return rval
 
+    def mount(self, prefix: str, app: Callable):
+        """Mounts another application under the path prefix.
+
+        Requests, which path starts with the prefix segments, are passed to
+        the mounted application, before the Request object is created. So
+        the mounted application uses its own routes, handlers and
+        configuration. The prefix is moved from ``PATH_INFO`` to the end of
+        ``SCRIPT_NAME`` as the WSGI specification describes. When more
+        prefixes match the path, the longest one wins.
+
+        .. code:: python
+
+            api = Application("api")
+
+            @api.route("/users")
+            def users(req):     # called for /api/users path
+                ...
+
+            app.mount("/api", api)
+
+        The app could be any WSGI application. The path of request to the
+        prefix itself is empty.
+        """
+        self.__writable()
+        prefix = prefix.rstrip("/")
+        if not prefix.startswith("/"):
+            raise ValueError("Invalid mount prefix '%s'" % prefix)
+        if app is self:
+            raise ValueError("Application can't be mounted to itself")
+        # PATH_INFO is a latin-1 string from WSGI server
+        self.__mounts.add(prefix.encode().decode("iso-8859-1"), app)
+
+    def pop_mount(self, prefix: str):
+        """Removes the mounted application and returns it."""
+        self.__writable()
+        prefix = prefix.rstrip("/")
+        return self.__mounts.pop(prefix.encode().decode("iso-8859-1"))
+
+    def host(self, hostname: str):
+        """Creates a virtual host application for the hostname.
+
+        Returns the new Application object, which is called for requests
+        to the hostname. The same object is returned, and set again if it
+        was popped, when the method is called for the hostname again.
+        Routes of other hosts are never checked for these requests. The
+        virtual host inherits configuration, before and after response
+        handlers, HTTP state handlers and error handlers of this
+        application; its own values and handlers have precedence, and its
+        before and after handlers are called after the inherited ones.
+
+        .. code:: python
+
+            api = app.host("api.example.com")
+
+            @api.route("/users")
+            def users(req):
+                ...
+        """
+        # pylint: disable=protected-access
+        self.__writable()
+        key = hostname.lower().rstrip(".")
+        vhost = self.__vhosts.get(key)
+        if vhost is None:
+            vhost = Application("%s@%s" % (self.__name, key))
+            vhost._inherit(self, self.__config)
+            self.__vhosts[key] = vhost
+        self.set_host(hostname, vhost)
+        return vhost
+
+    def set_host(self, hostname: str, app: Callable):
+        """Sets an application for the virtual host.
+
+        Requests are dispatched by the ``Host`` header without the port
+        (or by ``SERVER_NAME``) before the Request object is created, so the
+        application uses its own routes, handlers and configuration. Unlike
+        Application.host, nothing is inherited from this application.
+        Requests to other hosts are handled by this application. The
+        hostname could start with ``*.`` to match all subdomains, where the
+        longest matching suffix wins and exact hostnames have precedence.
+
+        .. code:: python
+
+            app.set_host("api.example.com", api)
+            app.set_host("*.users.example.com", user_pages)
+        """
+        self.__writable()
+        if app is self:
+            raise ValueError("Application can't be its own virtual host")
+        hostname = hostname.lower().rstrip(".")
+        if hostname.startswith("*."):
+            self.__host_suffixes[hostname[1:]] = app
+        else:
+            self.__hosts[hostname] = app
+
+    def pop_host(self, hostname: str):
+        """Removes the virtual host application and returns it."""
+        self.__writable()
+        hostname = hostname.lower().rstrip(".")
+        if hostname.startswith("*."):
+            return self.__host_suffixes.pop(hostname[1:])
+        return self.__hosts.pop(hostname)
+
+    def __find_host(self, env):
+        """Returns the virtual host application for the request or None."""
+        hostname = env.get("HTTP_HOST") or env.get("SERVER_NAME", "")
+        if hostname.startswith("["):  # IPv6 address
+            hostname = hostname[: hostname.find("]") + 1]
+        else:
+            hostname = hostname.split(":")[0]
+        hostname = hostname.lower().rstrip(".")
+        app = self.__hosts.get(hostname)
+        if app is None and self.__host_suffixes:
+            pos = hostname.find(".")
+            while pos >= 0:
+                app = self.__host_suffixes.get(hostname[pos:])
+                if app is not None:
+                    break
+                pos = hostname.find(".", pos + 1)
+        return app
+
     def is_regular_route(self, r_uri):
         """Checks if a regular expression URI has any registered record."""
         r_uri = re.compile(r_uri, re.U)
@@ -993,11 +1804,13 @@ class Application:
         method: int = METHOD_HEAD | METHOD_GET | METHOD_POST,
     ):
         """Sets a function as the handler for an HTTP state code and method."""
+        self.__writable()
         if status_code not in self.__shandlers:
             self.__shandlers[status_code] = {}
         for val in methods.values():
             if method & val:
                 self.__shandlers[status_code][val] = fun
+        self.__reset_handlers()
 
     def pop_http_state(self, status_code: int, method: int):
         """Pops a handler for an HTTP state and method.
@@ -1005,8 +1818,11 @@ class Application:
         Similar to Application.pop_route, to pop a multi-method handler, you
         must call pop_http_state for each method.
         """
+        self.__writable()
         handlers = self.__shandlers.get(status_code, {})
-        return handlers.pop(method)
+        rval = handlers.pop(method)
+        self.__reset_handlers()
+        return rval
 
     def error_handler(
         self,
@@ -1036,11 +1852,13 @@ class Application:
         method: int = METHOD_HEAD | METHOD_GET | METHOD_POST,
     ):
         """Sets a function as the handler for an exception and method."""
+        self.__writable()
         if error not in self.__ehandlers:
             self.__ehandlers[error] = {}
         for val in methods.values():
             if method & val:
                 self.__ehandlers[error][val] = fun
+        self.__reset_handlers()
 
     def pop_error_handler(self, error: Type[Exception], method: int):
         """Pops a handler for an exception and method.
@@ -1048,21 +1866,52 @@ class Application:
         Similar to Application.pop_route, to pop a multi-method handler,
         you must call pop_error_handler for each method.
         """
+        self.__writable()
         handlers = self.__ehandlers.get(error, {})
-        return handlers.pop(method)
+        rval = handlers.pop(method)
+        self.__reset_handlers()
+        return rval
+
+    def _state_handler(self, status_code: int, method: int):
+        """Returns the user HTTP state handler, including the parent ones."""
+        # pylint: disable=protected-access
+        handler = self.__shandlers.get(status_code, {}).get(method)
+        if handler is None and self.__parent is not None:
+            return self.__parent._state_handler(status_code, method)
+        return handler
+
+    def _error_handler(self, error: Exception, method: int):
+        """Returns the first matching error handler, including parent ones."""
+        # pylint: disable=protected-access
+        for error_type, hdls in self.__ehandlers.items():
+            if isinstance(error, error_type) and method in hdls:
+                return hdls[method]
+        if self.__parent is not None:
+            return self.__parent._error_handler(error, method)
+        return None
 
     def state_from_table(self, req: SimpleRequest, status_code: int, **kwargs):
         """Internal method, which is called if another HTTP state has occurred.
 
         If the status code is in Application.shandlers (filled with the
-        http_state function), this handler is called.
+        http_state function), this handler is called. Found handlers are
+        cached by the status code and the method.
         """
-        if (
-            status_code in self.__shandlers
-            and req.method_number in self.__shandlers[status_code]
-        ):
+        key = (status_code, req.method_number)
+        found = self.__state_cache.get(key)
+        if found is None:
+            handler = self._state_handler(status_code, req.method_number)
+            if handler is not None:
+                found = (handler, True)
+            elif status_code in default_states:
+                found = (default_states[status_code][METHOD_GET], False)
+            else:
+                found = (None, False)
+            self.__state_cache[key] = found
+
+        handler, user = found
+        if user:
             try:
-                handler = self.__shandlers[status_code][req.method_number]
                 req.error_handler = handler
                 return handler(req, **kwargs)
             except HTTPException as http_err:
@@ -1072,21 +1921,24 @@ class Application:
                 return internal_server_error(req)
             except Exception:  # pylint: disable=broad-except
                 return internal_server_error(req)
-        elif status_code in default_states:
-            handler = default_states[status_code][METHOD_GET]
+        elif handler is not None:
             req.error_handler = handler
             return handler(req, **kwargs)
         else:
             return not_implemented(req, status_code)
 
     def error_from_table(self, req: SimpleRequest, error: Exception):
-        """Internal method, which is called when an exception is raised."""
+        """Internal method, which is called when an exception is raised.
 
-        handler = None
-        for error_type, hdls in self.__ehandlers.items():
-            if isinstance(error, error_type) and req.method_number in hdls:
-                handler = hdls[req.method_number]
-                break
+        Handlers are checked in the order they were set, and the found
+        handler is cached by the exception type and the method.
+        """
+        key = (type(error), req.method_number)
+        if key in self.__error_cache:
+            handler = self.__error_cache[key]
+        else:
+            handler = self._error_handler(error, req.method_number)
+            self.__error_cache[key] = handler
 
         if handler:
             try:
@@ -1122,10 +1974,40 @@ class Application:
     def handler_from_before(self, req: SimpleRequest):
         """Internal method, which runs all before (pre_process) handlers.
 
-        This method is called before the endpoint route handler.
+        This method is called before the endpoint route handler. When the
+        route was found, only handlers which belong to it are called.
         """
-        for fun in self.__before:
-            fun(req)
+        hook = self.__before_hook
+        if req.route_hooks is not None:
+            hook = req.route_hooks[0]
+        if hook is not None:
+            hook(req)
+
+    def max_body_size_from_table(self, req: SimpleRequest):
+        """Returns the request body size limit for the request.
+
+        It is max_body_size of the route, when it was set, or
+        Application.max_body_size. Regular routes are resolved only when
+        some of them have their own limit, and the found route is stored
+        to req.route, so handler_from_table does not resolve it again.
+        """
+        if self.__body_limits:
+            if req.path in self.__handlers:
+                key = req.path
+            else:
+                req.route = self.__find_route(req)
+                key = req.route[0] if req.route else None
+            if (key, req.method_number) in self.__body_limits:
+                return self.__body_limits[(key, req.method_number)]
+        return self.config.max_body_size
+
+    def __find_route(self, req: SimpleRequest):
+        """Returns the regular route for the request, or empty tuple."""
+        if req.route is not None:
+            return req.route
+        if self.__resolve is None:
+            self.__resolve = self.__make_resolve()
+        return self.__resolve(req.path, req.method_number) or ()
 
     def handler_from_table(self, req: Request):  # noqa: C901
         """Calls the correct handler from the handlers table (populated
@@ -1144,34 +2026,32 @@ class Application:
                 handler = self.__handlers[req.path][req.method_number]
                 req.uri_rule = req.path  # nice variable for before handlers
                 req.uri_handler = handler
+                req.route_hooks = self.__route_hook(
+                    req.path, req.method_number
+                )
                 self.handler_from_before(req)  # call before handlers now
                 return handler(req)  # call right handler now
 
             self.handler_from_before(req)  # call before handlers now
-            raise HTTPException(HTTP_METHOD_NOT_ALLOWED)
+            response = to_response(
+                self.state_from_table(req, HTTP_METHOD_NOT_ALLOWED)
+            )
+            if response.status_code == HTTP_METHOD_NOT_ALLOWED:
+                response.headers.setdefault(
+                    "Allow", self.__allow_header(req.path)
+                )
+            raise HTTPException(response)
 
         # regular expression
-        for ruri in self.__rhandlers:
-            match = ruri.match(req.path)
-            if match and req.method_number in self.__rhandlers[ruri]:
-                handler, converters, rule = self.__rhandlers[ruri][
-                    req.method_number
-                ]
-                req.uri_rule = rule or ruri.pattern
-                req.uri_handler = handler
-                if converters:
-                    # create OrderedDict from match inside of dict for
-                    # converters applying
-                    req.path_args = OrderedDict(
-                        (g, c(v))
-                        for ((g, c), v) in zip(converters, match.groups())
-                    )
-                    self.handler_from_before(req)  # call before handlers now
-                    return handler(req, *req.path_args.values())
-
-                req.path_args = match.groupdict()
-                self.handler_from_before(req)  # call before handlers now
-                return handler(req, *match.groups())
+        found = self.__find_route(req)
+        if found:
+            ruri, handler, rule, path_args, args = found
+            req.uri_rule = rule
+            req.uri_handler = handler
+            req.path_args = path_args
+            req.route_hooks = self.__route_hook(ruri, req.method_number)
+            self.handler_from_before(req)  # call before handlers now
+            return handler(req, *args)
 
         # try file or index
         if req.document_root and req.method_number & (
@@ -1272,20 +2152,18 @@ class Application:
                 log.error("Bad returned value from %s", request.error_handler)
                 response = internal_server_error(request)
 
-        __fn = None
-        try:  # call post_process handler
-            for fun in self.__after:
-                __fn = fun
-                response = to_response(fun(request, response))
-        except BaseException as err:  # pylint: disable=broad-except
-            log.error(
-                "Handler %s from %s returns invalid data or crashed",
-                __fn,
-                __fn.__module__,
-            )
-            response = self.error_from_table(request, err)
-            if not response:
-                response = to_response(self.state_from_table(request, 500))
+        hook = self.__after_hook
+        if request.route_hooks is not None:
+            hook = request.route_hooks[1]
+        if hook is not None:
+            try:  # call post_process handler
+                response = hook(request, response)
+            except BaseException as err:  # pylint: disable=broad-except
+                response = self.error_from_table(request, err)
+                if not response:
+                    response = to_response(
+                        self.state_from_table(request, 500)
+                    )
 
         skip_sendfile = request.server_software == "uWsgi" and response.ranges
         # need working fileno method
@@ -1295,17 +2173,35 @@ class Application:
                 and "wsgi.file_wrapper" in env
                 and not skip_sendfile
             ):
-                return env["wsgi.file_wrapper"](response(start_response))
-            return response(start_response)  # return bytes generator
+                result = env["wsgi.file_wrapper"](response(start_response))
+            else:
+                result = response(start_response)  # return bytes generator
         except HTTPException as http_err:  # HTTP_RANGE_NOT_SATISFIABLE case
             response = http_err.make_response()
-            return response(start_response)
+            result = response(start_response)
+        if isinstance(request, Request) and self.config.spool_body:
+            # spooled body is closed after the response is sent
+            return _Closing(result, request.close)
+        return result
 
     def __call__(self, env, start_response):
         """Callable defined for the Application instance.
 
-        This method runs the __request__ method.
+        This method runs the __request__ method, the virtual host
+        application, or the mounted application if the request path starts
+        with its prefix.
         """
+        if self.__hosts or self.__host_suffixes:
+            app = self.__find_host(env)
+            if app is not None:
+                return app(env, start_response)
+        if self.__mounts:
+            found = self.__mounts.find(env.get("PATH_INFO") or "")
+            if found is not None:
+                prefix, app = found
+                env["SCRIPT_NAME"] = env.get("SCRIPT_NAME", "") + prefix
+                env["PATH_INFO"] = env["PATH_INFO"][len(prefix):]
+                return app(env, start_response)
         return self.__request__(env, start_response)
 
     def __profile_request__(self, env, start_response):
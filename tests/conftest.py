@@ -0,0 +1,42 @@
+"""Common fixtures and helpers for Application tests."""
+from io import BytesIO
+from itertools import count
+from time import time
+
+from pytest import fixture
+
+from poorwsgi.wsgi import Application
+
+# pylint: disable=missing-function-docstring
+
+APP_COUNTER = count()
+
+
+@fixture
+def app():
+    """New Application with unique name for each test."""
+    return Application(f"test_app_{next(APP_COUNTER)}")
+
+
+def call(app, path, method="GET", **kwargs):
+    """Calls the application and returns status, headers and body."""
+    env = {
+        "PATH_INFO": path,
+        "REQUEST_METHOD": method,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": BytesIO(),
+        "wsgi.errors": BytesIO(),
+        "REQUEST_STARTTIME": time(),
+    }
+    env.update(kwargs)
+    response = []
+
+    def start_response(status, headers):
+        response.append(status[:3])
+        response.append(dict(headers))
+
+    body = b"".join(app(env, start_response))
+    return response[0], response[1], body.decode()
@@ -0,0 +1,484 @@
+"""Tests for Application dispatching features."""
+from io import BytesIO
+
+from pytest import raises
+
+from poorwsgi.response import make_response
+from poorwsgi.state import METHOD_GET, METHOD_POST
+from poorwsgi.wsgi import Application, Config, compose_after, compose_before
+
+from .conftest import APP_COUNTER, call
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=redefined-outer-name
+
+
+class TestCompose:
+    """Tests for composing before and after handlers."""
+
+    def test_before(self):
+        calls = []
+        assert compose_before(()) is None
+        one = calls.append
+        assert compose_before((one,)) is one
+        compose_before((one, one))("req")
+        assert calls == ["req", "req"]
+
+    def test_after(self):
+        assert compose_after(()) is None
+
+        def first(req, res):
+            return res + "a"
+
+        def second(req, res):
+            res.add_header("X-Second", "b")
+            return res
+
+        response = compose_after((first, second))(None, "x")
+        assert response.data == b"xa"
+        assert response.headers["X-Second"] == "b"
+
+
+class TestFreeze:
+    """Tests for the Application.freeze method."""
+
+    def test_config_snapshot(self, app):
+        app.data_size = 10
+        assert app.config is app
+        app.freeze()
+        assert app.frozen
+        assert isinstance(app.config, Config)
+        assert app.config.data_size == 10
+        assert "application/json" in app.config.json_mime_types
+        with raises(AttributeError):
+            app.config.data_size = 5
+
+    def test_poor_debug(self, app, monkeypatch):
+        monkeypatch.setenv("poor_Debug", "On")
+        app.freeze()
+        assert app.config.debug is True
+        assert app.debug is False
+
+    def test_read_only(self, app):
+        app.freeze()
+        with raises(RuntimeError):
+            app.set_route("/", lambda _req: "")
+        with raises(RuntimeError):
+            app.set_route("/<id:int>", lambda _req, _id: "")
+        with raises(RuntimeError):
+            app.add_before_response(lambda _req: None)
+        with raises(RuntimeError):
+            app.debug = True
+        with raises(RuntimeError):
+            app.set_filter("any", r".*")
+
+    def test_dispatch(self, app):
+        calls = []
+
+        @app.route("/item/<id:int>")
+        def item(req, id_):
+            return str(id_)
+
+        app.add_before_response(lambda _req: calls.append("before"))
+
+        @app.after_response()
+        def after(req, res):
+            calls.append("after")
+            return res
+
+        app.freeze()
+        app.freeze()  # second call does nothing
+        status, _, body = call(app, "/item/3")
+        assert (status, body) == ("200", "3")
+        assert calls == ["before", "after"]
+
+    def test_method_not_allowed(self, app):
+        app.set_route("/item", lambda _req: "", METHOD_GET | METHOD_POST)
+        app.freeze()
+        status, headers, _ = call(app, "/item", "PUT")
+        assert status == "405"
+        assert headers["Allow"] == "GET, POST"
+
+
+class TestHooks:
+    """Tests for before and after response handlers."""
+
+    def test_pop_after_response(self, app):
+        def after(req, res):
+            return res
+
+        app.add_after_response(after)
+        app.pop_after_response(after)
+        assert not app.after
+        with raises(ValueError):
+            app.pop_after_response(after)
+
+    def test_after_crash(self, app):
+        app.set_route("/", lambda _req: "ok")
+
+        @app.after_response()
+        def after(req, res):
+            raise RuntimeError("crash")
+
+        assert call(app, "/")[0] == "500"
+
+    def test_prefix(self, app):
+        calls = []
+        app.set_route("/api/item", lambda _req: "item")
+        app.set_route("/api/<id:int>", lambda _req, _id: "id")
+        app.set_route("/<name>", lambda _req, _name: "name")
+        app.set_route("/health", lambda _req: "ok")
+        app.add_before_response(lambda _req: calls.append("api"), "/api/")
+        app.add_before_response(lambda _req: calls.append("all"))
+
+        @app.after_response(prefix="/api")
+        def after(req, res):
+            calls.append("after")
+            return res
+
+        assert call(app, "/health")[2] == "ok"
+        assert calls == ["all"]
+        calls.clear()
+        assert call(app, "/api/item")[2] == "item"
+        assert call(app, "/api/1")[2] == "id"
+        assert calls == ["api", "all", "after"] * 2
+        calls.clear()
+        assert call(app, "/apidoc")[2] == "name"  # checked at runtime
+        assert calls == ["all"]
+        calls.clear()
+        assert call(app, "/api")[2] == "name"
+        assert calls == ["api", "all", "after"]
+
+    def test_prefix_segment(self, app):
+        calls = []
+        app.set_route("/api", lambda _req: "api")
+        app.set_route("/apiv2", lambda _req: "v2")
+        app.set_route("/apiv2/<id:int>", lambda _req, _id: "v2 id")
+        app.add_before_response(lambda req: calls.append(req.path), "/api")
+        assert call(app, "/apiv2")[2] == "v2"
+        assert call(app, "/apiv2/1")[2] == "v2 id"
+        assert not calls
+        assert call(app, "/api")[2] == "api"
+        assert calls == ["/api"]
+
+    def test_route(self, app):
+        calls = []
+
+        def before(req):
+            calls.append(req.uri_rule)
+
+        def after(req, res):
+            res.add_header("X-Route", "yes")
+            return res
+
+        @app.route("/item/<id:int>", before=[before], after=[after])
+        def item(req, id_):
+            return str(id_)
+
+        app.set_route("/static", lambda _req: "static", before=[before])
+        app.set_route("/other", lambda _req: "other")
+        _, headers, body = call(app, "/item/3")
+        assert body == "3"
+        assert headers["X-Route"] == "yes"
+        assert call(app, "/static")[2] == "static"
+        assert calls == ["/item/<id:int>", "/static"]
+        assert "X-Route" not in call(app, "/other")[1]
+        assert calls == ["/item/<id:int>", "/static"]
+
+        app.set_route("/static", lambda _req: "new")  # without handlers
+        assert call(app, "/static")[2] == "new"
+        assert len(calls) == 2
+
+    def test_route_error(self, app):
+        def after(req, res):
+            res.add_header("X-Route", "yes")
+            return res
+
+        @app.route("/", after=[after])
+        def crash(req):
+            raise RuntimeError("crash")
+
+        status, headers, _ = call(app, "/")
+        assert status == "500"
+        assert headers["X-Route"] == "yes"
+
+    def test_freeze(self, app):
+        calls = []
+        app.set_regular_route(r"/(?P<name>\w+)$", lambda _req, name: name,
+                              before=[lambda _req: calls.append("route")])
+        app.add_before_response(lambda _req: calls.append("api"), "/api")
+        app.freeze()
+        assert call(app, "/api")[2] == "api"
+        assert call(app, "/x")[2] == "x"
+        assert calls == ["api", "route", "route"]
+
+
+class TestMount:
+    """Tests for mounted applications."""
+
+    def test_dispatch(self, app):
+        api = Application(f"test_application_mount_{next(APP_COUNTER)}")
+        app.set_route("/api", lambda _req: "parent")
+        app.set_route("/apidoc", lambda _req: "doc")
+
+        @api.route("/users")
+        def users(req):
+            return "%s %s" % (req.environ["SCRIPT_NAME"], req.path)
+
+        app.mount("/api/", api)
+        assert app.mounts == {"/api": api}
+        assert call(app, "/api/users", SCRIPT_NAME="/root")[2] == \
+            "/root/api /users"
+        assert call(app, "/apidoc")[2] == "doc"
+        assert call(app, "/api")[0] == "404"  # empty path in api
+
+        assert app.pop_mount("/api") is api
+        assert call(app, "/api")[2] == "parent"
+
+    def test_longest_prefix(self, app):
+        def wsgi(name):
+            def application(env, start_response):
+                start_response("200 OK", [])
+                return [("%s:%s" % (name, env["PATH_INFO"])).encode()]
+            return application
+
+        app.mount("/a", wsgi("a"))
+        app.mount("/a/b", wsgi("b"))
+        assert call(app, "/a/b/c")[2] == "b:/c"
+        assert call(app, "/a/bc")[2] == "a:/bc"
+
+    def test_invalid(self, app):
+        with raises(ValueError):
+            app.mount("/", lambda _env, _start_response: [])
+        with raises(ValueError):
+            app.mount("api", lambda _env, _start_response: [])
+        with raises(ValueError):
+            app.mount("/self", app)
+        with raises(KeyError):
+            app.pop_mount("/api")
+
+    def test_freeze(self, app):
+        api = Application(f"test_application_mount_{next(APP_COUNTER)}")
+        app.mount("/api", api)
+        app.freeze()
+        assert api.frozen
+        with raises(RuntimeError):
+            app.mount("/other", api)
+
+
+class TestHost:
+    """Tests for virtual host applications."""
+
+    def test_dispatch(self, app):
+        app.set_route("/", lambda _req: "default")
+        api = app.host("api.example.com")
+        api.set_route("/", lambda _req: "api")
+        app.set_route("/", lambda _req: "users", host="*.users.example.com")
+
+        assert call(app, "/", HTTP_HOST="API.example.com:8080")[2] == "api"
+        assert call(app, "/", HTTP_HOST="a.users.example.com")[2] == "users"
+        assert call(app, "/", HTTP_HOST="a.b.users.example.com")[2] == \
+            "users"
+        assert call(app, "/", HTTP_HOST="users.example.com")[2] == "default"
+        assert call(app, "/")[2] == "default"
+        assert set(app.hosts) == {"api.example.com", "*.users.example.com"}
+
+    def test_longest_suffix(self, app):
+        app.set_route("/", lambda _req: "short", host="*.example.com")
+        app.set_route("/", lambda _req: "long", host="*.b.example.com")
+        app.set_route("/", lambda _req: "exact", host="a.b.example.com")
+        assert call(app, "/", HTTP_HOST="x.b.example.com")[2] == "long"
+        assert call(app, "/", HTTP_HOST="x.example.com")[2] == "short"
+        assert call(app, "/", HTTP_HOST="a.b.example.com")[2] == "exact"
+
+    def test_pop_host(self, app):
+        app.set_route("/", lambda _req: "default")
+        vhost = app.host("*.example.com")
+        vhost.set_route("/", lambda _req: "vhost")
+        assert app.pop_host("*.example.com") is vhost
+        assert call(app, "/", HTTP_HOST="a.example.com")[2] == "default"
+        with raises(KeyError):
+            app.pop_host("a.example.com")
+
+    def test_not_application(self, app):
+        app.set_host("example.com", lambda _env, _start_response: [])
+        with raises(ValueError):
+            app.set_route("/", lambda _req: "", host="example.com")
+        with raises(ValueError):
+            app.set_host("example.net", app)
+
+    def test_host_again(self, app):
+        api = app.host("api.example.com")
+        assert app.host("API.example.com") is api
+        assert app.pop_host("api.example.com") is api
+        assert app.host("api.example.com") is api
+        assert app.hosts["api.example.com"] is api
+
+    def test_host_frozen(self, app):
+        app.freeze()
+        with raises(RuntimeError):
+            app.host("api.example.com")
+        assert not app.hosts
+        Application(f"{app.name}@api.example.com")  # name is still free
+
+    def test_ipv6(self, app):
+        app.set_route("/", lambda _req: "default")
+        app.set_route("/", lambda _req: "local", host="[::1]")
+        assert call(app, "/", HTTP_HOST="[::1]:8080")[2] == "local"
+        assert call(app, "/", HTTP_HOST="[::1]")[2] == "local"
+        assert call(app, "/", HTTP_HOST="[::2]:8080")[2] == "default"
+
+    def test_inherit_config(self, app):
+        app.secret_key = "secret"
+        app.auto_form = False
+        api = app.host("api.example.com")
+        assert api.secret_key == "secret"
+        assert api.auto_form is False
+        api.auto_form = True
+        assert api.auto_form is True
+        assert app.auto_form is False
+        app.auth_type = "Digest"
+        app.auth_algorithm = "SHA-256"
+        assert api.auth_algorithm == "SHA-256"
+        assert api.auth_hash is app.auth_hash
+
+    def test_inherit_hooks(self, app):
+        calls = []
+        app.before_response()(lambda _req: calls.append("app"))
+        api = app.host("api.example.com")
+        api.before_response()(lambda _req: calls.append("api"))
+        api.set_route("/", lambda _req: "api")
+        call(app, "/", HTTP_HOST="api.example.com")
+        assert calls == ["app", "api"]
+
+        app.after_response()(lambda _req, res: calls.append("after") or res)
+        calls.clear()
+        call(app, "/", HTTP_HOST="api.example.com")
+        assert calls == ["app", "api", "after"]
+
+    def test_inherit_handlers(self, app):
+        api = app.host("api.example.com")
+        api.set_route("/", lambda _req: int("x"))
+        assert call(app, "/", HTTP_HOST="api.example.com")[0] == "500"
+        app.set_error_handler(ValueError,
+                              lambda _req, _err: make_response("value"))
+        app.set_http_state(
+            404, lambda _req: make_response("none", status_code=404)
+        )
+        assert call(app, "/", HTTP_HOST="api.example.com")[2] == "value"
+        assert call(app, "/x", HTTP_HOST="api.example.com")[2] == "none"
+        api.set_http_state(
+            404, lambda _req: make_response("api", status_code=404)
+        )
+        assert call(app, "/x", HTTP_HOST="api.example.com")[2] == "api"
+
+
+class TestErrorHandlers:
+    """Tests for error and state handlers resolution."""
+
+    def test_order(self, app):
+        app.set_route("/", lambda _req: int("x"))
+        app.set_error_handler(Exception,
+                              lambda _req, _err: make_response("exception"))
+        app.set_error_handler(ValueError,
+                              lambda _req, _err: make_response("value"))
+        assert call(app, "/")[2] == "exception"  # first set wins
+        assert call(app, "/")[2] == "exception"
+
+        app.pop_error_handler(Exception, METHOD_GET)
+        assert call(app, "/")[2] == "value"
+        app.pop_error_handler(ValueError, METHOD_GET)
+        assert call(app, "/")[0] == "500"
+
+    def test_state(self, app):
+        app.set_route("/", lambda _req: "", METHOD_POST)
+        assert call(app, "/")[0] == "405"
+        app.set_http_state(405, lambda _req: "own")
+        assert call(app, "/")[2] == "own"
+        app.pop_http_state(405, METHOD_GET)
+        assert call(app, "/")[0] == "405"
+
+
+class Untouchable:
+    """wsgi.input, which must not be read."""
+
+    def read(self, *_):
+        raise AssertionError("wsgi.input was read")
+
+    readline = read1 = read
+
+
+def post(app, path, body, **kwargs):
+    return call(app, path, "POST", CONTENT_LENGTH=str(len(body)),
+                CONTENT_TYPE="application/octet-stream",
+                **{"wsgi.input": BytesIO(body)}, **kwargs)
+
+
+class TestMaxBodySize:
+    """Tests for the request body size limit."""
+
+    def test_global(self, app):
+        app.max_body_size = 4
+        app.set_route("/", lambda req: req.data, METHOD_POST)
+        assert post(app, "/", b"1234")[2] == "1234"
+        assert call(app, "/", "POST", CONTENT_LENGTH="5",
+                    **{"wsgi.input": Untouchable()})[0] == "413"
+
+    def test_route(self, app):
+        app.max_body_size = 4
+        app.set_route("/big", lambda req: req.data, METHOD_POST,
+                      max_body_size=8)
+        app.set_route("/<x:int>", lambda req, _x: req.data, METHOD_POST,
+                      max_body_size=2)
+        app.set_route("/small", lambda req: req.data, METHOD_POST)
+        assert post(app, "/big", b"12345678")[0] == "200"
+        assert post(app, "/big", b"123456789")[0] == "413"
+        assert post(app, "/1", b"12")[0] == "200"
+        assert post(app, "/1", b"123")[0] == "413"
+        assert post(app, "/small", b"12345")[0] == "413"
+        assert post(app, "/none", b"12345")[0] == "413"
+
+        app.pop_route("/big", METHOD_POST)
+        app.set_route("/big", lambda req: req.data, METHOD_POST)
+        assert post(app, "/big", b"12345")[0] == "413"
+
+    def test_resolved_once(self, app):
+        calls = []
+
+        def convert(value):
+            calls.append(value)
+            return int(value)
+
+        app.dispatch_cache_size = 4
+        app.set_filter("count", r"\d+", convert)
+        app.set_route("/<x:count>", lambda req, _x: req.data, METHOD_POST,
+                      max_body_size=2)
+        app.set_regular_route(r"/r/(?P<x>\w+)$", lambda req, _x: req.data,
+                              METHOD_POST, max_body_size=2)
+        assert post(app, "/1", b"12")[0] == "200"
+        assert calls == ["1"]
+        assert post(app, "/r/x", b"12")[0] == "200"
+        assert [stats.hits for stats in app.route_stats.values()] == [1, 1]
+        assert app.dispatch_cache_info.hits == 0
+
+    def test_chunked(self, app):
+        app.max_body_size = 4
+        app.set_route("/", lambda req: req.read(), METHOD_POST)
+        env = {"HTTP_TRANSFER_ENCODING": "chunked"}
+        body = b"3\r\nabc\r\n1\r\nd\r\n0\r\n\r\n"
+        assert call(app, "/", "POST", **env,
+                    **{"wsgi.input": BytesIO(body)})[2] == "abcd"
+        body = b"3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n"
+        assert call(app, "/", "POST", **env,
+                    **{"wsgi.input": BytesIO(body)})[0] == "413"
+        body = b"0x3\r\nabc\r\n0\r\n\r\n"
+        assert call(app, "/", "POST", **env,
+                    **{"wsgi.input": BytesIO(body)})[0] == "400"
+
+    def test_frozen(self, app):
+        app.max_body_size = "10"
+        assert app.max_body_size == 10
+        app.freeze()
+        assert app.config.max_body_size == 10
+        with raises(RuntimeError):
+            app.max_body_size = None
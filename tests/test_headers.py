@@ -1,14 +1,21 @@
 """Unit tests for poorwsgi/headers.py module-level functions and Headers."""
 from datetime import datetime, timezone
 
-from pytest import raises
+from pytest import mark, raises
 
 from poorwsgi.headers import (
     ContentRange,
+    EnvironHeaders,
     Headers,
+    RequestCookies,
+    cached_header,
+    cached_negotiation,
     datetime_to_http,
+    environ_key,
+    header_name,
     http_to_datetime,
     http_to_time,
+    negotiate,
     parse_header,
     parse_negotiation,
     parse_range,
@@ -49,6 +56,26 @@ class TestParseHeader:
         assert params["name"] == "a;b"
 
 
+class TestCachedHeader:
+    """Tests for cached_header()."""
+
+    @mark.parametrize("line", (
+        "", "text/html", " text/html ; CHARSET = utf-8 ", "text/plain; x",
+        'form-data; name="a;b"; filename="x.txt"', "a; b=1; c=2",
+    ))
+    def test_same_as_parse_header(self, line):
+        key, params = parse_header(line)
+        assert cached_header(line) == (key, params)
+
+    def test_read_only(self):
+        line = "application/json; charset=utf-8"
+        assert cached_header(line) is cached_header(line)
+        with raises(TypeError):
+            cached_header(line)[1]["charset"] = "latin-1"  # type: ignore
+        with raises(TypeError):
+            cached_header("text/plain")[1]["x"] = "y"  # type: ignore
+
+
 class TestParseNegotiation:
     """Tests for parse_negotiation()."""
 
@@ -70,6 +97,47 @@ class TestParseNegotiation:
         result = parse_negotiation("br;q=bad")
         assert result == [("br", 1.0)]
 
+    def test_whitespace_and_params(self):
+        result = parse_negotiation(
+            "application/json; q=0.9, text/html ; level=1 ;Q = 0.5 ;ext=1, "
+            "text/plain ;charset=utf-8")
+        assert result == [("application/json", 0.9),
+                          ("text/html;level=1", 0.5),
+                          ("text/plain;charset=utf-8", 1.0)]
+
+
+class TestNegotiate:
+    """Tests for cached_negotiation() and negotiate()."""
+
+    def test_cached(self):
+        value = "gzip, br;q=0.5"
+        assert cached_negotiation(value) == (("gzip", 1.0), ("br", 0.5))
+        assert cached_negotiation(value) is cached_negotiation(value)
+
+    def test_specificity(self):
+        value = "text/*;q=0.3, text/html;q=0.7, */*;q=0.5"
+        assert negotiate(value, ("text/plain", "text/html")) == "text/html"
+        assert negotiate(value, ("image/png", "text/plain")) == "image/png"
+        assert negotiate(value, ("text/plain",)) == "text/plain"
+
+    def test_order_and_case(self):
+        assert negotiate("A, B", ("b", "a")) == "b"
+        assert negotiate("br;q=0.5, GZIP", ("br", "gzip")) == "gzip"
+
+    def test_whitespace(self):
+        value = "application/json; q=0.9, text/html"
+        assert negotiate(value, ("application/json", "text/html")) == \
+            "text/html"
+        assert negotiate("gzip; q=0, br", ("gzip", "br")) == "br"
+
+    def test_not_acceptable(self):
+        assert negotiate("cs, *;q=0", ("en", "de")) is None
+        assert negotiate("cs", ()) is None
+
+    def test_empty(self):
+        assert negotiate("", ("en", "cs")) == "en"
+        assert negotiate(" ", ()) is None
+
 
 class TestRenderNegotiation:
     """Tests for render_negotiation()."""
@@ -240,3 +308,86 @@ class TestHeadersMethods:
         pairs = [("X-A", "1"), ("X-B", "2")]
         headers = Headers(pairs)
         assert list(headers) == pairs
+
+
+class TestEnvironHeaders:
+    """Tests for EnvironHeaders view and name translation."""
+
+    ENVIRON = {
+        "PATH_INFO": "/",
+        "CONTENT_TYPE": "text/plain",
+        "HTTP_X_FORWARDED_FOR": "127.0.0.1",
+        "HTTP_COOKIE": "a=1",
+    }
+
+    def test_translation(self):
+        assert header_name("HTTP_X_FORWARDED_FOR") == "X-Forwarded-For"
+        assert header_name("CONTENT_LENGTH") == "Content-Length"
+        assert header_name("SERVER_NAME") is None
+        assert environ_key("x-forwarded-for") == "HTTP_X_FORWARDED_FOR"
+        assert environ_key("Content-Type") == "CONTENT_TYPE"
+        assert environ_key("X_Test") is None
+
+    def test_lookup(self):
+        headers = EnvironHeaders(self.ENVIRON)
+        assert headers["Content-Type"] == "text/plain"
+        assert headers["x-forwarded-for"] == "127.0.0.1"
+        assert "Cookie" in headers
+        assert "Path-Info" not in headers
+        assert headers.get("X-Missing") is None
+        assert headers.get_all("Cookie") == ("a=1",)
+        assert not headers.get_all("X-Missing")
+        with raises(KeyError):
+            headers["X-Missing"]  # pylint: disable=pointless-statement
+
+    def test_iteration(self):
+        headers = EnvironHeaders(self.ENVIRON)
+        assert len(headers) == 3
+        assert headers.names() == ("Content-Type", "X-Forwarded-For",
+                                   "Cookie")
+        assert headers.items()[0] == ("Content-Type", "text/plain")
+        assert "Cookie" in repr(headers)
+
+    def test_prefixed_content(self):
+        headers = EnvironHeaders({"HTTP_CONTENT_TYPE": "text/html"})
+        assert headers["Content-Type"] == "text/html"
+
+    def test_read_only(self):
+        headers = EnvironHeaders(self.ENVIRON)
+        with raises(TypeError):
+            headers["X-Test"] = "value"
+        with raises(TypeError):
+            del headers["Cookie"]
+        with raises(TypeError):
+            headers.add_header("X-Test", "value")
+
+
+class TestRequestCookies:
+    """Tests for the RequestCookies mapping."""
+
+    def test_values(self):
+        cookies = RequestCookies(
+            'a=1; b="x\\"y"; a=2; Path=/; $Domain=x; empty=; bad; c d=3')
+        assert list(cookies) == ['a', 'b', 'empty']
+        assert len(cookies) == 3
+        assert dict(cookies)['a'].value == '2'
+        assert cookies['a'].value == '2'
+        assert cookies['b'].value == 'x"y'
+        assert cookies['b'].coded_value == '"x\\"y"'
+        assert cookies['empty'].value == ''
+        assert cookies['a'] is cookies['a']
+        assert 'Path' not in cookies
+        assert 'c d' not in cookies     # illegal name
+        with raises(KeyError):
+            cookies['bad']
+
+    def test_quoted(self):
+        cookies = RequestCookies('a="x;y=\\";z"; b=1;c="d')
+        assert list(cookies) == ['a', 'b', 'c']
+        assert cookies['a'].value == 'x;y=";z'
+        assert cookies['b'].value == '1'
+
+    def test_read_only(self):
+        cookies = RequestCookies('a=1')
+        with raises(TypeError):
+            cookies['a'] = 2  # type: ignore[index]
@@ -0,0 +1,98 @@
+"""Tests for JSON codecs."""
+from json import loads
+
+from pytest import fixture, importorskip, raises
+
+from poorwsgi.json_codec import (
+    IterableEncoder,
+    JSONCodec,
+    get_codec,
+    load_codec,
+    set_codec,
+)
+from poorwsgi.request import JsonDict, parse_json_request
+from poorwsgi.response import JSONGeneratorResponse, JSONResponse
+
+# pylint: disable=missing-function-docstring
+# pylint: disable=redefined-outer-name
+# pylint: disable=unused-argument
+
+
+@fixture
+def codec():
+    """Restores the default codec after the test."""
+    default = get_codec()
+    yield default
+    set_codec(default)
+
+
+class TestCodec:
+    """Tests for codec selection."""
+
+    def test_default(self):
+        assert get_codec().name == "json"
+        assert get_codec().dumps({"a": 1}) == b'{"a": 1}'
+
+    def test_unknown(self):
+        with raises(ValueError):
+            load_codec("yaml")
+
+    def test_auto(self):
+        assert load_codec("auto").name in ("orjson", "ujson", "simplejson",
+                                           "json")
+
+    def test_orjson(self, codec):
+        importorskip("orjson")
+        set_codec("orjson")
+        assert JSONResponse(key="value").data == b'{"key":"value"}'
+        data = parse_json_request(b'{"key": "\xc4\x8d"}')
+        assert isinstance(data, JsonDict)
+        assert data == {"key": "č"}
+
+    def test_own(self, codec):
+        calls = []
+
+        def dumps(obj, **kwargs):
+            calls.append(obj)
+            return b"null"
+
+        set_codec(JSONCodec("own", loads, dumps))
+        assert JSONResponse([1]).data == b"null"
+        assert calls == [[1]]
+
+    def test_charset(self):
+        raw = '{"key": "č"}'.encode("iso-8859-2")
+        assert parse_json_request(raw, "iso-8859-2") == {"key": "č"}
+
+    def test_kwargs(self, codec):
+        def dumps(obj):
+            return b"null"
+
+        set_codec(JSONCodec("own", loads, dumps))
+        assert JSONResponse([1]).data == b"null"
+        res = JSONResponse([1], encoder_kwargs={"indent": 1})
+        assert res.data == b"[\n 1\n]"
+
+    def test_orjson_kwargs(self, codec):
+        importorskip("orjson")
+        set_codec("orjson")
+        res = JSONResponse(b=1, a=2, encoder_kwargs={"sort_keys": True})
+        assert res.data == b'{"a": 2, "b": 1}'
+
+
+class TestIterableEncoder:
+    """Tests for serialization of iterables."""
+
+    def test_generators(self):
+        data = {"x": (i for i in range(2)), "y": [iter(()), range(1)]}
+        assert "".join(IterableEncoder().iterencode(data)) == \
+            '{"x": [0, 1], "y": [[], [0]]}'
+
+    def test_not_serializable(self):
+        with raises(TypeError):
+            "".join(IterableEncoder().iterencode({"x": object()}))
+
+    def test_response(self):
+        res = JSONGeneratorResponse(items=(str(i) for i in range(3)))
+        data = b"".join(res(lambda *_: None))
+        assert loads(data) == {"items": ["0", "1", "2"]}
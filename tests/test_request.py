@@ -4,17 +4,19 @@ import warnings
 from io import BytesIO
 from time import time
 from typing import Any, ClassVar
+from urllib.parse import parse_qs
 
-from pytest import fixture, raises
+from pytest import fixture, mark, raises
 
 from poorwsgi import Application
 from poorwsgi.fieldstorage import FieldStorage, FieldStorageParser
 from poorwsgi.headers import Headers
-from poorwsgi.request import (Args, CachedInput, EmptyForm,
+from poorwsgi.request import (Args, CachedInput, ChunkedInput, EmptyForm,
                               FieldStorage as DeprecatedFieldStorage,
                               JsonDict, JsonList, Request, SimpleRequest,
-                              parse_json_request)
-from poorwsgi.response import HTTPException
+                              iter_json_request, iter_ndjson_request,
+                              parse_json_request, parse_query)
+from poorwsgi.response import FileObjResponse, HTTPException
 from poorwsgi.state import methods
 
 # pylint: disable=missing-function-docstring
@@ -97,6 +99,30 @@ class TestArgs:
         assert not tuple(args.getlist("values"))
         assert args.get("no") is None
 
+    def test_values(self):
+        """Tests single and multiple values with unquoting."""
+        req = self.Req()
+        req.query = 'a=1&b=x+y&a=%C4%8D&a=3&c=&d'
+        args = Args(req)
+        assert args == {'a': ['1', 'č', '3'], 'b': 'x y'}
+        assert args.getfirst('a', func=int) == 1
+        assert args.getlist('b') == ['x y']
+        assert Args(req, keep_blank_values=1)['c'] == ''
+
+    @mark.parametrize('query', (
+        'a=1&a=2&a', '&&a%20b=%2B+&', 'x=%zz&y=%41%', '=1&a==',
+    ))
+    def test_parse_qs(self, query):
+        """parse_query returns the same values as parse_qs."""
+        for blank in (0, 1):
+            expected = {key: val[0] if len(val) == 1 else val
+                        for key, val in parse_qs(query, blank).items()}
+            assert parse_query(query, blank) == expected
+
+    def test_strict(self):
+        with raises(ValueError):
+            parse_query('a=1&b', strict_parsing=1)
+
 
 class Empty:
     """A mock Empty Request class."""
@@ -480,6 +506,17 @@ class TestSimpleRequest:
         req = SimpleRequest(env, app)
         assert req.debug == app.debug
 
+    def test_debug_from_frozen_config(self, monkeypatch):
+        """The process poor_Debug is read once by Application.freeze."""
+        app = Application(__name__ + "_debug")
+        monkeypatch.setenv('poor.Version', 'test')
+        monkeypatch.setenv('poor_Debug', 'On')
+        app.freeze()
+        monkeypatch.setenv('poor_Debug', 'Off')
+        assert SimpleRequest(_make_env(), app).debug is True
+        env = _make_env(poor_Debug='off')
+        assert SimpleRequest(env, app).debug is False
+
     def test_app_property(self, app):
         """app property returns the Application object."""
         env = _make_env()
@@ -553,6 +590,24 @@ class TestSimpleRequest:
         req = SimpleRequest(env, app)
         assert req.method_number == methods['GET']
 
+    def test_user_attributes(self, app):
+        """Slotted requests still accept user attributes."""
+        req = Request(_make_env(), app)
+        req.login = 'user'
+        assert req.login == 'user'
+        assert '_errors' not in vars(req)
+
+    def test_memoized(self, app):
+        """Derived values are computed only once."""
+        env = _make_env(HTTP_HOST='example.com:8080')
+        req = SimpleRequest(env, app)
+        assert (req.path, req.hostname, req.host_port) == \
+            ('/path', 'example.com', 8080)
+        env['PATH_INFO'] = '/other'
+        env['HTTP_HOST'] = 'other.com'
+        assert (req.path, req.hostname, req.host_port) == \
+            ('/path', 'example.com', 8080)
+
     def test_method_number_post(self, app):
         """method_number returns the POST constant."""
         env = _make_env(REQUEST_METHOD='POST')
@@ -788,6 +843,238 @@ class TestRequestInit:
 # Request properties
 # ---------------------------------------------------------------------------
 
+@fixture(scope='session')
+def lazy_app():
+    app = Application(__name__ + "_lazy")
+    app.lazy_parsing = True
+    return app
+
+
+class TestLazyParsing:
+    """Tests for Request properties with Application.lazy_parsing."""
+
+    def test_json(self, lazy_app):
+        body = b'{"name": "test"}'
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_TYPE='application/json',
+            CONTENT_LENGTH=str(len(body)),
+            **{'wsgi.input': BytesIO(body)},
+        )
+        req = Request(env, lazy_app)
+        assert env['wsgi.input'].tell() == len(body)  # auto_data
+        assert req.json == {"name": "test"}
+        assert req.json is req.json
+        assert isinstance(req.form, EmptyForm)
+
+    def test_bad_json(self, lazy_app):
+        body = b'{"name"'
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_TYPE='application/json',
+            CONTENT_LENGTH=str(len(body)),
+            **{'wsgi.input': BytesIO(body)},
+        )
+        req = Request(env, lazy_app)  # no error yet
+        with raises(HTTPException):
+            req.json  # pylint: disable=pointless-statement
+        assert isinstance(req.json, EmptyForm)
+
+    def test_form(self, lazy_app):
+        body = b'name=test'
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_TYPE='application/x-www-form-urlencoded',
+            CONTENT_LENGTH=str(len(body)),
+            **{'wsgi.input': BytesIO(body)},
+        )
+        req = Request(env, lazy_app)
+        assert req.form.getfirst("name") == "test"
+        assert isinstance(req.json, EmptyForm)
+
+    def test_args_and_cookies(self, lazy_app):
+        env = _make_env(QUERY_STRING='a=1', HTTP_COOKIE='sid=abc')
+        req = Request(env, lazy_app)
+        assert req.args.getfirst("a") == "1"
+        assert req.cookies["sid"].value == "abc"
+        assert Request(_make_env(), lazy_app).cookies is None
+
+    def test_set_args(self, lazy_app):
+        req = Request(_make_env(QUERY_STRING='a=1'), lazy_app)
+        args = Args(req)
+        req.args = args
+        assert req.args is args
+
+
+@fixture(scope='session')
+def spool_app():
+    app = Application(__name__ + "_spool")
+    app.spool_body = True
+    app.data_size = 4
+    app.cached_size = 3
+    return app
+
+
+class TestSpoolBody:
+    """Tests for Request body with Application.spool_body."""
+
+    def test_spooled(self, spool_app):
+        body = b'0123456789'
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_TYPE='application/octet-stream',
+            CONTENT_LENGTH=str(len(body)),
+            **{'wsgi.input': BytesIO(body)},
+        )
+        req = Request(env, spool_app)
+        assert env['wsgi.input'].tell() == 0  # spooled on first access
+        assert req.data[2:5] == b'234'
+        assert req.data is req.data
+        assert bytes(req.data_view[-2:]) == b'89'
+        assert req.body_file.read() == body
+        assert req.body_file.read(3) == b'012'
+        assert req.read(4) == b'3456'
+
+    def test_close(self, spool_app):
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_LENGTH='10',
+            **{'wsgi.input': BytesIO(b'0123456789')},
+        )
+        req = Request(env, spool_app)
+        data, body_file = req.data, req.body_file
+        view = req.data_view
+        req.close()  # data_view is still used
+        assert not data.closed
+        assert body_file.closed
+        view.release()
+        req.close()
+        assert data.closed
+
+    def test_close_response(self):
+        app = Application(__name__ + "_close")
+        app.spool_body = True
+        app.data_size = 4
+        files = []
+
+        @app.route('/path', method=methods['POST'])
+        def echo(req):
+            files.append(req.body_file)
+            return FileObjResponse(req.body_file)
+
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_LENGTH='10',
+            **{'wsgi.input': BytesIO(b'0123456789')},
+        )
+        result = app(env, lambda *_: None)
+        assert b''.join(result) == b'0123456789'
+        assert not files[0].closed
+        result.close()
+        assert files[0].closed
+
+    def test_small(self, spool_app):
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_LENGTH='3',
+            **{'wsgi.input': BytesIO(b'abc')},
+        )
+        req = Request(env, spool_app)
+        assert req.data == b'abc'
+        assert req.body_file.read() == b'abc'
+
+    def test_incomplete(self, spool_app):
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_LENGTH='10',
+            **{'wsgi.input': BytesIO(b'01234')},
+        )
+        req = Request(env, spool_app)
+        with raises(HTTPException):
+            req.body_file  # pylint: disable=pointless-statement
+
+    def test_without_body(self, spool_app):
+        req = Request(_make_env(), spool_app)
+        assert req.body_file is None
+        assert req.data == b''  # wsgi.input is BytesIO
+
+
+class TestIterJson:
+    """Tests for incremental JSON parsing by Request.iter_json."""
+
+    @staticmethod
+    def _req(app, body, ctype='application/octet-stream', **kwargs):
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_TYPE=ctype,
+            CONTENT_LENGTH=str(len(body)),
+            **{'wsgi.input': BytesIO(body)},
+            **kwargs,
+        )
+        return Request(env, app)
+
+    def test_array(self, spool_app):
+        body = b' [{"id": 1, "tags": ["a", "b"]}, 1234, "\xc4\x8d", null]  '
+        req = self._req(spool_app, body)
+        values = req.iter_json()
+        assert next(values) == {"id": 1, "tags": ["a", "b"]}
+        assert req.input.tell() < len(body)  # incremental
+        assert list(values) == [1234, "č", None]
+
+    def test_path(self, lazy_app):
+        body = b'{"meta": {"x": [1]}, "records": {"items": [[1], [2]]}}'
+        req = self._req(lazy_app, body, 'application/json')
+        assert list(req.iter_json("records.items.item")) == [[1], [2]]
+        req = self._req(lazy_app, body, 'application/json')
+        assert not list(req.iter_json("data.item"))
+
+    def test_empty(self, spool_app):
+        assert not list(self._req(spool_app, b'[ ]').iter_json())
+
+    def test_ndjson(self, spool_app):
+        body = b'{"a": 1}\n\n[2]\r\n3'
+        req = self._req(spool_app, body, 'application/x-ndjson')
+        assert list(req.iter_json()) == [{"a": 1}, [2], 3]
+
+    def test_chunked(self, spool_app):
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            HTTP_TRANSFER_ENCODING='chunked',
+            **{'wsgi.input': BytesIO(b'3\r\n[1,\r\n3\r\n 23\r\n2\r\n]\n\r\n'
+                                     b'0\r\n\r\n')},
+        )
+        req = Request(env, spool_app)
+        assert list(req.iter_json()) == [1, 23]
+
+    def test_invalid(self, spool_app):
+        req = self._req(spool_app, b'[1, 2')
+        with raises(HTTPException):
+            list(req.iter_json())
+        req = self._req(spool_app, b'{"a": 1}')
+        with raises(HTTPException):
+            list(req.iter_json())
+        req = self._req(spool_app, b'1\n{', 'application/x-ndjson')
+        with raises(HTTPException):
+            list(req.iter_json())
+        with raises(ValueError):
+            list(self._req(spool_app, b'[]').iter_json("data"))
+
+    def test_small_blocks(self):
+        body = (b'{"skip": {"x": ["]", "\\\\", "\\"[{"]}, "other": 12, '
+                b'"data": [{"a": "\\"}"}, 1234, true, "\xc4\x8d"]}')
+        blocks = [body[i:i + 1] for i in range(len(body))]
+        assert list(iter_json_request(blocks, "data.item")) == \
+            [{"a": '"}'}, 1234, True, "č"]
+        blocks = [b'{"a"', b': 1}\n[', b'2', b']\n', b'\n3']
+        assert list(iter_ndjson_request(blocks)) == [{"a": 1}, [2], 3]
+
+    def test_invalid_value(self):
+        for body in (b'[tru]', b'[1x]', b'["a]', b'[,]', b'{"x": , "a": []}'):
+            with raises(HTTPException):
+                list(iter_json_request([body], "a.item" if body[0] == 123
+                                       else "item"))
+
+
 class TestRequestProperties:
     """Tests for Request properties not covered by TestRequest."""
 
@@ -849,6 +1136,19 @@ class TestRequestProperties:
         req = self._req(app, HTTP_ACCEPT='application/json')
         assert req.accept_json is True
 
+    def test_accept_json_false(self, app):
+        req = self._req(app, HTTP_ACCEPT='text/html, application/jsonl')
+        assert req.accept_json is False
+
+    def test_negotiate(self, app):
+        """negotiate returns the best offer for the header."""
+        req = self._req(app, HTTP_ACCEPT='text/*;q=0.5, application/json',
+                        HTTP_ACCEPT_LANGUAGE='cs, en;q=0.5')
+        assert req.negotiate(['text/html', 'application/json']) == \
+            'application/json'
+        assert req.negotiate(('en-US', 'de'), 'Accept-Language') == 'en-US'
+        assert req.negotiate(('utf-8',), 'Accept-Charset') == 'utf-8'
+
     def test_authorization_basic(self, app):
         """authorization parses a Basic auth header."""
         creds = base64.b64encode(b'user:pass').decode()
@@ -932,6 +1232,22 @@ class TestRequestProperties:
         req = Request(env, app)
         assert req.data == body
 
+    def test_data_without_copy(self, app):
+        """data, data_view and json share one body buffer."""
+        body = b'{"x": 1}'
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            CONTENT_LENGTH=str(len(body)),
+            CONTENT_TYPE='application/json',
+            **{'wsgi.input': BytesIO(body)},
+        )
+        req = Request(env, app)
+        assert req.json == {"x": 1}
+        assert req.data is req.data
+        assert req.data_view.obj is req.data
+        assert req.data_view.readonly
+        assert req.read() == b''  # read to the end by json parsing
+
     def test_data_property_none_for_non_bytesio(self, app):
         """data returns None when wsgi.input is not a BytesIO instance."""
         class _RawIO:
@@ -1016,6 +1332,14 @@ class TestRequestMethods:
         result = req.read_chunk()
         assert result == chunk_data
 
+    def test_read_chunk_invalid_size(self, app):
+        """read_chunk() accepts only hexadecimal digits as the size."""
+        env = _make_env(**{'wsgi.input': BytesIO(b'0x5\r\nHello\r\n')})
+        req = Request(env, app)
+        with raises(HTTPException) as err:
+            req.read_chunk()
+        assert err.value.args[0] == 400
+
     def test_del_does_not_raise(self, app):
         """__del__ executes without error."""
         req = Request(_make_env(), app)
@@ -1124,16 +1448,18 @@ class TestCachedInput:
         """read() returns from buffer when it holds enough data."""
         # Pre-populate buffer and keep todo > 0 so size is not capped to 0.
         ci = CachedInput(BytesIO(b'extra'), 10, block_size=32768)
-        ci._CachedInput__buffer = b'hello'  # pylint: disable=protected-access
-        ci._CachedInput__todo = 10  # pylint: disable=protected-access
+        # pylint: disable=protected-access
+        ci._CachedInput__buffer = bytearray(b'hello')
+        ci._CachedInput__todo = 10
         assert ci.read(3) == b'hel'
 
     def test_read_combines_buffer_and_file(self):
         """read() combines partial buffer with additional file data."""
         # 2 bytes in buffer, 5 bytes in file, request 5 → combine.
         ci = CachedInput(BytesIO(b'CDEFG'), 10, block_size=32768)
-        ci._CachedInput__buffer = b'AB'  # pylint: disable=protected-access
-        ci._CachedInput__todo = 10  # pylint: disable=protected-access
+        # pylint: disable=protected-access
+        ci._CachedInput__buffer = bytearray(b'AB')
+        ci._CachedInput__todo = 10
         result = ci.read(5)
         assert result == b'ABCDE'
 
@@ -1164,10 +1490,8 @@ class TestCachedInput:
         with raises(TimeoutError):
             ci.readline()
 
-    def test_readline_seen_data_resets_timer(self):
-        """readline() resets the timeout timer after consuming data."""
-        # With timeout=None, this just exercises the seen_data=True branch
-        # by having data in the buffer at timeout-check time.
+    def test_readline_without_crlf(self):
+        """readline() returns the rest of the body without CRLF."""
         data = b'nodot'
         ci = CachedInput(BytesIO(data), len(data), block_size=32768,
                          timeout=10)
@@ -1175,6 +1499,25 @@ class TestCachedInput:
         # No CRLF → returns full data
         assert result == data
 
+    def test_readinto(self):
+        """readinto() fills the buffer from the cache and the file."""
+        data = b'line\r\nrest'
+        ci = CachedInput(BytesIO(data), len(data), block_size=8)
+        assert ci.readline() == b'line\r\n'
+        buffer = bytearray(10)
+        assert ci.readinto(buffer) == 2     # rest of the cached block
+        assert ci.readinto(memoryview(buffer)[2:]) == 2   # from the file
+        assert buffer[:4] == b'rest'
+        assert ci.readinto(buffer) == 0
+
+    def test_readline_compaction(self):
+        """Many short lines in one big block are read in the right order."""
+        lines = [b'%d\r\n' % i for i in range(1000)]
+        data = b''.join(lines)
+        ci = CachedInput(BytesIO(data), len(data), block_size=64)
+        assert [ci.readline() for _ in lines] == lines
+        assert ci.readline() == b''
+
     def test_readline_with_existing_buffer(self):
         """readline() uses existing buffer content before reading file."""
         data = b'first\r\nsecond\r\n'
@@ -1184,40 +1527,138 @@ class TestCachedInput:
         assert ci.readline() == b'second\r\n'
 
     def test_readline_reads_more_from_file(self):
-        """readline() reads additional data when buffer is shorter than size.
-
-        Covers lines 1115-1118 (n_size read) and 1103-1104 (seen_data=True).
-        """
+        """readline() reads additional data when the line is not complete."""
         # Pre-load a short buffer (2 bytes) plus file that completes the line.
         ci = CachedInput(BytesIO(b'\r\n'), 2, block_size=5, timeout=10)
         # pylint: disable=protected-access
-        ci._CachedInput__buffer = b'ab'
+        ci._CachedInput__buffer = bytearray(b'ab')
         ci._CachedInput__todo = 2
-        # readline: buffer is non-empty → skip initial fill, size=block_size=5
-        # iter1: buffer=b'ab' → seen_data=True; consume; l_size=2 < 5
-        #        → reads 2 more bytes from file → buffer=b'\r\n'
-        # iter2: finds \r\n at pos=0 → returns b'ab\r\n'
+        # no CRLF in b'ab' → fill reads b'\r\n' from the file
         result = ci.readline()
         assert result == b'ab\r\n'
 
-    def test_readline_seen_data_timer_reset(self):
-        """readline() resets the timer when buffer empties after having data.
-
-        Covers lines 1106-1107 (seen_data=True → False, timer reset).
-        After the reset, timeout=0 fires TimeoutError on next iteration.
-        """
+    def test_readline_timeout_after_data(self):
+        """readline() raises TimeoutError when no more data comes in time."""
         # Pre-populate buffer with b'ab', file returns nothing, timeout=0.
         # pylint: disable=protected-access
         ci = CachedInput(BytesIO(b''), 2, block_size=5, timeout=0)
-        ci._CachedInput__buffer = b'ab'
+        ci._CachedInput__buffer = bytearray(b'ab')
         ci._CachedInput__todo = 2
-        # iter1: buffer=b'ab' → seen_data=True; consume; read()→b''; l_size=2<5
-        # iter2: buffer=b'' → seen_data resets to False + timer reset (1106)
-        # iter3: buffer=b'' + no data → time()>times_out_at → TimeoutError
+        # b'ab' has no CRLF, the file returns nothing and timeout=0 passes
         with raises(TimeoutError):
             ci.readline()
 
 
+# ---------------------------------------------------------------------------
+# ChunkedInput
+# ---------------------------------------------------------------------------
+
+def _chunked(*chunks, trailer=b''):
+    return b''.join(b'%x\r\n%s\r\n' % (len(chunk), chunk)
+                    for chunk in chunks) + b'0\r\n' + trailer + b'\r\n'
+
+
+class _NoReadAhead:
+    """wsgi.input without read1 method."""
+    def __init__(self, data):
+        self.file = BytesIO(data)
+        self.read = self.file.read
+        self.readline = self.file.readline
+
+
+class TestChunkedInput:
+    """Tests for the ChunkedInput class."""
+
+    def test_coalesce(self):
+        data = ChunkedInput(BytesIO(_chunked(*(b'%d' % i for i in range(10)))))
+        assert data.read(4) == b'0123'
+        assert data.read(4) == b'4567'
+        assert data.read(4) == b'89'
+        assert data.read() == b''
+
+    def test_small_chunks(self):
+        chunks = [b'%d\n' % (i % 10) for i in range(20000)]
+        raw = _chunked(*chunks, trailer=b'X-A: 1\r\n')
+        data = ChunkedInput(BytesIO(raw), block_size=len(raw))
+        assert data.readline() == b'0\n'
+        assert data.read(4) == b'1\n2\n'
+        assert data.read() == b''.join(chunks)[6:]
+        assert data.trailers == [('X-A', '1')]
+        data = ChunkedInput(BytesIO(raw), block_size=1000)
+        assert data.read() == b''.join(chunks)
+
+    def test_without_read_ahead(self):
+        raw = _chunked(b'a\nb', b'c' * 100, trailer=b'X-A: 1\r\n')
+        data = ChunkedInput(_NoReadAhead(raw), block_size=8)
+        assert data.readline() == b'a\n'
+        assert data.readline(5) == b'bcccc'
+        assert len(data.read()) == 96
+        assert data.trailers == [('X-A', '1')]
+
+    @mark.parametrize('raw', [
+        b'x\r\nabc\r\n',
+        b'3\r\nabcd\r\n0\r\n\r\n',
+        b'3\r\nabc\r\n',
+        b'1' * 5000,
+    ])
+    def test_invalid(self, raw):
+        with raises(HTTPException) as err:
+            ChunkedInput(BytesIO(raw)).read()
+        assert err.value.args[0] == 400
+
+    @mark.parametrize('size', [
+        b'0x3', b'0_3', b'+3', b'-3', b' 3', b'3 ', b'\t3', b'', b';ext'])
+    def test_invalid_size(self, size):
+        raw = size + b'\r\nabc\r\n0\r\n\r\n'
+        with raises(HTTPException) as err:
+            ChunkedInput(BytesIO(raw)).read()
+        assert err.value.args[0] == 400
+
+    def test_size(self):
+        raw = b'A;x=1\r\n' + b'a' * 10 + b'\r\n0\r\n\r\n'
+        assert ChunkedInput(BytesIO(raw)).read() == b'a' * 10
+
+    def test_max_size(self):
+        data = ChunkedInput(BytesIO(_chunked(b'abc', b'de')), max_size=4)
+        assert data.read(3) == b'abc'
+        with raises(HTTPException) as err:
+            data.read()
+        assert err.value.args[0] == 413
+
+    def test_read_chunk_max_body_size(self):
+        app = Application(__name__ + "_read_chunk")
+        app.max_body_size = 4
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            HTTP_TRANSFER_ENCODING='chunked',
+            **{'wsgi.input': BytesIO(_chunked(b'abc', b'de'))},
+        )
+        req = Request(env, app)
+        assert req.max_body_size == 4
+        assert req.read_chunk() == b'abc'
+        with raises(HTTPException):
+            req.read_chunk()
+
+    def test_request(self, app):
+        body = _chunked(b'a=1', b'&b=', b'2')
+        env = _make_env(
+            REQUEST_METHOD='POST',
+            HTTP_TRANSFER_ENCODING='chunked',
+            CONTENT_TYPE='application/x-www-form-urlencoded',
+            **{'wsgi.input': BytesIO(body)},
+        )
+        req = Request(env, app)
+        assert isinstance(req.input, ChunkedInput)
+        form = FieldStorageParser(req.input, req.headers).parse()
+        assert form.getvalue('b') == '2'
+
+        env['wsgi.input'] = BytesIO(body)
+        assert Request(env, app).read() == b'a=1&b=2'
+        env['wsgi.input'] = BytesIO(body)
+        assert list(Request(env, app).iter_body(2)) == \
+            [b'a=', b'1&', b'b=', b'2']
+
+
 # ---------------------------------------------------------------------------
 # Additional targeted tests for remaining uncovered lines
 # ---------------------------------------------------------------------------
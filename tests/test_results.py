@@ -25,6 +25,7 @@ from poorwsgi.results import (
     not_found,
     not_implemented,
     not_modified,
+    request_entity_too_large,
     unauthorized,
 )
 from poorwsgi.state import (
@@ -35,6 +36,7 @@ from poorwsgi.state import (
     HTTP_NOT_FOUND,
     HTTP_NOT_IMPLEMENTED,
     HTTP_NOT_MODIFIED,
+    HTTP_REQUEST_ENTITY_TOO_LARGE,
     HTTP_UNAUTHORIZED,
     METHOD_ALL,
     METHOD_GET,
@@ -443,6 +445,21 @@ class TestMethodNotAllowed:
         assert b"&lt;script&gt;" in body
 
 
+class TestRequestEntityTooLarge:
+    """request_entity_too_large → HTTP 413 Request Entity Too Large."""
+
+    def test_status_code(self):
+        assert request_entity_too_large(
+            _make_req(), error="too big").status_code \
+            == HTTP_REQUEST_ENTITY_TOO_LARGE
+
+    def test_uri_in_body(self):
+        _, _, body = _call(
+            request_entity_too_large(_make_req(uri='/<upload>'))
+        )
+        assert b"&lt;upload&gt;" in body
+
+
 class TestNotImplemented:
     """not_implemented → HTTP 501 Not Implemented."""
 
@@ -0,0 +1,311 @@
+"""Tests for regular expression routes dispatching."""
+import re
+
+from pytest import mark, raises
+
+from poorwsgi.routing import (SEGMENT_CHECKERS, PathArgs, RouteStats, Router,
+                              combine_patterns, literal_prefix, split_rule)
+from poorwsgi.state import METHOD_GET, METHOD_POST
+
+from .conftest import call
+
+# pylint: disable=missing-function-docstring
+
+
+class TestSplitRule:
+    """Tests for the split_rule function."""
+
+    def test_static(self):
+        assert split_rule("/a/b", lambda _f: None) == ("", "a", "b")
+
+    def test_metachars(self):
+        assert split_rule("/v1.0/<id:int>", lambda _f: r"\d+") is None
+
+    def test_groups(self):
+        assert split_rule("/a/<id:int>", lambda _f: r"\d+") == (
+            "", "a", ("id", r"\d+"))
+
+    def test_not_segment_filter(self):
+        assert split_rule("/a/<id:re:.*>", lambda _f: None) is None
+
+
+class TestCombinePatterns:
+    """Tests for the combine_patterns function."""
+
+    def test_first_wins(self):
+        regex = combine_patterns((r"/(?P<x>\d+)$", r"/(?P<x>\w+)$", "/.*"))
+        assert regex.match("/1").lastgroup == "_r0"
+        assert regex.match("/a").lastgroup == "_r1"
+        assert regex.match("/a/b").lastgroup == "_r2"
+        assert regex.match("a") is None
+
+    def test_not_combinable(self):
+        assert combine_patterns((r"/(?P<x>\w)(?P=x)$",)) is None
+        assert combine_patterns((r"/(\w)\1$",)) is None
+        assert combine_patterns((r"(?i)/a$",)) is None
+
+
+class TestLiteralPrefix:
+    """Tests for the literal_prefix function."""
+
+    def test_literal(self):
+        assert literal_prefix("/a/b") == "/a/b"
+        assert literal_prefix("^/a") == "/a"
+        assert literal_prefix(r"/v1\.0/(?P<id>\d+)$") == "/v1.0/"
+
+    def test_quantifiers(self):
+        assert literal_prefix("/ab?") == "/a"
+        assert literal_prefix("/ab*") == "/a"
+        assert literal_prefix("/ab+") == "/ab"
+        assert literal_prefix(r"/a\.{2}") == "/a"
+
+    def test_alternation(self):
+        assert literal_prefix("/a|/b") == ""
+        assert literal_prefix("/a(b|c)") == "/a"
+        assert literal_prefix("/a[|]") == "/a"
+        assert literal_prefix(r"/a\|b") == "/a|b"
+
+    def test_flags(self):
+        assert literal_prefix("(?i)/a") == ""
+
+
+class TestSegmentCheckers:
+    """Tests for checkers of predefined filters."""
+
+    SAMPLES = (
+        "", "0", "42", "-42", "-", "--1", "1-", "\u0661\u0662", "1.5",
+        "-1.5", "1.", ".5", "1.5.5", "_", "a_b", "\u00e9t\u00e9", "a b",
+        "a-b", "ff", "FFx", "12345678-1234-1234-1234-123456789abc",
+        "12345678-1234-1234-1234-123456789abcd",
+        "12345678-1234-1234-12341-23456789abc",
+        "1234567801234-1234-1234-123456789abc", "\u00b2", "\u2167",
+    )
+
+    def test_predefined_filters(self, app):
+        regexes = {regex for _, (regex, _) in app.filters.items()}
+        assert set(SEGMENT_CHECKERS) <= regexes
+
+    @mark.parametrize("regex", tuple(SEGMENT_CHECKERS))
+    def test_same_as_regex(self, regex):
+        checker = SEGMENT_CHECKERS[regex]
+        for sample in self.SAMPLES:
+            assert bool(checker(sample)) == bool(
+                re.fullmatch(regex, sample)), sample
+
+
+class TestPathArgs:
+    """Tests for the PathArgs class."""
+
+    def test_mapping(self):
+        args = PathArgs((("id", int), ("name", str)), (42, "x"))
+        assert args == {"id": 42, "name": "x"}
+        assert list(args) == ["id", "name"]
+        assert args.get("other") is None
+        with raises(KeyError):
+            args["other"]  # pylint: disable=pointless-statement
+        copy = args.copy()
+        copy["id"] = 1
+        assert args["id"] == 42
+        assert not PathArgs((), ())
+
+
+class TestRouter:
+    """Tests for the Router class."""
+
+    def test_segment_tree(self, app):
+        app.set_route("/user/<id:int>", lambda _req, _id: "int")
+        app.set_route("/user/<name:word>", lambda _req, _name: "word")
+        router = Router(app.regular_routes, lambda f: {
+            ":int": r"-?\d+", ":word": r"\w+"}.get(f))
+        assert not router.regular
+
+        ruri, _, groups, path_args = router.find("/user/42", METHOD_GET)
+        assert ruri.pattern == r"/user/(?P<id>-?\d+)$"
+        assert groups == ("42",)
+        assert path_args == {"id": "42"}
+        assert router.find("/user/42/x", METHOD_GET) is None
+        assert router.find("/user/42", METHOD_POST) is None
+
+    def test_regular_fallback(self, app):
+        app.set_regular_route(r"/user/(?P<id>\d+)$", lambda _req, _id: "re")
+        router = Router(app.regular_routes, lambda _f: None)
+        assert len(router.regular) == 1
+        _, _, groups, path_args = router.find("/user/42", METHOD_GET)
+        assert groups == ("42",)
+        assert path_args == {"id": "42"}
+
+    def test_combined_regular(self, app):
+        app.set_regular_route(r"/a/(?P<id>\d+)$", lambda _req, _id: "1")
+        app.set_regular_route(r"/a/(?P<id>\w+)$", lambda _req, _id: "2",
+                              METHOD_POST)
+        app.set_regular_route(r"(?i)/A/(?P<id>\w+)$", lambda _req, _id: "3")
+        app.set_regular_route(r"/a/(?P<id>.+)$", lambda _req, _id: "4")
+        router = Router(app.regular_routes, lambda _f: None)
+
+        _, (handler, _, _), groups, path_args = router.find(
+            "/a/x", METHOD_GET)
+        assert handler(None, None) == "3"
+        assert path_args == {"id": "x"}
+        _, (handler, _, _), _, _ = router.find("/a/x", METHOD_POST)
+        assert handler(None, None) == "2"
+        _, (handler, _, _), groups, _ = router.find("/a/x/y", METHOD_GET)
+        assert handler(None, None) == "4"
+        assert groups == ("x/y",)
+        assert router.find("/b", METHOD_GET) is None
+
+
+class TestRouteStats:
+    """Tests for hit counters and reordering of regular routes."""
+
+    def test_counters(self, app):
+        app.set_regular_route(r"/a-(\d+)$", lambda _req, _x: "a")
+        app.set_regular_route(r"/b-(\d+)$", lambda _req, _x: "b")
+        app.set_route("/c/<id:int>", lambda _req, _x: "tree")
+        assert app.route_stats == {}
+        assert call(app, "/b-1")[2] == "b"
+        assert call(app, "/b-2")[2] == "b"
+        assert call(app, "/a-1")[2] == "a"
+        assert call(app, "/c/1")[2] == "tree"
+        stats = {key.pattern: val for key, val in app.route_stats.items()}
+        assert stats == {
+            r"/a-(\d+)$": RouteStats(1, 3),
+            r"/b-(\d+)$": RouteStats(2, 1),
+        }
+
+    def test_reorder(self, app):
+        app.set_regular_route(r"/a-(\d+)$", lambda _req, _x: "a")
+        app.set_regular_route(r"/b-(\d+)$", lambda _req, _x: "b")
+        app.set_regular_route(r"/(\w+)-(\w+)$", lambda _req, *_x: "any")
+        app.set_regular_route(r"/c-(\w+)$", lambda _req, _x: "c")
+        app.reorder_interval = 4
+        for _ in range(4):
+            assert call(app, "/b-1")[2] == "b"
+        assert call(app, "/c-1")[2] == "any"  # order is kept
+        assert call(app, "/a-1")[2] == "a"
+        stats = {key.pattern: val for key, val in app.route_stats.items()}
+        # /b- route is checked before /a- route after reorder
+        assert stats[r"/a-(\d+)$"] == RouteStats(1, 4)
+        assert stats[r"/b-(\d+)$"] == RouteStats(4, 2)
+        assert stats[r"/c-(\w+)$"] == RouteStats(0, 0)
+
+    def test_reorder_blocks(self, app):
+        app.set_regular_route(r"/a-(\d+)$", lambda _req, _x: "a")
+        app.set_regular_route(r"/b-(\d+)$", lambda _req, _x: "b")
+        app.set_regular_route(r"/(\w+)$", lambda _req, _x: "any")
+        app.set_regular_route(r"/c-(\d+)$", lambda _req, _x: "c")
+        app.set_regular_route(r"/d-(\d+)$", lambda _req, _x: "d")
+        app.reorder_interval = 4
+        for _ in range(5):
+            assert call(app, "/d-1")[2] == "d"
+        stats = {key.pattern: val for key, val in app.route_stats.items()}
+        # /d- route moves before /c- route, but not before /(\w+) route
+        assert stats[r"/a-(\d+)$"] == RouteStats(0, 5)
+        assert stats[r"/(\w+)$"] == RouteStats(0, 5)
+        assert stats[r"/c-(\d+)$"] == RouteStats(0, 3)
+        assert stats[r"/d-(\d+)$"] == RouteStats(5, 0)
+
+
+class TestPrefilter:
+    """Tests for the literal prefix index of regular routes."""
+
+    def test_first_segment(self, app):
+        app.set_regular_route(r"/reports/(?P<id>\d+)/pdf$",
+                              lambda _req, _id: "pdf")
+        app.set_regular_route(r"/users/(\d+)$", lambda _req, _x: "user")
+        app.set_regular_route(r"/(\w+)/(\d+)/?$", lambda _req, *_x: "any")
+        assert call(app, "/users/1")[2] == "user"
+        assert call(app, "/reports/1/pdf")[2] == "pdf"
+        assert call(app, "/reports/1")[2] == "any"
+        assert call(app, "/other/1")[2] == "any"
+        assert call(app, "/reports")[0] == "404"
+        stats = {key.pattern: val for key, val in app.route_stats.items()}
+        assert stats[r"/reports/(?P<id>\d+)/pdf$"] == RouteStats(1, 1)
+        assert stats[r"/users/(\d+)$"] == RouteStats(1, 0)
+        assert stats[r"/(\w+)/(\d+)/?$"] == RouteStats(2, 1)
+
+    def test_order(self, app):
+        app.set_regular_route(r"/(\w+)/(\d+)$", lambda _req, *_x: "any")
+        app.set_regular_route(r"/users/(\d+)$", lambda _req, _x: "user")
+        assert call(app, "/users/1")[2] == "any"
+
+
+class TestDispatch:
+    """Tests for dispatching requests to regular routes."""
+
+    def test_converters(self, app):
+        @app.route("/add/<a:int>/<b:float>")
+        def add(req, a, b):
+            assert req.path_args == {"a": a, "b": b}
+            return str(a + b)
+
+        assert call(app, "/add/1/2.5")[2] == "3.5"
+        assert call(app, "/add/1/x")[0] == "404"
+
+    def test_first_registered_wins(self, app):
+        app.set_regular_route(r"/item/(\d+)$", lambda _req, _x: "regular")
+        app.set_route("/item/<id:int>", lambda _req, _x: "tree")
+        app.set_route("/item/<name>", lambda _req, _x: "name")
+        assert call(app, "/item/42")[2] == "regular"
+        assert call(app, "/item/x")[2] == "name"
+
+    def test_tree_before_regular(self, app):
+        app.set_route("/item/<id:int>", lambda _req, _x: "tree")
+        app.set_regular_route(r"/item/(\d+)$", lambda _req, _x: "regular")
+        assert call(app, "/item/42")[2] == "tree"
+
+    def test_method_falls_through(self, app):
+        app.set_route("/item/<id:int>", lambda _req, _x: "get")
+        app.set_route("/item/<name>", lambda _req, _x: "post", METHOD_POST)
+        assert call(app, "/item/42")[2] == "get"
+        assert call(app, "/item/42", "POST")[2] == "post"
+        assert call(app, "/item/42", "PUT")[0] == "404"
+
+    def test_static_segment_metachars(self, app):
+        app.set_route("/v1.0/<id:int>", lambda _req, _x: "dot")
+        assert call(app, "/v1.0/1")[2] == "dot"
+        assert call(app, "/v1x0/1")[2] == "dot"  # regex behaviour
+
+    def test_pop_route(self, app):
+        app.set_route("/item/<id:int>", lambda _req, _x: "tree")
+        assert call(app, "/item/42")[2] == "tree"
+        app.pop_route("/item/<id:int>", METHOD_GET)
+        assert call(app, "/item/42")[0] == "404"
+
+    def test_set_filter(self, app):
+        app.set_route("/item/<id:int>", lambda _req, _x: "tree")
+        app.set_filter("int", r"\d{3}", int)
+        # route was compiled with original filter
+        assert call(app, "/item/42")[2] == "tree"
+        app.set_route("/other/<id:int>", lambda _req, _x: "other")
+        assert call(app, "/other/42")[0] == "404"
+        assert call(app, "/other/420")[2] == "other"
+
+
+class TestDispatchCache:
+    """Tests for the dispatch cache."""
+
+    def test_disabled(self, app):
+        app.set_route("/item/<id:int>", lambda _req, x: str(x))
+        assert call(app, "/item/1")[2] == "1"
+        assert app.dispatch_cache_info is None
+
+    def test_hits_and_misses(self, app):
+        app.dispatch_cache_size = 2
+        app.set_route("/item/<id:int>", lambda _req, x: str(x + 1))
+        assert call(app, "/item/1")[2] == "2"
+        assert call(app, "/item/1")[2] == "2"
+        assert call(app, "/item/1", "POST")[0] == "404"
+        info = app.dispatch_cache_info
+        assert (info.hits, info.misses, info.maxsize) == (1, 2, 2)
+
+    def test_invalidation(self, app):
+        app.dispatch_cache_size = 10
+        app.set_route("/item/<id:int>", lambda _req, _x: "int")
+        assert call(app, "/item/1")[2] == "int"
+        app.pop_route("/item/<id:int>", METHOD_GET)
+        assert call(app, "/item/1")[0] == "404"
+        app.set_regular_route(r"/item/(\d+)$", lambda _req, _x: "re")
+        assert call(app, "/item/1")[2] == "re"
+        app.set_route("/item/1", lambda _req: "static")
+        assert call(app, "/item/1")[2] == "static"
+        assert app.dispatch_cache_info is None  # not used for static routes
@@ -12,6 +12,7 @@ from typing import Any
 
 from pytest import fixture, raises
 
+from poorwsgi.headers import RequestCookies
 from poorwsgi.session import (
     Session, PoorSession, SessionError, NoCompress,
     get_token, check_token, hidden, encrypt, KEYSTREAM_SIZE,
@@ -290,6 +291,16 @@ class TestErrors:
         session2.load(session.cookie)
         assert session2.data == {'x': 1}
 
+    def test_request_cookies(self):
+        """PoorSession loads from the RequestCookies mapping."""
+        session = PoorSession(SECRET_KEY)
+        session.data['x'] = 1
+        session.write()
+        header = 'other=1; SESSID=%s' % session.cookie['SESSID'].coded_value
+        session2 = PoorSession(SECRET_KEY)
+        session2.load(RequestCookies(header))
+        assert session2.data == {'x': 1}
+
     def test_load_empty_cookie_value(self):
         """load() with an empty cookie value leaves data unchanged."""
         cookies = SimpleCookie()
@@ -415,6 +426,9 @@ class TestSession:
         session2 = Session()
         session2.load(session.cookie)
         assert session2.data == "my-session-id"
+        session3 = Session()
+        session3.load(RequestCookies('SESSID=my-session-id'))
+        assert session3.data == "my-session-id"
 
     def test_empty_cookie(self):
         """Tests that Session.load with no matching cookie leaves data as